@@ -0,0 +1,152 @@
+"""
+Admission control for ZeroToHire.
+Per-user and per-endpoint token buckets plus queue bounds per priority class, checked before a request reaches the model.
+"""
+
+import math
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from metrics import ADMISSION_REJECTIONS_TOTAL
+
+# Request classes; the router also serves queued chat before reviews (model_router.PRIORITIES)
+INTERACTIVE = 'interactive'
+REVIEW = 'review'
+
+# Configuration
+ADMISSION_ENABLED = os.getenv('ADMISSION_ENABLED', 'True').lower() == 'true'
+MAX_QUEUE = int(os.getenv('ADMISSION_MAX_QUEUE', 16))
+
+# (per-user requests/minute, per-user burst, endpoint-wide requests/minute, endpoint-wide burst)
+LIMITS = {
+    INTERACTIVE: (
+        float(os.getenv('ADMISSION_CHAT_PER_MINUTE', 20)), float(os.getenv('ADMISSION_CHAT_BURST', 5)),
+        float(os.getenv('ADMISSION_CHAT_GLOBAL_PER_MINUTE', 600)), float(os.getenv('ADMISSION_CHAT_GLOBAL_BURST', 60)),
+    ),
+    REVIEW: (
+        float(os.getenv('ADMISSION_REVIEW_PER_MINUTE', 6)), float(os.getenv('ADMISSION_REVIEW_BURST', 2)),
+        float(os.getenv('ADMISSION_REVIEW_GLOBAL_PER_MINUTE', 120)), float(os.getenv('ADMISSION_REVIEW_GLOBAL_BURST', 10)),
+    ),
+}
+
+# Reverse proxies (comma-separated addresses) whose X-Forwarded-For header names the real client;
+# behind an unlisted proxy every anonymous client shares the proxy's address and bucket
+TRUSTED_PROXIES = {address.strip() for address in os.getenv('TRUSTED_PROXIES', '').split(',') if address.strip()}
+
+# Share of the queue each class may fill: reviews back off well before chat does
+QUEUE_SHARE = {INTERACTIVE: 1.0, REVIEW: 0.5}
+
+_IDLE_BUCKET_S = 600
+
+
+def client_address(remote_addr: Optional[str], forwarded_for: Optional[str] = None) -> Optional[str]:
+    """Address an anonymous client is rate limited by.
+
+    X-Forwarded-For is only honoured when the connection comes from a trusted
+    proxy, since anyone can send the header. Proxies append to it, so the
+    client is the rightmost entry that isn't itself a trusted proxy.
+    """
+    if not forwarded_for or remote_addr not in TRUSTED_PROXIES:
+        return remote_addr
+    for address in reversed([hop.strip() for hop in forwarded_for.split(',')]):
+        if address and address not in TRUSTED_PROXIES:
+            return address
+    return remote_addr
+
+
+class AdmissionRejected(Exception):
+    """A request was turned away; retry_after is a whole number of seconds."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def message(self) -> str:
+        if self.reason == 'queue_full':
+            return f"The tutor is busy right now. Please try again in {self.retry_after}s."
+        return f"You're sending requests faster than the tutor can answer. Please try again in {self.retry_after}s."
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second up to `burst`."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def take(self, now: float) -> float:
+        """Take a token; returns 0 on success, else the seconds until one is available."""
+        self.tokens = min(self.burst, self.tokens + max(0.0, now - self.updated) * self.rate)
+        self.updated = max(self.updated, now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else float(_IDLE_BUCKET_S)
+
+
+class AdmissionController:
+    """Decides whether a model-bound request may enter the router's queue.
+
+    Each request class has a bucket per client (user ID, or address for
+    anonymous clients) and one shared by everyone. Requests are also refused
+    once the user requests waiting in the inference queue reach the class's
+    share of ADMISSION_MAX_QUEUE, so reviews are shed before interactive chat.
+    """
+
+    def __init__(self, router):
+        self.router = router
+        self._user_buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._endpoint_buckets: Dict[str, TokenBucket] = {
+            request_class: TokenBucket(limits[2] / 60, limits[3]) for request_class, limits in LIMITS.items()
+        }
+        self._lock = threading.Lock()
+
+    def _prune(self, now: float):
+        idle = [key for key, bucket in self._user_buckets.items() if now - bucket.updated > _IDLE_BUCKET_S]
+        for key in idle:
+            del self._user_buckets[key]
+
+    def _reject(self, request_class: str, reason: str, retry_after: float):
+        ADMISSION_REJECTIONS_TOTAL.labels(request_class=request_class, reason=reason).inc()
+        raise AdmissionRejected(reason, max(1, math.ceil(retry_after)))
+
+    def reject_busy(self, request_class: str):
+        """Raise AdmissionRejected for a full queue (also used by callers that bound a queue of their own)."""
+        # About one generation's time frees a slot; use recent latency when it's known
+        slo = self.router.slo
+        self._reject(request_class, 'queue_full', (slo.p95() if slo is not None else None) or 10.0)
+
+    def admit(self, client: Optional[str], request_class: str):
+        """Raise AdmissionRejected if the request must wait; otherwise consume its tokens."""
+        if not ADMISSION_ENABLED:
+            return
+
+        # Background prefill and hint ladders wait behind every user request, so they never count here
+        if self.router.queued(foreground_only=True) >= MAX_QUEUE * QUEUE_SHARE.get(request_class, 1.0):
+            self.reject_busy(request_class)
+
+        limits = LIMITS.get(request_class)
+        if limits is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if len(self._user_buckets) > 10000:
+                self._prune(now)
+            key = (client or 'anonymous', request_class)
+            bucket = self._user_buckets.get(key)
+            if bucket is None:
+                bucket = self._user_buckets[key] = TokenBucket(limits[0] / 60, limits[1])
+            wait = bucket.take(now)
+            if wait:
+                self._reject(request_class, 'user_rate', wait)
+            wait = self._endpoint_buckets[request_class].take(now)
+            if wait:
+                # Give back the user's token: the refusal isn't their fault
+                bucket.tokens = min(bucket.burst, bucket.tokens + 1)
+                self._reject(request_class, 'endpoint_rate', wait)
@@ -0,0 +1,233 @@
+"""
+Hardware-aware llama.cpp tuning for ZeroToHire.
+Detects CPU and memory limits, calibrates thread and batch sizes once, and caches the result on disk.
+"""
+
+import json
+import os
+import resource
+from typing import Dict, List, Optional, Tuple
+
+
+# Calibration workload: a prompt longer than the largest batch candidate, so every
+# candidate's prefill runs in full batches, plus a short decode
+CALIBRATION_PREAMBLE = "You are Alex, an expert coding tutor specializing in LeetCode problems.\n"
+CALIBRATION_SENTENCE = "Explain step by step how a sliding window finds the longest substring without repeating characters. "
+CALIBRATION_MAX_TOKENS = 32
+BATCH_CANDIDATES = (256, 512, 1024)
+
+
+# ==================== Hardware Detection ====================
+
+def _read_file(path: str) -> Optional[str]:
+    try:
+        with open(path, 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def physical_core_count() -> int:
+    """Count physical cores (not hyperthreads) available to this process."""
+    cores = set()
+    cpuinfo = _read_file('/proc/cpuinfo')
+    if cpuinfo:
+        physical_id = core_id = None
+        for line in cpuinfo.splitlines() + ['']:
+            if not line.strip():
+                if core_id is not None:
+                    cores.add((physical_id, core_id))
+                physical_id = core_id = None
+            elif line.startswith('physical id'):
+                physical_id = line.split(':', 1)[1].strip()
+            elif line.startswith('core id'):
+                core_id = line.split(':', 1)[1].strip()
+
+    logical = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+    physical = len(cores) if cores else logical
+    return max(1, min(physical, logical))
+
+
+def cgroup_cpu_limit() -> Optional[float]:
+    """CPU quota from the cgroup (v2 or v1) in cores, or None when unlimited."""
+    # cgroup v2: "<quota> <period>" or "max <period>"
+    cpu_max = _read_file('/sys/fs/cgroup/cpu.max')
+    if cpu_max:
+        quota, _, period = cpu_max.partition(' ')
+        if quota != 'max' and period:
+            return int(quota) / int(period)
+        return None
+
+    # cgroup v1
+    for base in ('/sys/fs/cgroup/cpu', '/sys/fs/cgroup/cpu,cpuacct'):
+        quota = _read_file(os.path.join(base, 'cpu.cfs_quota_us'))
+        period = _read_file(os.path.join(base, 'cpu.cfs_period_us'))
+        if quota and period and int(quota) > 0:
+            return int(quota) / int(period)
+    return None
+
+
+def available_memory_bytes() -> Optional[int]:
+    """Memory available to this process, honouring cgroup limits."""
+    limits = []
+
+    meminfo = _read_file('/proc/meminfo')
+    if meminfo:
+        for line in meminfo.splitlines():
+            if line.startswith('MemAvailable:'):
+                limits.append(int(line.split()[1]) * 1024)
+                break
+
+    for path in ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        value = _read_file(path)
+        # v1 reports "no limit" as a huge number
+        if value and value != 'max' and int(value) < 1 << 60:
+            limits.append(int(value))
+            break
+
+    return min(limits) if limits else None
+
+
+def detect_hardware() -> Dict:
+    """Summarize the CPU and memory budget this process can use."""
+    physical = physical_core_count()
+    cpu_limit = cgroup_cpu_limit()
+    usable = physical if cpu_limit is None else max(1, min(physical, int(cpu_limit)))
+    return {
+        'physical_cores': physical,
+        'cgroup_cpu_limit': cpu_limit,
+        'usable_cores': usable,
+        'available_memory': available_memory_bytes()
+    }
+
+
+# ==================== Parameter Selection ====================
+
+def thread_candidates(usable_cores: int, reserved: int) -> List[int]:
+    """Thread counts worth calibrating, leaving `reserved` cores for the web workers."""
+    budget = max(1, usable_cores - reserved)
+    candidates = {budget, max(1, budget // 2), max(1, (budget * 3) // 4)}
+    return sorted(candidates, reverse=True)
+
+
+def memory_settings(model_size: int, available_memory: Optional[int]) -> Dict:
+    """Lock the model in RAM only when it comfortably fits and the memlock limit allows it."""
+    use_mlock = False
+    if available_memory and model_size * 1.5 < available_memory:
+        soft_limit, _ = resource.getrlimit(resource.RLIMIT_MEMLOCK)
+        use_mlock = soft_limit == resource.RLIM_INFINITY or soft_limit >= model_size
+
+    # Keep mmap so multiple processes share one page-cached copy of the weights
+    return {'use_mlock': use_mlock, 'use_mmap': True}
+
+
+def calibration_prompt(tokenize, min_tokens: int) -> Tuple[str, int]:
+    """The calibration prompt, repeated until it is longer than min_tokens, and its token count."""
+    sentences = 1
+    while True:
+        prompt = CALIBRATION_PREAMBLE + CALIBRATION_SENTENCE * sentences + "\nAlex:"
+        prompt_tokens = len(tokenize(prompt.encode('utf-8')))
+        if prompt_tokens > min_tokens:
+            return prompt, prompt_tokens
+        # Grow in proportion to the shortfall so long targets need few tokenizer calls
+        sentences = max(sentences + 1, sentences * min_tokens // max(1, prompt_tokens) + 1)
+
+
+def calibrate(model_path: str, threads: List[int], batches: List[int], n_gpu_layers: int) -> Dict:
+    """Time the calibration workload to pick threads (decode speed) then batch size (prefill speed)."""
+    from llama_cpp import Llama
+    from benchmark import measure_generation
+
+    vocab = Llama(model_path=model_path, vocab_only=True, verbose=False)
+    try:
+        prompt, prompt_tokens = calibration_prompt(vocab.tokenize, max(batches))
+    finally:
+        vocab.close()
+    # Room for the prompt and the decode, rounded up to a multiple of 256
+    n_ctx = -(-(prompt_tokens + CALIBRATION_MAX_TOKENS + 16) // 256) * 256
+
+    def run(n_threads, n_batch):
+        llm = Llama(
+            model_path=model_path,
+            n_ctx=n_ctx,
+            n_threads=n_threads,
+            n_batch=n_batch,
+            n_gpu_layers=n_gpu_layers,
+            use_mmap=True,
+            verbose=False
+        )
+        try:
+            return measure_generation(llm, prompt, CALIBRATION_MAX_TOKENS)
+        finally:
+            llm.close()
+
+    default_batch = batches[len(batches) // 2]
+    thread_results = {n: run(n, default_batch) for n in threads}
+    best_threads = max(thread_results, key=lambda n: thread_results[n]['decode_tps'])
+    print(f"Autotune threads: { {n: r['decode_tps'] for n, r in thread_results.items()} } decode tok/s -> {best_threads}")
+
+    batch_results = {b: run(best_threads, b) for b in batches if b != default_batch}
+    batch_results[default_batch] = thread_results[best_threads]
+    best_batch = max(batch_results, key=lambda b: batch_results[b]['prefill_tps'])
+    print(f"Autotune batch: { {b: r['prefill_tps'] for b, r in batch_results.items()} } prefill tok/s "
+          f"({prompt_tokens} prompt tokens) -> {best_batch}")
+
+    return {'n_threads': best_threads, 'n_batch': best_batch}
+
+
+# ==================== Cache ====================
+
+def _cache_key(model_path: str, hardware: Dict, n_ctx: int, n_gpu_layers: int, reserved: int) -> str:
+    stat = os.stat(model_path)
+    # Whole GiB, so day-to-day changes in free memory don't force a recalibration
+    memory_gib = hardware['available_memory'] // (1 << 30) if hardware['available_memory'] else None
+    return '|'.join(str(part) for part in (
+        os.path.basename(model_path), stat.st_size, int(stat.st_mtime),
+        hardware['usable_cores'], reserved, memory_gib, n_ctx, n_gpu_layers
+    ))
+
+
+def _load_cache(cache_path: str) -> Dict:
+    try:
+        with open(cache_path, 'r') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _save_cache(cache_path: str, cache: Dict):
+    directory = os.path.dirname(cache_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = cache_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(cache, f, indent=2)
+    os.replace(tmp_path, cache_path)
+
+
+def get_tuned_params(model_path: str, n_ctx: int, n_gpu_layers: int) -> Dict:
+    """Return tuned llama.cpp parameters for this model and machine.
+
+    The calibration only runs when no cached result matches the model file,
+    the usable and reserved core counts, the available memory and the
+    context/offload settings.
+    """
+    cache_path = os.getenv('MODEL_AUTOTUNE_CACHE', 'data/autotune.json')
+    reserved = int(os.getenv('MODEL_AUTOTUNE_RESERVED_THREADS', 2))
+
+    hardware = detect_hardware()
+    key = _cache_key(model_path, hardware, n_ctx, n_gpu_layers, reserved)
+    cache = _load_cache(cache_path)
+    if key in cache:
+        print(f"Autotune: using cached parameters {cache[key]['params']}")
+        return cache[key]['params']
+
+    print(f"Autotune: calibrating for {hardware}...")
+    batches = [b for b in BATCH_CANDIDATES if b <= n_ctx] or [n_ctx]
+    params = calibrate(model_path, thread_candidates(hardware['usable_cores'], reserved), batches, n_gpu_layers)
+    params.update(memory_settings(os.path.getsize(model_path), hardware['available_memory']))
+
+    cache[key] = {'hardware': hardware, 'params': params}
+    _save_cache(cache_path, cache)
+    print(f"Autotune: selected {params}")
+    return params
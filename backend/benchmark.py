@@ -0,0 +1,403 @@
+"""
+Inference benchmarks for ZeroToHire.
+Drives the tutor's real prompt construction against a local GGUF model and reports decode throughput.
+
+Usage:
+    python benchmark.py speculative [--model-path model.gguf] [--submissions recorded.jsonl]
+    python benchmark.py sweep [--model-path model.gguf] [--threads 4 8] [--batch 256 512] [--ctx 4096]
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import queue
+import resource
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+from database import Database
+
+load_dotenv()
+
+
+# Representative review requests: (problem, submitted code) pairs as sent to /api/evaluate-code
+DEFAULT_SUBMISSIONS = [
+    {
+        'problem': {'id': 0, 'title': 'Two Sum', 'difficulty': 'Easy'},
+        'code': (
+            "class Solution:\n"
+            "    def twoSum(self, nums: List[int], target: int) -> List[int]:\n"
+            "        for i in range(len(nums)):\n"
+            "            for j in range(len(nums)):\n"
+            "                if nums[i] + nums[j] == target:\n"
+            "                    return [i, j]\n"
+            "        return []\n"
+        )
+    },
+    {
+        'problem': {'id': 2, 'title': 'Longest Substring Without Repeating Characters', 'difficulty': 'Medium'},
+        'code': (
+            "class Solution:\n"
+            "    def lengthOfLongestSubstring(self, s: str) -> int:\n"
+            "        seen = {}\n"
+            "        left = 0\n"
+            "        best = 0\n"
+            "        for right, ch in enumerate(s):\n"
+            "            if ch in seen:\n"
+            "                left = seen[ch] + 1\n"
+            "            seen[ch] = right\n"
+            "            best = max(best, right - left)\n"
+            "        return best\n"
+        )
+    },
+    {
+        'problem': {'id': 19, 'title': 'Valid Parentheses', 'difficulty': 'Easy'},
+        'code': (
+            "class Solution:\n"
+            "    def isValid(self, s: str) -> bool:\n"
+            "        stack = []\n"
+            "        pairs = {')': '(', ']': '[', '}': '{'}\n"
+            "        for ch in s:\n"
+            "            if ch in pairs:\n"
+            "                if stack[-1] != pairs[ch]:\n"
+            "                    return False\n"
+            "                stack.pop()\n"
+            "            else:\n"
+            "                stack.append(ch)\n"
+            "        return True\n"
+        )
+    }
+]
+
+
+def resolve_model_path(model_path: Optional[str] = None) -> str:
+    """Use an explicit GGUF path, or fall back to the same artifact the backend loads."""
+    if model_path:
+        return model_path
+
+    from inference import resolve_model_paths
+    return resolve_model_paths()[0]
+
+
+def load_submissions(path: Optional[str] = None) -> List[Dict]:
+    """Load recorded review submissions (JSON lines of {problem, code}), or the built-in set."""
+    if not path:
+        return DEFAULT_SUBMISSIONS
+
+    submissions = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                submissions.append(json.loads(line))
+    return submissions
+
+
+REVIEW_STOP = ["Student:", "User:", "Alex:", "\n\nAlex:"]
+CHAT_STOP = ["Student:", "User:", "Alex:", "\n\nAlex:", "\nAlex:"]
+
+# Scenarios the sweep runs for every parameter combination
+SWEEP_SCENARIOS = ('fresh_chat', 'long_history', 'code_context', 'evaluation')
+
+# Seconds one configuration may take, model load included
+SWEEP_TIMEOUT = float(os.getenv('BENCHMARK_SWEEP_TIMEOUT_S', 1800))
+
+
+def count_tokens(llm, text: str) -> int:
+    """Tokens the model's tokenizer produces for text, not counting the BOS token tokenize() adds."""
+    return len(llm.tokenize(text.encode('utf-8'))) - len(llm.tokenize(b''))
+
+
+def measure_generation(llm, prompt: str, max_tokens: int, temperature: float = 0.0,
+                       stop: Optional[List[str]] = None) -> Dict:
+    """Stream one completion and time it.
+
+    Time to first token covers prompt prefill; everything after it is decode.
+    Stream chunks are not tokens (a chunk can hold several, or a partial UTF-8
+    character), so the completion is re-tokenized to count them.
+    """
+    prompt_tokens = len(llm.tokenize(prompt.encode('utf-8')))
+    first_chunk = None
+    output = []
+    first_token_at = None
+
+    start = time.perf_counter()
+    stream = llm(
+        prompt,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        top_p=0.9,
+        echo=False,
+        stop=stop,
+        stream=True
+    )
+    for chunk in stream:
+        text = chunk['choices'][0].get('text')
+        if not text:
+            continue
+        if first_token_at is None:
+            first_token_at = time.perf_counter()
+            first_chunk = text
+        output.append(text)
+    end = time.perf_counter()
+
+    completion_tokens = count_tokens(llm, ''.join(output)) if output else 0
+    # Tokens that arrived with the first chunk were timed as part of prefill
+    decode_tokens = completion_tokens - (count_tokens(llm, first_chunk) if first_chunk else 0)
+    ttft = (first_token_at or end) - start
+    decode_time = end - (first_token_at or end)
+    return {
+        'prompt_tokens': prompt_tokens,
+        'completion_tokens': completion_tokens,
+        'ttft_s': round(ttft, 4),
+        'total_s': round(end - start, 4),
+        'prefill_tps': round(prompt_tokens / ttft, 2) if ttft > 0 else 0.0,
+        'decode_tps': round(decode_tokens / decode_time, 2) if decode_time > 0 and decode_tokens > 0 else 0.0
+    }
+
+
+def build_review_prompt(tutor, submission: Dict) -> str:
+    """Build the exact context evaluate_code() would send for a submission."""
+    tutor.current_problem = submission['problem']
+    tutor.conversation_history = submission.get('history', [])
+    language = submission.get('language', 'python')
+    eval_prompt = tutor._build_eval_prompt(submission['code'], language)
+    return tutor._build_internal_context(eval_prompt)
+
+
+def run_speculative_benchmark(model_path: str, submissions: List[Dict], max_tokens: int = 800,
+                              temperature: float = 0.0) -> Dict:
+    """Compare review decode throughput with and without prompt-lookup decoding."""
+    from tutor import CodingTutor
+
+    results = {}
+    previous_mode = os.environ.get('MODEL_DRAFT_MODE')
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db = Database(os.path.join(tmpdir, 'benchmark.db'))
+        try:
+            for mode in ('none', 'prompt_lookup'):
+                os.environ['MODEL_DRAFT_MODE'] = mode
+                tutor = CodingTutor(model_path, db, backend='llama_cpp')
+
+                runs = []
+                for submission in submissions:
+                    prompt = build_review_prompt(tutor, submission)
+                    runs.append(measure_generation(tutor.llm, prompt, max_tokens, temperature, stop=REVIEW_STOP))
+
+                completion_tokens = sum(run['completion_tokens'] for run in runs)
+                total_time = sum(run['total_s'] for run in runs)
+                results[mode] = {
+                    'runs': runs,
+                    'completion_tokens': completion_tokens,
+                    'tokens_per_sec': round(completion_tokens / total_time, 2) if total_time > 0 else 0.0,
+                    'mean_decode_tps': round(sum(run['decode_tps'] for run in runs) / len(runs), 2) if runs else 0.0
+                }
+
+                # Free the model before loading the next configuration
+                del tutor
+        finally:
+            db.close()
+            if previous_mode is None:
+                os.environ.pop('MODEL_DRAFT_MODE', None)
+            else:
+                os.environ['MODEL_DRAFT_MODE'] = previous_mode
+
+    baseline = results['none']['tokens_per_sec']
+    results['speedup'] = round(results['prompt_lookup']['tokens_per_sec'] / baseline, 3) if baseline else None
+    return results
+
+
+def print_speculative_table(results: Dict):
+    """Print a short human-readable summary."""
+    print(f"{'mode':<16}{'tokens':>10}{'tok/s':>10}{'decode tok/s':>15}")
+    for mode in ('none', 'prompt_lookup'):
+        row = results[mode]
+        print(f"{mode:<16}{row['completion_tokens']:>10}{row['tokens_per_sec']:>10}{row['mean_decode_tps']:>15}")
+    print(f"speedup: {results['speedup']}x")
+
+
+def _sweep_history(turns: int) -> List[Dict]:
+    """Synthetic back-and-forth of realistic message lengths."""
+    history = []
+    for i in range(turns):
+        history.append({
+            'role': 'user',
+            'content': f"I tried using a hash map to store what I've seen so far, but I'm not sure how to handle duplicates in case {i}. "
+                       "Should I check the map before or after inserting the current number?"
+        })
+        history.append({
+            'role': 'alex',
+            'content': "Good thinking! Walk through the example [3, 3] with target 6 by hand. "
+                       "When you reach the second 3, what is already in the map, and what would you look up?"
+        })
+    return history
+
+
+def build_sweep_prompts(tutor) -> Dict[str, Dict]:
+    """Build the representative prompts with the tutor's own prompt construction."""
+    submission = DEFAULT_SUBMISSIONS[0]
+    tutor.current_problem = submission['problem']
+    prompts = {}
+
+    tutor.conversation_history = [{'role': 'user', 'content': 'Can you give me a hint on where to start?'}]
+    prompts['fresh_chat'] = {'prompt': tutor._build_conversation_context(), 'stop': CHAT_STOP}
+
+    tutor.conversation_history = _sweep_history(5)
+    prompts['long_history'] = {'prompt': tutor._build_conversation_context(), 'stop': CHAT_STOP}
+
+    tutor.conversation_history = [{'role': 'user', 'content': 'Why is my solution slow?'}]
+    code_context = {'code': submission['code'], 'includeInContext': True}
+    prompts['code_context'] = {'prompt': tutor._build_conversation_context(code_context=code_context), 'stop': CHAT_STOP}
+
+    prompts['evaluation'] = {'prompt': build_review_prompt(tutor, submission), 'stop': REVIEW_STOP}
+    return prompts
+
+
+def _run_sweep_config(model_path: str, config: Dict, max_tokens: int, repeats: int, result_queue,
+                      backend: str = 'llama_cpp'):
+    """Child process body: load the model with one configuration and time every scenario."""
+    from tutor import CodingTutor
+
+    os.environ['MODEL_N_THREADS'] = str(config['n_threads'])
+    os.environ['MODEL_N_BATCH'] = str(config['n_batch'])
+    os.environ['MODEL_N_CTX'] = str(config['n_ctx'])
+
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db = Database(os.path.join(tmpdir, 'benchmark.db'))
+            load_start = time.perf_counter()
+            tutor = CodingTutor(model_path, db, backend=backend)
+            load_time = time.perf_counter() - load_start
+
+            scenarios = {}
+            for name, spec in build_sweep_prompts(tutor).items():
+                runs = [
+                    measure_generation(tutor.llm, spec['prompt'], max_tokens, stop=spec['stop'])
+                    for _ in range(repeats)
+                ]
+                scenarios[name] = {
+                    key: round(sum(run[key] for run in runs) / len(runs), 4)
+                    for key in runs[0]
+                }
+            db.close()
+
+        # ru_maxrss is reported in kilobytes on Linux
+        peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        result_queue.put({
+            **config,
+            'load_s': round(load_time, 3),
+            'peak_rss_mb': round(peak_rss_mb, 1),
+            'scenarios': scenarios
+        })
+    except Exception as e:
+        result_queue.put({**config, 'error': str(e)})
+
+
+def run_sweep(model_path: str, threads: List[int], batches: List[int], contexts: List[int],
+              max_tokens: int = 128, repeats: int = 1, timeout: float = SWEEP_TIMEOUT,
+              backend: str = 'llama_cpp') -> List[Dict]:
+    """Benchmark every MODEL_N_THREADS x MODEL_N_BATCH x MODEL_N_CTX combination.
+
+    Each configuration runs in a fresh process so peak RSS is measured per
+    configuration. A configuration that crashes (e.g. killed for running out of
+    memory) or runs longer than timeout seconds is reported as an error row
+    instead of stalling the sweep.
+    """
+    ctx = multiprocessing.get_context('spawn')
+    results = []
+    for n_threads, n_batch, n_ctx in itertools.product(threads, batches, contexts):
+        config = {'n_threads': n_threads, 'n_batch': n_batch, 'n_ctx': n_ctx}
+        print(f"Running threads={n_threads} batch={n_batch} ctx={n_ctx}...")
+
+        result_queue = ctx.Queue()
+        process = ctx.Process(target=_run_sweep_config,
+                              args=(model_path, config, max_tokens, repeats, result_queue, backend))
+        process.start()
+        deadline = time.monotonic() + timeout
+        result = None
+        while result is None:
+            try:
+                result = result_queue.get(timeout=1.0)
+            except queue.Empty:
+                if not process.is_alive() and result_queue.empty():
+                    # The child died without reporting (segfault, OOM killer, ...)
+                    result = {**config, 'error': f"benchmark process exited with code {process.exitcode}"}
+                elif time.monotonic() > deadline:
+                    process.kill()
+                    result = {**config, 'error': f"timed out after {timeout:.0f}s"}
+        process.join()
+        results.append(result)
+    return results
+
+
+def print_sweep_table(results: List[Dict]):
+    """Print one row per configuration and scenario."""
+    header = f"{'threads':>8}{'batch':>7}{'ctx':>7}  {'scenario':<14}{'prompt':>8}{'ttft s':>9}{'prefill t/s':>13}{'decode t/s':>12}{'rss MB':>9}"
+    print(header)
+    print('-' * len(header))
+    for result in results:
+        prefix = f"{result['n_threads']:>8}{result['n_batch']:>7}{result['n_ctx']:>7}  "
+        if 'error' in result:
+            print(f"{prefix}ERROR: {result['error']}")
+            continue
+        for name in SWEEP_SCENARIOS:
+            row = result['scenarios'][name]
+            print(f"{prefix}{name:<14}{int(row['prompt_tokens']):>8}{row['ttft_s']:>9}"
+                  f"{row['prefill_tps']:>13}{row['decode_tps']:>12}{result['peak_rss_mb']:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ZeroToHire inference benchmarks')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    speculative = subparsers.add_parser('speculative', help='Review throughput with and without prompt-lookup decoding')
+    speculative.add_argument('--model-path', help='Local GGUF file (defaults to the configured Hub model)')
+    speculative.add_argument('--submissions', help='JSON lines file of recorded {problem, code} review submissions')
+    speculative.add_argument('--max-tokens', type=int, default=800)
+    speculative.add_argument('--temperature', type=float, default=0.0)
+    speculative.add_argument('--output', help='Write the JSON results to this file')
+
+    sweep = subparsers.add_parser('sweep', help='TTFT and tokens/sec across llama.cpp parameters')
+    sweep.add_argument('--model-path', help='Local GGUF file (defaults to the configured Hub model)')
+    sweep.add_argument('--threads', type=int, nargs='+', default=[int(os.getenv('MODEL_N_THREADS', 4))])
+    sweep.add_argument('--batch', type=int, nargs='+', default=[int(os.getenv('MODEL_N_BATCH', 512))])
+    sweep.add_argument('--ctx', type=int, nargs='+', default=[int(os.getenv('MODEL_N_CTX', 4096))])
+    sweep.add_argument('--max-tokens', type=int, default=128)
+    sweep.add_argument('--repeats', type=int, default=1)
+    sweep.add_argument('--timeout', type=float, default=SWEEP_TIMEOUT, help='Seconds allowed per configuration')
+    sweep.add_argument('--output', help='Write the JSON results to this file')
+
+    args = parser.parse_args()
+
+    if args.command == 'speculative':
+        results = run_speculative_benchmark(
+            resolve_model_path(args.model_path),
+            load_submissions(args.submissions),
+            max_tokens=args.max_tokens,
+            temperature=args.temperature
+        )
+        print_speculative_table(results)
+    elif args.command == 'sweep':
+        results = run_sweep(
+            resolve_model_path(args.model_path),
+            threads=args.threads,
+            batches=args.batch,
+            contexts=args.ctx,
+            max_tokens=args.max_tokens,
+            repeats=args.repeats,
+            timeout=args.timeout
+        )
+        print_sweep_table(results)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""
+Chat WebSocket protocol for ZeroToHire.
+Turns /ws/chat payloads into token/final/error frames for one connection's tutor session; used by llm_comm.py and ws_gateway.py.
+"""
+
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from admission import AdmissionRejected, INTERACTIVE, REVIEW
+from auth import AuthManager
+from intents import router as intent_router
+
+
+def socket_user(token: Optional[str]) -> Optional[Dict]:
+    """The user an access token belongs to, like optional_token does for HTTP requests."""
+    if not token:
+        return None
+    payload = AuthManager.verify_token(token, 'access')
+    if not payload:
+        return None
+    return {'user_id': payload['user_id'], 'username': payload['username']}
+
+
+def client_key(current_user: Optional[Dict], address: Optional[str]) -> str:
+    """Who a request counts against for rate limiting: the user, or the address of an anonymous client."""
+    if current_user:
+        return f"user:{current_user['user_id']}"
+    return f"ip:{address}"
+
+
+class ChatFrames:
+    """Everything a chat turn needs besides the tutor session: admission, the problem set and recommendations.
+
+    Methods take the session (a CodingTutor, see CodingTutor.session()) to act
+    on, so each connection can keep its own conversation while sharing the models.
+    """
+
+    def __init__(self, admission, problems, recommender=None):
+        self.admission = admission
+        self.problems = problems
+        self.recommender = recommender
+
+    def route_intent(self, session, message: str):
+        """Answer a chat message without the model if the intent router recognizes it."""
+        context = {}
+        if self.recommender is not None:
+            context['recommend'] = lambda: self.recommender.recommend(
+                session.user_id, lambda: session.db.get_completed_problems(user_id=session.user_id), limit=3
+            )
+        result = intent_router.route(session, message, context)
+        if result is None:
+            return None
+        intent_router.apply(session, message, result)
+        if result.completion_changed and self.recommender is not None:
+            self.recommender.invalidate(session.user_id)
+        return result
+
+    def current_problem_record(self, session) -> Optional[Dict]:
+        """The dataset row for the session's current problem, which carries the reference solution."""
+        problem_id = session.current_problem.get('id') if session.current_problem else None
+        if problem_id is not None and 0 <= problem_id < len(self.problems):
+            return self.problems[problem_id]
+        return None
+
+    def _final(self, session, message: str) -> Dict:
+        return {
+            'type': 'final',
+            'message': message,
+            'conversation_history': session.conversation_history,
+            'current_problem': session.current_problem,
+            'problem_changed': False
+        }
+
+    def chat(self, session, payload: Dict, client: Optional[str] = None) -> Iterator[Dict]:
+        """Handle one /ws/chat message payload, yielding the frames to send back.
+
+        Payloads are chat messages, or {'type': 'evaluate', 'code', 'language'} to
+        stream a code review. Frames are {'type': 'token'}, {'type': 'final'} or
+        {'type': 'error'} dicts. client identifies the connection for rate limiting.
+        """
+        frames, stream = self.start(session, payload, client)
+        yield from frames
+        if stream is not None:
+            yield from stream
+
+    def start(self, session, payload: Dict, client: Optional[str] = None) -> Tuple[List[Dict], Optional[Iterator[Dict]]]:
+        """Everything a turn does before the model: validation, intent routing and admission.
+
+        Returns the frames to send right away and, if the turn was admitted to
+        the model, a generator of the rest that does no work until iterated.
+        """
+        if payload.get('type') == 'evaluate':
+            return self._start_evaluation(session, payload, client)
+
+        message = payload.get('message', '').strip()
+        if not message:
+            return [{'type': 'error', 'error': 'No message provided'}], None
+
+        code_context_payload = payload.get('codeContext')
+        context = None
+        if code_context_payload and code_context_payload.get('includeInContext'):
+            context = code_context_payload
+
+        intent = self.route_intent(session, message)
+        if intent is not None:
+            return [self._final(session, intent.reply)], None
+
+        try:
+            self.admission.admit(client, INTERACTIVE)
+        except AdmissionRejected as e:
+            return [{'type': 'error', 'error': e.message, 'retryAfter': e.retry_after}], None
+
+        return [], self._model_frames(session, session.chat_stream(message, code_context=context))
+
+    def _start_evaluation(self, session, payload: Dict, client: Optional[str]):
+        code = payload.get('code', '')
+        if not code.strip():
+            return [{'type': 'error', 'error': 'No code provided'}], None
+        if not session.current_problem:
+            return [{'type': 'error', 'error': 'No problem is currently loaded.'}], None
+
+        # Triage and the sandbox answer many submissions outright; only a model review uses the review budget
+        reply, eval_prompt, max_tokens = session.prepare_evaluation(
+            code, payload.get('language', 'python'), self.current_problem_record(session)
+        )
+        if reply is not None:
+            return [self._final(session, reply)], None
+
+        try:
+            self.admission.admit(client, REVIEW)
+        except AdmissionRejected as e:
+            return [{'type': 'error', 'error': e.message, 'retryAfter': e.retry_after}], None
+
+        return [], self._model_frames(session, session.review_stream(eval_prompt, max_tokens))
+
+    def _model_frames(self, session, stream) -> Iterator[Dict]:
+        """Chat frames for a tutor event stream; closing this closes the stream."""
+        try:
+            for event in stream:
+                if event['type'] == 'token':
+                    yield {'type': 'token', 'token': event['token']}
+                elif event['type'] == 'error':
+                    yield {'type': 'error', 'error': event['error']}
+                    break
+                elif event['type'] == 'final':
+                    yield self._final(session, event['message'])
+        finally:
+            stream.close()
+
+
+class SocketSession:
+    """Per-connection state: who is signed in and their own tutor session.
+
+    The user comes from the connection's access token and may be replaced by a
+    'token' field on any payload (after signing in or out). The session's
+    history and current problem are reloaded from the database before every
+    turn, like the HTTP endpoints do, so problem changes made over HTTP apply.
+    """
+
+    def __init__(self, tutor, current_user: Optional[Dict], address: Optional[str]):
+        self.tutor = tutor
+        self.current_user = current_user
+        self.address = address
+        self.session = tutor.session(self.user_id)
+
+    @property
+    def user_id(self) -> Optional[int]:
+        return self.current_user['user_id'] if self.current_user else None
+
+    @property
+    def client(self) -> str:
+        return client_key(self.current_user, self.address)
+
+    def begin_turn(self, payload: Dict) -> Optional[Dict]:
+        """Apply the payload's token, if any, and reload the session. Returns an error frame for a bad token."""
+        if 'token' in payload:
+            current_user = socket_user(payload['token']) if payload['token'] else None
+            if payload['token'] and current_user is None:
+                return {'type': 'error', 'error': 'Invalid or expired token'}
+            self.current_user = current_user
+        self.session.set_user_context(self.user_id)
+        return None
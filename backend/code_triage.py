@@ -0,0 +1,146 @@
+"""
+Static triage of code submissions for ZeroToHire.
+Uses Python's ast to catch trivial submissions before any review, and to list findings for the review prompt.
+"""
+
+import ast
+from typing import List, Optional, Tuple
+
+
+def _normalized_dump(tree: ast.AST) -> str:
+    """AST dump without docstrings, so formatting and comments don't matter."""
+    for node in ast.walk(tree):
+        body = getattr(node, 'body', None)
+        if (isinstance(body, list) and body and isinstance(body[0], ast.Expr)
+                and isinstance(getattr(body[0], 'value', None), ast.Constant) and isinstance(body[0].value.value, str)):
+            node.body = body[1:] or [ast.Pass()]
+    return ast.dump(tree, annotate_fields=False, include_attributes=False)
+
+
+def _is_empty_body(body: List[ast.stmt]) -> bool:
+    """Only pass, ..., docstrings or bare constants."""
+    for stmt in body:
+        if isinstance(stmt, ast.Pass):
+            continue
+        if isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Constant):
+            continue
+        return False
+    return True
+
+
+def _functions(tree: ast.AST) -> List[ast.FunctionDef]:
+    return [node for node in ast.walk(tree) if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))]
+
+
+def _unused_parameters(func: ast.FunctionDef) -> List[str]:
+    params = [arg.arg for arg in func.args.posonlyargs + func.args.args + func.args.kwonlyargs]
+    used = {node.id for node in ast.walk(func) if isinstance(node, ast.Name)}
+    return [name for name in params if name not in ('self', 'cls') and name not in used]
+
+
+def _nested_loops(func: ast.FunctionDef) -> List[Tuple[int, int]]:
+    """(line, depth) of loops nested at least two deep, outermost occurrence per nest."""
+    hot_spots = []
+
+    def visit(node: ast.AST, depth: int):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef)):
+                continue
+            loops = _loops_opened(child)
+            child_depth = depth + loops
+            if loops and depth < 2 <= child_depth:
+                hot_spots.append((child.lineno, depth + _max_loop_depth(child)))
+            visit(child, child_depth)
+
+    visit(func, 0)
+    return hot_spots
+
+
+def _loops_opened(node: ast.AST) -> int:
+    """Loop levels a node adds: one per loop statement, one per for clause of a comprehension."""
+    if isinstance(node, (ast.For, ast.AsyncFor, ast.While)):
+        return 1
+    if isinstance(node, (ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)):
+        # Each for clause runs inside the previous one
+        return len(node.generators)
+    return 0
+
+
+def _max_loop_depth(node: ast.AST) -> int:
+    depth = _loops_opened(node)
+    children = [_max_loop_depth(child) for child in ast.iter_child_nodes(node)
+                if not isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef))]
+    return depth + max(children, default=0)
+
+
+class TriageResult:
+    """What static analysis found in a submission."""
+
+    def __init__(self):
+        self.syntax_error: Optional[Tuple[str, int]] = None
+        self.unchanged_template = False
+        self.has_function = False
+        self.empty_functions: List[str] = []
+        self.all_empty = False
+        self.unused_params: List[Tuple[str, List[str]]] = []
+        self.nested_loops: List[Tuple[int, int]] = []
+
+    @property
+    def trivial(self) -> bool:
+        """Nothing worth a model review yet."""
+        return bool(self.syntax_error) or self.unchanged_template or self.all_empty or not self.has_function
+
+    def reply(self) -> Optional[str]:
+        """A templated tutor reply for trivial submissions."""
+        if self.syntax_error:
+            message, line = self.syntax_error
+            return (f"Python can't parse this yet: {message} on line {line}. "
+                    "Take another look at that line - what do you think is off there?")
+        if self.unchanged_template or self.all_empty:
+            return ("It looks like this is still the starting template, so there's nothing to check yet. "
+                    "What's the first step your approach needs? Try writing even a rough version and I'll take a look.")
+        if not self.has_function:
+            return ("I don't see a solution function in this code yet. The problem expects you to fill in the "
+                    "function from the template - how could you move your idea into it?")
+        return None
+
+    def findings(self) -> List[str]:
+        """Notes for the review prompt."""
+        notes = []
+        if self.empty_functions:
+            notes.append(f"Functions with empty bodies: {', '.join(self.empty_functions)}.")
+        for name, params in self.unused_params:
+            notes.append(f"{name}() never uses parameter(s): {', '.join(params)}.")
+        for line, depth in self.nested_loops:
+            notes.append(f"Loops nested {depth} deep starting at line {line} (possible O(n^{depth}) hot spot).")
+        return notes
+
+
+def triage(code: str, template: Optional[str] = None) -> TriageResult:
+    """Statically analyse a Python submission, optionally against its starting template."""
+    result = TriageResult()
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        result.syntax_error = (e.msg, e.lineno or 1)
+        return result
+
+    if template:
+        try:
+            result.unchanged_template = _normalized_dump(ast.parse(template)) == _normalized_dump(ast.parse(code))
+        except SyntaxError:
+            pass
+
+    functions = _functions(tree)
+    result.has_function = bool(functions)
+    result.empty_functions = [func.name for func in functions if _is_empty_body(func.body)]
+    result.all_empty = bool(functions) and len(result.empty_functions) == len(functions)
+
+    for func in functions:
+        if func.name in result.empty_functions:
+            continue
+        unused = _unused_parameters(func)
+        if unused:
+            result.unused_params.append((func.name, unused))
+        result.nested_loops.extend(_nested_loops(func))
+    return result
@@ -5,21 +5,138 @@ Handles persistent storage of conversations, problems, code, and settings.
 
 import sqlite3
 import os
+import zlib
 from typing import List, Dict, Optional, Any
 import json
+from metrics import instrument_methods, DB_QUERY_SECONDS, DB_QUERY_ERRORS
+from tracing import trace_methods
 
+# Tables keyed by user; with DATABASE_SHARDS > 1 they live in the shard files, everything else in the global file
+SHARDED_TABLES = ('problems', 'conversations', 'code_snapshots', 'settings')
 
+
+def _live(table: str, alias: str) -> str:
+    """SQL condition excluding rows of a user-scoped table hidden by a tombstone."""
+    return f"""NOT EXISTS (
+        SELECT 1 FROM tombstones t
+        WHERE t.table_name = '{table}' AND {alias}.id <= t.max_row_id
+          AND (t.user_id IS NULL OR t.user_id = {alias}.user_id)
+          AND (t.problem_id IS NULL OR t.problem_id = {alias}.problem_id)
+    )"""
+
+
+def shard_path(db_path: str, index: int) -> str:
+    """File holding one shard, next to the global database (data/zerotohire.shard0.db, ...)."""
+    root, ext = os.path.splitext(db_path)
+    return f"{root}.shard{index}{ext or '.db'}"
+
+
+def shard_index(user_id: Optional[int], shards: int) -> int:
+    """Shard a user's rows live in. Anonymous rows (no user ID) go to shard 0."""
+    if not user_id or shards <= 1:
+        return 0
+    # crc32 rather than hash(): placement must not change between processes or Python versions
+    return zlib.crc32(str(user_id).encode()) % shards
+
+
+def read_shard_count(db_path: str) -> int:
+    """Shard count a database was created or last rebalanced with (1 for databases from before sharding)."""
+    if not os.path.exists(db_path):
+        return 0
+    conn = sqlite3.connect(db_path)
+    try:
+        row = conn.execute("SELECT value FROM storage_meta WHERE key = 'shards'").fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    finally:
+        conn.close()
+    return int(row[0]) if row else 1
+
+
+@instrument_methods(DB_QUERY_SECONDS, DB_QUERY_ERRORS, exclude=('close',))
+@trace_methods('db', exclude=('close',))
 class Database:
-    def __init__(self, db_path: str = "data/zerotohire.db"):
-        """Initialize database connection and create tables if needed."""
+    def __init__(self, db_path: str = "data/zerotohire.db", shards: Optional[int] = None, check_layout: bool = True):
+        """Initialize database connections and create tables if needed.
+        
+        With shards > 1 (default DATABASE_SHARDS), users and shared data stay in
+        db_path while each user's problems, messages, code and settings go to
+        one of the shard files, so writes for different users don't contend
+        for a single SQLite writer lock. Changing the shard count of an
+        existing database requires `python db_shards.py --shards N` first.
+        """
         self.db_path = db_path
+        self.shard_count = max(1, shards if shards is not None else int(os.getenv('DATABASE_SHARDS', 1)))
         
         # Ensure data directory exists
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
-        self.conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+        stored = read_shard_count(db_path)
+        if check_layout and stored and stored != self.shard_count:
+            raise RuntimeError(
+                f"{db_path} is laid out for {stored} shard(s) but DATABASE_SHARDS is {self.shard_count}; "
+                f"run `python db_shards.py --shards {self.shard_count}` to rebalance it"
+            )
+        
+        self.conn = self._connect(db_path)
+        if self.shard_count == 1:
+            self.shard_paths = [db_path]
+            self.shards = [self.conn]
+        else:
+            self.shard_paths = [shard_path(db_path, i) for i in range(self.shard_count)]
+            self.shards = [self._connect(path) for path in self.shard_paths]
+        # Every open file, global first
+        self.paths = list(dict.fromkeys([db_path] + self.shard_paths))
+        self.connections = list({id(conn): conn for conn in [self.conn] + self.shards}.values())
+        
         self._create_tables()
+        if not stored:
+            self.conn.execute("INSERT OR REPLACE INTO storage_meta (key, value) VALUES ('shards', ?)",
+                              (str(self.shard_count),))
+            self.conn.commit()
+    
+    def open_worker(self) -> 'Database':
+        """Another Database on the same files with connections of its own, for a background thread.
+        
+        A sqlite3 connection holds one transaction at a time, so a thread
+        sharing the request threads' connections could commit or roll back
+        their half-done writes, or hold their transaction open while it works.
+        """
+        return Database(self.db_path, shards=self.shard_count)
+    
+    def _connect(self, path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+        # Off by default in SQLite; the ON DELETE CASCADE clauses below rely on it
+        conn.execute("PRAGMA foreign_keys = ON")
+        # Lets freed pages be returned with incremental_vacuum(); only applies to new database files
+        # (existing ones are converted with `python db_maintenance.py --convert`)
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        # Readers (including backups) don't block writers, and commits don't rewrite the main file
+        if os.getenv('DATABASE_WAL', 'True').lower() == 'true':
+            conn.execute("PRAGMA journal_mode = WAL")
+        return conn
+    
+    # ==================== Shard Routing ====================
+    
+    def _shard(self, user_id: Optional[int]) -> sqlite3.Connection:
+        """Connection holding a user's rows."""
+        return self.shards[shard_index(user_id, self.shard_count)]
+    
+    def _scope(self, user_id: Optional[int]) -> List[sqlite3.Connection]:
+        """Connections a query for user_id must visit: the user's shard, or every shard for all users."""
+        return [self._shard(user_id)] if user_id else self.shards
+    
+    def _fan_out(self, user_id: Optional[int], query: str, params=()) -> List[sqlite3.Row]:
+        """Run a read on every shard in scope and concatenate the rows."""
+        rows = []
+        for conn in self._scope(user_id):
+            rows.extend(conn.execute(query, params).fetchall())
+        return rows
+    
+    def _count(self, user_id: Optional[int], query: str, params=()) -> int:
+        """Sum a `SELECT COUNT(*) as count` query across the shards in scope."""
+        return sum(row['count'] for row in self._fan_out(user_id, query, params))
     
     def _create_tables(self):
         """Create database tables if they don't exist."""
@@ -38,127 +155,165 @@ class Database:
             )
         """)
         
-        # Problems table (track completed problems and attempts)
+        # Hint ladders table (precomputed hints per problem, graded from nudge to code)
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS problems (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
+            CREATE TABLE IF NOT EXISTS hint_ladders (
                 problem_id INTEGER NOT NULL,
-                title TEXT NOT NULL,
-                difficulty TEXT,
-                completed BOOLEAN DEFAULT 0,
-                completed_at TIMESTAMP,
-                attempts_count INTEGER DEFAULT 0,
-                first_attempted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_attempted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
-                UNIQUE(user_id, problem_id)
+                model_version TEXT NOT NULL,
+                level INTEGER NOT NULL,
+                hint TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (problem_id, model_version, level)
             )
         """)
         
-        # Conversations table (chat message history)
+        # Storage metadata (the shard layout the files were written with)
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS conversations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                problem_id INTEGER,
-                role TEXT NOT NULL,
-                content TEXT NOT NULL,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+            CREATE TABLE IF NOT EXISTS storage_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
             )
         """)
         
+        self.conn.commit()
+        
+        for conn in self.shards:
+            self._create_user_tables(conn, foreign_keys=conn is self.conn)
+        if self.conn not in self.shards:
+            # Deleted accounts are tombstoned in the global file
+            self._create_user_tables(self.conn, foreign_keys=True, tables=())
+    
+    def _create_user_tables(self, conn: sqlite3.Connection, foreign_keys: bool, tables=SHARDED_TABLES):
+        """Create the user-scoped tables and the tombstones table in one file.
+        
+        Shard files have no users table, so their rows can't reference it;
+        deleting an account removes them in purge_tombstones() instead of by cascade.
+        """
+        cursor = conn.cursor()
+        user_fk = ",\n                FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE" if foreign_keys else ""
+        
+        # Problems table (track completed problems and attempts)
+        if 'problems' in tables:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS problems (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER,
+                    problem_id INTEGER NOT NULL,
+                    title TEXT NOT NULL,
+                    difficulty TEXT,
+                    completed BOOLEAN DEFAULT 0,
+                    completed_at TIMESTAMP,
+                    attempts_count INTEGER DEFAULT 0,
+                    hints_shown INTEGER DEFAULT 0,
+                    first_attempted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    last_attempted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP{user_fk},
+                    UNIQUE(user_id, problem_id)
+                )
+            """)
+            # Added with hint ladders; older files get the column here
+            columns = [row['name'] for row in cursor.execute("PRAGMA table_info(problems)")]
+            if 'hints_shown' not in columns:
+                cursor.execute("ALTER TABLE problems ADD COLUMN hints_shown INTEGER DEFAULT 0")
+        
+        # Conversations table (chat message history)
+        if 'conversations' in tables:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS conversations (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER,
+                    problem_id INTEGER,
+                    role TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP{user_fk}
+                )
+            """)
+        
         # Code snapshots table (save code for each problem)
+        if 'code_snapshots' in tables:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS code_snapshots (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER,
+                    problem_id INTEGER NOT NULL,
+                    code TEXT NOT NULL,
+                    language TEXT DEFAULT 'python',
+                    saved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP{user_fk}
+                )
+            """)
+        
+        # Tombstones table (deletions not yet purged: rows of table_name with id <= max_row_id in scope are gone)
+        # A NULL user_id or problem_id matches every user or problem; table_name 'users' marks a deleted account
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS code_snapshots (
+            CREATE TABLE IF NOT EXISTS tombstones (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
+                table_name TEXT NOT NULL,
                 user_id INTEGER,
-                problem_id INTEGER NOT NULL,
-                code TEXT NOT NULL,
-                language TEXT DEFAULT 'python',
-                saved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+                problem_id INTEGER,
+                max_row_id INTEGER NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """)
-        
-        # Settings table (user preferences)
+        # Every read of a user-scoped table checks for a matching tombstone (see _live())
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS settings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                setting_key TEXT NOT NULL,
-                setting_value TEXT NOT NULL,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
-                UNIQUE(user_id, setting_key)
-            )
+            CREATE INDEX IF NOT EXISTS idx_tombstones_scope ON tombstones (table_name, user_id, problem_id)
         """)
         
-        self.conn.commit()
+        # Settings table (user preferences)
+        if 'settings' in tables:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS settings (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER,
+                    setting_key TEXT NOT NULL,
+                    setting_value TEXT NOT NULL,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP{user_fk},
+                    UNIQUE(user_id, setting_key)
+                )
+            """)
+        
+        conn.commit()
     
     # ==================== Conversation Management ====================
     
     def save_message(self, role: str, content: str, problem_id: Optional[int] = None, user_id: Optional[int] = None):
         """Save a chat message to the database."""
-        cursor = self.conn.cursor()
+        conn = self._shard(user_id)
+        cursor = conn.cursor()
         cursor.execute("""
             INSERT INTO conversations (user_id, problem_id, role, content)
             VALUES (?, ?, ?, ?)
         """, (user_id, problem_id, role, content))
-        self.conn.commit()
+        conn.commit()
     
     def get_conversation_history(self, problem_id: Optional[int] = None, limit: Optional[int] = None, user_id: Optional[int] = None) -> List[Dict]:
         """Get conversation history. If problem_id provided, only for that problem.
         If limit provided, returns the MOST RECENT messages."""
-        cursor = self.conn.cursor()
-        
+        conditions = []
+        params = []
         if problem_id is not None:
+            conditions.append("problem_id = ?")
+            params.append(problem_id)
+        if user_id:
+            conditions.append("user_id = ?")
+            params.append(user_id)
+        conditions.append(_live('conversations', 'c'))
+        
+        query = """
+            SELECT role, content, timestamp, problem_id
+            FROM conversations c
+            WHERE """ + " AND ".join(conditions) + """
+            ORDER BY timestamp """ + ("DESC" if limit else "ASC")
+        if limit:
+            # Get most recent messages in reverse, then we'll flip them
+            query += " LIMIT ?"
+            params.append(limit)
+        
+        rows = self._fan_out(user_id, query, params)
+        if len(self._scope(user_id)) > 1:
+            # Merge the shards' results back into one ordering
+            rows.sort(key=lambda row: row['timestamp'] or '', reverse=bool(limit))
             if limit:
-                # Get most recent messages in reverse, then we'll flip them
-                query = """
-                    SELECT role, content, timestamp, problem_id
-                    FROM conversations
-                    WHERE problem_id = ?""" + (" AND user_id = ?" if user_id else "") + """
-                    ORDER BY timestamp DESC
-                    LIMIT ?
-                """
-                params = (problem_id, user_id, limit) if user_id else (problem_id, limit)
-                cursor.execute(query, params)
-            else:
-                query = """
-                    SELECT role, content, timestamp, problem_id
-                    FROM conversations
-                    WHERE problem_id = ?""" + (" AND user_id = ?" if user_id else "") + """
-                    ORDER BY timestamp ASC
-                """
-                params = (problem_id, user_id) if user_id else (problem_id,)
-                cursor.execute(query, params)
-        else:
-            if limit:
-                # Get most recent messages in reverse, then we'll flip them
-                query = """
-                    SELECT role, content, timestamp, problem_id
-                    FROM conversations
-                    """ + ("WHERE user_id = ?" if user_id else "") + """
-                    ORDER BY timestamp DESC
-                    LIMIT ?
-                """
-                params = (user_id, limit) if user_id else (limit,)
-                cursor.execute(query, params)
-            else:
-                query = """
-                    SELECT role, content, timestamp, problem_id
-                    FROM conversations
-                    """ + ("WHERE user_id = ?" if user_id else "") + """
-                    ORDER BY timestamp ASC
-                """
-                if user_id:
-                    cursor.execute(query, (user_id,))
-                else:
-                    cursor.execute(query)
-        
-        rows = cursor.fetchall()
+                rows = rows[:limit]
         
         # If we used limit, rows are in DESC order, so reverse them to get chronological
         if limit:
@@ -175,54 +330,118 @@ class Database:
         ]
     
     def clear_conversation_history(self, problem_id: Optional[int] = None, user_id: Optional[int] = None):
-        """Clear conversation history. If problem_id provided, clear only for that problem."""
-        cursor = self.conn.cursor()
-        if problem_id is not None:
-            if user_id:
-                cursor.execute("DELETE FROM conversations WHERE problem_id = ? AND user_id = ?", (problem_id, user_id))
-            else:
-                cursor.execute("DELETE FROM conversations WHERE problem_id = ?", (problem_id,))
-        else:
-            if user_id:
-                cursor.execute("DELETE FROM conversations WHERE user_id = ?", (user_id,))
-            else:
-                cursor.execute("DELETE FROM conversations")
-        self.conn.commit()
+        """Clear conversation history. If problem_id provided, clear only for that problem.
+        
+        The messages are tombstoned and disappear from reads immediately; the
+        rows are deleted later in small batches by purge_tombstones().
+        """
+        for conn in self._scope(user_id):
+            self._tombstone(conn.cursor(), 'conversations', user_id or None, problem_id)
+            conn.commit()
     
     def reset_problem(self, problem_id: int, user_id: Optional[int] = None):
         """Completely reset a problem: clear messages, delete code, mark as incomplete."""
-        cursor = self.conn.cursor()
+        for conn in self._scope(user_id):
+            cursor = conn.cursor()
+            
+            # Messages and code snapshots can be large, so they are tombstoned for the purger
+            self._tombstone(cursor, 'conversations', user_id or None, problem_id)
+            self._tombstone(cursor, 'code_snapshots', user_id or None, problem_id)
+            
+            # The progress row is unique per user and problem; delete it now so it can be recreated
+            if user_id:
+                cursor.execute("DELETE FROM problems WHERE problem_id = ? AND user_id = ?", (problem_id, user_id))
+            else:
+                cursor.execute("DELETE FROM problems WHERE problem_id = ?", (problem_id,))
+            
+            conn.commit()
+    
+    # ==================== Tombstones ====================
+    
+    def _tombstone(self, cursor, table: str, user_id: Optional[int], problem_id: Optional[int] = None):
+        """Hide every current row of a table in scope. Rows written afterwards get higher IDs and stay visible."""
+        cursor.execute(f"""
+            INSERT INTO tombstones (table_name, user_id, problem_id, max_row_id)
+            SELECT ?, ?, ?, COALESCE(MAX(id), 0) FROM {table}
+        """, (table, user_id, problem_id))
+    
+    def purge_tombstones(self, batch_size: int = 500) -> int:
+        """Delete up to batch_size tombstoned rows in one short transaction. Returns the rows deleted.
         
-        # Delete conversation history for this problem
-        if user_id:
-            cursor.execute("DELETE FROM conversations WHERE problem_id = ? AND user_id = ?", (problem_id, user_id))
-            cursor.execute("DELETE FROM code_snapshots WHERE problem_id = ? AND user_id = ?", (problem_id, user_id))
-            cursor.execute("DELETE FROM problems WHERE problem_id = ? AND user_id = ?", (problem_id, user_id))
-        else:
-            cursor.execute("DELETE FROM conversations WHERE problem_id = ?", (problem_id,))
-            cursor.execute("DELETE FROM code_snapshots WHERE problem_id = ?", (problem_id,))
-            cursor.execute("DELETE FROM problems WHERE problem_id = ?", (problem_id,))
+        Tombstones are processed oldest first and removed once nothing in their
+        scope is left. A deleted account's user row goes last, after the
+        tombstones for its data; shards are drained before the global file for
+        the same reason.
+        """
+        for conn in self.shards + [self.conn]:
+            tombstone = conn.execute("""
+                SELECT id, table_name, user_id, problem_id, max_row_id
+                FROM tombstones
+                ORDER BY id
+                LIMIT 1
+            """).fetchone()
+            if tombstone is not None:
+                return self._purge_tombstone(conn, tombstone, batch_size)
+        return 0
+    
+    def _purge_tombstone(self, conn: sqlite3.Connection, tombstone: sqlite3.Row, batch_size: int) -> int:
+        cursor = conn.cursor()
+        if tombstone['table_name'] == 'users':
+            deleted = 0
+            shard = self._shard(tombstone['user_id'])
+            if shard is not conn:
+                # No cascade across files: remove what the user wrote after the deletion by hand
+                for table in SHARDED_TABLES:
+                    deleted += shard.execute(f"DELETE FROM {table} WHERE user_id = ?", (tombstone['user_id'],)).rowcount
+                shard.commit()
+            # Whatever the user wrote after the deletion is removed by the cascade
+            cursor.execute("DELETE FROM users WHERE id = ?", (tombstone['user_id'],))
+            deleted += cursor.rowcount
+            cursor.execute("DELETE FROM tombstones WHERE id = ?", (tombstone['id'],))
+            conn.commit()
+            return deleted
         
-        self.conn.commit()
+        table = tombstone['table_name']
+        scope = "id <= ?"
+        params = [tombstone['max_row_id']]
+        if tombstone['user_id'] is not None:
+            scope += " AND user_id = ?"
+            params.append(tombstone['user_id'])
+        if tombstone['problem_id'] is not None:
+            scope += " AND problem_id = ?"
+            params.append(tombstone['problem_id'])
+        cursor.execute(f"""
+            DELETE FROM {table} WHERE id IN (
+                SELECT id FROM {table} WHERE {scope} LIMIT ?
+            )
+        """, params + [batch_size])
+        deleted = cursor.rowcount
+        if deleted < batch_size:
+            cursor.execute("DELETE FROM tombstones WHERE id = ?", (tombstone['id'],))
+        conn.commit()
+        return deleted
+    
+    def pending_tombstones(self) -> int:
+        """Number of deletions still waiting for the purger."""
+        return sum(
+            conn.execute("SELECT COUNT(*) as count FROM tombstones").fetchone()['count']
+            for conn in self.connections
+        )
     
     # ==================== Problem Management ====================
     
     def get_current_problem(self, user_id: Optional[int] = None) -> Optional[Dict]:
         """Get the last problem worked on."""
-        cursor = self.conn.cursor()
         query = """
-            SELECT problem_id, title, difficulty, completed
+            SELECT problem_id, title, difficulty, completed, last_attempted_at
             FROM problems
             """ + ("WHERE user_id = ?" if user_id else "") + """
             ORDER BY last_attempted_at DESC
             LIMIT 1
         """
-        if user_id:
-            cursor.execute(query, (user_id,))
-        else:
-            cursor.execute(query)
+        rows = self._fan_out(user_id, query, (user_id,) if user_id else ())
         
-        row = cursor.fetchone()
+        row = max(rows, key=lambda row: row['last_attempted_at'] or '', default=None)
         if row:
             return {
                 'id': row['problem_id'],
@@ -234,7 +453,8 @@ class Database:
     
     def set_problem(self, problem_id: int, title: str, difficulty: str, user_id: Optional[int] = None):
         """Set or update the current problem."""
-        cursor = self.conn.cursor()
+        conn = self._shard(user_id)
+        cursor = conn.cursor()
         cursor.execute("""
             INSERT INTO problems (user_id, problem_id, title, difficulty, last_attempted_at, attempts_count)
             VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP, 1)
@@ -242,126 +462,128 @@ class Database:
                 last_attempted_at = CURRENT_TIMESTAMP,
                 attempts_count = attempts_count + 1
         """, (user_id, problem_id, title, difficulty))
-        self.conn.commit()
+        conn.commit()
     
     def mark_problem_complete(self, problem_id: int, user_id: Optional[int] = None):
         """Mark a problem as completed."""
-        cursor = self.conn.cursor()
-        if user_id:
-            cursor.execute("""
-                UPDATE problems
-                SET completed = 1, completed_at = CURRENT_TIMESTAMP
-                WHERE problem_id = ? AND user_id = ?
-            """, (problem_id, user_id))
-        else:
-            cursor.execute("""
-                UPDATE problems
-                SET completed = 1, completed_at = CURRENT_TIMESTAMP
-                WHERE problem_id = ?
-            """, (problem_id,))
-        self.conn.commit()
+        for conn in self._scope(user_id):
+            cursor = conn.cursor()
+            if user_id:
+                cursor.execute("""
+                    UPDATE problems
+                    SET completed = 1, completed_at = CURRENT_TIMESTAMP
+                    WHERE problem_id = ? AND user_id = ?
+                """, (problem_id, user_id))
+            else:
+                cursor.execute("""
+                    UPDATE problems
+                    SET completed = 1, completed_at = CURRENT_TIMESTAMP
+                    WHERE problem_id = ?
+                """, (problem_id,))
+            conn.commit()
     
     def mark_problem_incomplete(self, problem_id: int, user_id: Optional[int] = None):
         """Mark a problem as incomplete."""
-        cursor = self.conn.cursor()
-        if user_id:
-            cursor.execute("""
-                UPDATE problems
-                SET completed = 0, completed_at = NULL
-                WHERE problem_id = ? AND user_id = ?
-            """, (problem_id, user_id))
-        else:
-            cursor.execute("""
-                UPDATE problems
-                SET completed = 0, completed_at = NULL
-                WHERE problem_id = ?
-            """, (problem_id,))
-        self.conn.commit()
+        for conn in self._scope(user_id):
+            cursor = conn.cursor()
+            if user_id:
+                cursor.execute("""
+                    UPDATE problems
+                    SET completed = 0, completed_at = NULL
+                    WHERE problem_id = ? AND user_id = ?
+                """, (problem_id, user_id))
+            else:
+                cursor.execute("""
+                    UPDATE problems
+                    SET completed = 0, completed_at = NULL
+                    WHERE problem_id = ?
+                """, (problem_id,))
+            conn.commit()
     
     def is_problem_completed(self, problem_id: int, user_id: Optional[int] = None) -> bool:
         """Check if a problem is marked as completed."""
-        cursor = self.conn.cursor()
         if user_id:
-            cursor.execute("""
+            rows = self._fan_out(user_id, """
                 SELECT completed FROM problems
                 WHERE problem_id = ? AND user_id = ?
             """, (problem_id, user_id))
         else:
-            cursor.execute("""
+            rows = self._fan_out(user_id, """
                 SELECT completed FROM problems
                 WHERE problem_id = ?
             """, (problem_id,))
         
-        row = cursor.fetchone()
-        return bool(row['completed']) if row else False
+        return bool(rows[0]['completed']) if rows else False
     
     def get_completed_problems(self, user_id: Optional[int] = None) -> List[int]:
         """Get list of completed problem IDs."""
-        cursor = self.conn.cursor()
         if user_id:
-            cursor.execute("""
+            rows = self._fan_out(user_id, """
                 SELECT problem_id FROM problems
                 WHERE completed = 1 AND user_id = ?
             """, (user_id,))
         else:
-            cursor.execute("""
+            rows = self._fan_out(user_id, """
                 SELECT problem_id FROM problems
                 WHERE completed = 1
             """)
         
-        return [row['problem_id'] for row in cursor.fetchall()]
+        return [row['problem_id'] for row in rows]
+    
+    def get_hints_shown(self, problem_id: int, user_id: Optional[int] = None) -> int:
+        """How many rungs of a problem's hint ladder the user has been shown."""
+        row = self._shard(user_id).execute("""
+            SELECT hints_shown FROM problems
+            WHERE problem_id = ? AND user_id IS ?
+        """, (problem_id, user_id or None)).fetchone()
+        return (row['hints_shown'] or 0) if row else 0
+    
+    def set_hints_shown(self, problem_id: int, count: int, user_id: Optional[int] = None):
+        """Record how many hints the user has been shown for a problem (0 starts the ladder over)."""
+        conn = self._shard(user_id)
+        conn.execute("""
+            UPDATE problems SET hints_shown = ?
+            WHERE problem_id = ? AND user_id IS ?
+        """, (count, problem_id, user_id or None))
+        conn.commit()
     
     # ==================== Code Management ====================
     
     def save_code(self, problem_id: int, code: str, language: str = 'python', user_id: Optional[int] = None):
         """Save code snapshot for a problem."""
-        cursor = self.conn.cursor()
+        conn = self._shard(user_id)
+        cursor = conn.cursor()
         cursor.execute("""
             INSERT INTO code_snapshots (user_id, problem_id, code, language)
             VALUES (?, ?, ?, ?)
         """, (user_id, problem_id, code, language))
-        self.conn.commit()
+        conn.commit()
     
     def get_latest_code(self, problem_id: int, user_id: Optional[int] = None) -> Optional[str]:
         """Get the latest saved code for a problem."""
-        cursor = self.conn.cursor()
-        if user_id:
-            cursor.execute("""
-                SELECT code FROM code_snapshots
-                WHERE problem_id = ? AND user_id = ?
-                ORDER BY saved_at DESC
-                LIMIT 1
-            """, (problem_id, user_id))
-        else:
-            cursor.execute("""
-                SELECT code FROM code_snapshots
-                WHERE problem_id = ?
-                ORDER BY saved_at DESC
-                LIMIT 1
-            """, (problem_id,))
-        
-        row = cursor.fetchone()
-        return row['code'] if row else None
+        history = self.get_code_history(problem_id, limit=1, user_id=user_id)
+        return history[0]['code'] if history else None
     
     def get_code_history(self, problem_id: int, limit: int = 10, user_id: Optional[int] = None) -> List[Dict]:
         """Get code history for a problem."""
-        cursor = self.conn.cursor()
         if user_id:
-            cursor.execute("""
+            rows = self._fan_out(user_id, """
                 SELECT code, language, saved_at
-                FROM code_snapshots
-                WHERE problem_id = ? AND user_id = ?
+                FROM code_snapshots s
+                WHERE problem_id = ? AND user_id = ? AND """ + _live('code_snapshots', 's') + """
                 ORDER BY saved_at DESC
                 LIMIT ?
             """, (problem_id, user_id, limit))
         else:
-            cursor.execute("""
+            rows = self._fan_out(user_id, """
                 SELECT code, language, saved_at
-                FROM code_snapshots
-                WHERE problem_id = ?
+                FROM code_snapshots s
+                WHERE problem_id = ? AND """ + _live('code_snapshots', 's') + """
                 ORDER BY saved_at DESC
                 LIMIT ?
             """, (problem_id, limit))
+            # Merge the shards' results back into one ordering
+            rows = sorted(rows, key=lambda row: row['saved_at'] or '', reverse=True)[:limit]
         
         return [
             {
@@ -369,14 +591,16 @@ class Database:
                 'language': row['language'],
                 'saved_at': row['saved_at']
             }
-            for row in cursor.fetchall()
+            for row in rows
         ]
     
     # ==================== Settings Management ====================
+    # Settings without a user (user_id IS NULL) are anonymous ones, kept on shard 0
     
     def save_setting(self, key: str, value: Any, user_id: Optional[int] = None):
         """Save a setting."""
-        cursor = self.conn.cursor()
+        conn = self._shard(user_id)
+        cursor = conn.cursor()
         value_str = json.dumps(value) if not isinstance(value, str) else value
         
         cursor.execute("""
@@ -386,11 +610,11 @@ class Database:
                 setting_value = ?,
                 updated_at = CURRENT_TIMESTAMP
         """, (user_id, key, value_str, value_str))
-        self.conn.commit()
+        conn.commit()
     
     def get_setting(self, key: str, default: Any = None, user_id: Optional[int] = None) -> Any:
         """Get a setting."""
-        cursor = self.conn.cursor()
+        cursor = self._shard(user_id).cursor()
         if user_id:
             cursor.execute("""
                 SELECT setting_value FROM settings
@@ -412,7 +636,7 @@ class Database:
     
     def get_all_settings(self, user_id: Optional[int] = None) -> Dict[str, Any]:
         """Get all settings."""
-        cursor = self.conn.cursor()
+        cursor = self._shard(user_id).cursor()
         if user_id:
             cursor.execute("""
                 SELECT setting_key, setting_value FROM settings
@@ -434,63 +658,35 @@ class Database:
         return settings
     
     # ==================== Statistics ====================
+    # Without a user these aggregate across every shard
     
     def get_user_stats(self, user_id: Optional[int] = None) -> Dict:
         """Get statistics."""
-        cursor = self.conn.cursor()
+        user_filter = " AND user_id = ?" if user_id else ""
+        params = (user_id,) if user_id else ()
         
         # Total problems attempted
-        if user_id:
-            cursor.execute("""
-                SELECT COUNT(*) as count FROM problems
-                WHERE user_id = ?
-            """, (user_id,))
-        else:
-            cursor.execute("""
-                SELECT COUNT(*) as count FROM problems
-            """)
-        total_attempted = cursor.fetchone()['count']
+        total_attempted = self._count(user_id, """
+            SELECT COUNT(*) as count FROM problems""" + (" WHERE user_id = ?" if user_id else ""), params)
         
         # Total problems completed
-        if user_id:
-            cursor.execute("""
-                SELECT COUNT(*) as count FROM problems WHERE completed = 1 AND user_id = ?
-            """, (user_id,))
-        else:
-            cursor.execute("""
-                SELECT COUNT(*) as count FROM problems WHERE completed = 1
-            """)
-        total_completed = cursor.fetchone()['count']
+        total_completed = self._count(user_id, """
+            SELECT COUNT(*) as count FROM problems WHERE completed = 1""" + user_filter, params)
         
         # Total user
-        if user_id:
-            cursor.execute("""
-                SELECT COUNT(*) as count FROM conversations
-                WHERE user_id = ? AND role = 'user'
-            """, (user_id,))
-        else:
-            cursor.execute("""
-                SELECT COUNT(*) as count FROM conversations
-                WHERE role = 'user'
-            """)
-        total_messages = cursor.fetchone()['count']
+        total_messages = self._count(user_id, """
+            SELECT COUNT(*) as count FROM conversations c
+            WHERE role = 'user' AND """ + _live('conversations', 'c') + user_filter, params)
         
         # Completion by difficulty
-        if user_id:
-            cursor.execute("""
-                SELECT difficulty, COUNT(*) as count
-                FROM problems
-                WHERE completed = 1 AND user_id = ?
-                GROUP BY difficulty
-            """, (user_id,))
-        else:
-            cursor.execute("""
-                SELECT difficulty, COUNT(*) as count
-                FROM problems
-                WHERE completed = 1
-                GROUP BY difficulty
-            """)
-        by_difficulty = {row['difficulty']: row['count'] for row in cursor.fetchall()}
+        by_difficulty = {}
+        for row in self._fan_out(user_id, """
+            SELECT difficulty, COUNT(*) as count
+            FROM problems
+            WHERE completed = 1""" + user_filter + """
+            GROUP BY difficulty
+        """, params):
+            by_difficulty[row['difficulty']] = by_difficulty.get(row['difficulty'], 0) + row['count']
         
         return {
             'total_attempted': total_attempted,
@@ -500,6 +696,50 @@ class Database:
             'completion_rate': (total_completed / total_attempted * 100) if total_attempted > 0 else 0
         }
     
+    # ==================== Hint Ladders ====================
+    
+    def save_hint_ladder(self, problem_id: int, model_version: str, hints: List[str]):
+        """Store a problem's hint ladder for a model version, replacing any previous one."""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            DELETE FROM hint_ladders WHERE problem_id = ? AND model_version = ?
+        """, (problem_id, model_version))
+        cursor.executemany("""
+            INSERT INTO hint_ladders (problem_id, model_version, level, hint)
+            VALUES (?, ?, ?, ?)
+        """, [(problem_id, model_version, level, hint) for level, hint in enumerate(hints)])
+        self.conn.commit()
+    
+    def get_hint_ladder(self, problem_id: int, model_version: str) -> List[str]:
+        """Get a problem's hints in order, or an empty list if none were generated."""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT hint FROM hint_ladders
+            WHERE problem_id = ? AND model_version = ?
+            ORDER BY level
+        """, (problem_id, model_version))
+        return [row['hint'] for row in cursor.fetchall()]
+    
+    def get_hinted_problems(self, model_version: str) -> List[int]:
+        """Problem IDs that already have a hint ladder for a model version."""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT DISTINCT problem_id FROM hint_ladders WHERE model_version = ?
+        """, (model_version,))
+        return [row['problem_id'] for row in cursor.fetchall()]
+    
+    def get_popular_problems(self, limit: int = 100) -> List[int]:
+        """Problem IDs ordered by how often they were selected, across all users."""
+        # Every shard's full tally is needed: a problem outside one shard's top `limit` can still rank overall
+        selections = {}
+        for row in self._fan_out(None, """
+            SELECT problem_id, SUM(attempts_count) AS selections
+            FROM problems
+            GROUP BY problem_id
+        """):
+            selections[row['problem_id']] = selections.get(row['problem_id'], 0) + row['selections']
+        return sorted(selections, key=lambda problem_id: (-selections[problem_id], problem_id))[:limit]
+    
     # ==================== User Management ====================
     
     def create_user(self, username: str, email: str, password_hash: str) -> Optional[int]:
@@ -565,7 +805,9 @@ class Database:
         cursor.execute("""
             SELECT id, username, email, created_at, last_login, is_active
             FROM users
-            WHERE id = ?
+            WHERE id = ? AND NOT EXISTS (
+                SELECT 1 FROM tombstones WHERE table_name = 'users' AND user_id = users.id
+            )
         """, (user_id,))
         
         row = cursor.fetchone()
@@ -628,16 +870,110 @@ class Database:
         self.conn.commit()
     
     def delete_user(self, user_id: int):
-        """Delete a user and all associated data (cascades)."""
+        """Delete a user and all associated data.
+        
+        The account is deactivated and its username and email freed at once;
+        its data and finally the user row are removed by purge_tombstones().
+        """
+        # Data first: the purger only removes the user row once the shard's tombstones are drained
+        shard = self._shard(user_id)
+        for table in ('conversations', 'code_snapshots', 'problems', 'settings'):
+            self._tombstone(shard.cursor(), table, user_id)
+        shard.commit()
+        
         cursor = self.conn.cursor()
-        cursor.execute("DELETE FROM users WHERE id = ?", (user_id,))
+        cursor.execute("""
+            UPDATE users
+            SET is_active = 0, username = '#deleted:' || id, email = '#deleted:' || id
+            WHERE id = ?
+        """, (user_id,))
+        cursor.execute("""
+            INSERT INTO tombstones (table_name, user_id, max_row_id)
+            VALUES ('users', ?, ?)
+        """, (user_id, user_id))
         self.conn.commit()
     
+    # ==================== Maintenance ====================
+    # Each task covers the global file and every shard
+    
+    def optimize(self):
+        """Let SQLite refresh planner statistics where it thinks they are stale (cheap)."""
+        for conn in self.connections:
+            conn.execute("PRAGMA analysis_limit = 1000")
+            conn.execute("PRAGMA optimize")
+            conn.commit()
+    
+    def analyze(self):
+        """Recompute planner statistics for every table and index."""
+        for conn in self.connections:
+            conn.execute("ANALYZE")
+            conn.commit()
+    
+    def _page_stats(self, conn: sqlite3.Connection) -> Dict[str, int]:
+        return {
+            'page_size': conn.execute("PRAGMA page_size").fetchone()[0],
+            'page_count': conn.execute("PRAGMA page_count").fetchone()[0],
+            'freelist_count': conn.execute("PRAGMA freelist_count").fetchone()[0],
+            'auto_vacuum': conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        }
+    
+    def page_stats(self) -> List[Dict[str, int]]:
+        """Page size, page count, free pages and the auto_vacuum mode (0 none, 1 full, 2 incremental) per file."""
+        return [dict(self._page_stats(conn), path=path) for path, conn in zip(self.paths, self.connections)]
+    
+    def incremental_vacuum(self, max_pages: int = 0) -> int:
+        """Return up to max_pages free pages (all if 0) per file to the filesystem. Returns the bytes reclaimed."""
+        reclaimed = 0
+        for conn in self.connections:
+            before = self._page_stats(conn)
+            if before['auto_vacuum'] != 2 or not before['freelist_count']:
+                continue
+            # Frees one page per step; executescript steps it to completion, execute() would stop after one
+            conn.executescript(f"PRAGMA incremental_vacuum({int(max_pages)});")
+            reclaimed += (before['freelist_count'] - self._page_stats(conn)['freelist_count']) * before['page_size']
+        return reclaimed
+    
+    def checkpoint(self, mode: str = 'PASSIVE') -> Dict[str, int]:
+        """Copy WAL frames into the database files. TRUNCATE also resets a WAL file once no reader needs it."""
+        if mode not in ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'):
+            raise ValueError(f"Unknown checkpoint mode {mode}")
+        totals = {'busy': 0, 'log_frames': 0, 'checkpointed_frames': 0}
+        for conn in self.connections:
+            busy, log_frames, checkpointed = conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+            totals['busy'] += busy
+            totals['log_frames'] += log_frames
+            totals['checkpointed_frames'] += checkpointed
+        return totals
+    
+    def backup_paths(self, target_path: str) -> List[str]:
+        """Files a backup to target_path consists of, in the same order as self.paths."""
+        if self.shard_count == 1:
+            return [target_path]
+        return [target_path] + [shard_path(target_path, i) for i in range(self.shard_count)]
+    
+    def backup(self, target_path: str):
+        """Write a consistent copy of the database to target_path using the online backup API.
+        
+        Each file is read through its own connection in a single step, i.e. one
+        read transaction: with WAL, writers carry on meanwhile, and the backup
+        doesn't restart when they commit. Shards are copied next to target_path
+        (see backup_paths()); each is consistent on its own, taken moments apart.
+        """
+        for path, target_file in zip(self.paths, self.backup_paths(target_path)):
+            source = sqlite3.connect(path)
+            target = sqlite3.connect(target_file)
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+                source.close()
+    
     # ==================== Cleanup ====================
     
     def close(self):
-        """Close database connection."""
-        self.conn.close()
+        """Close database connections."""
+        for conn in self.connections:
+            conn.close()
     
     def __enter__(self):
         """Context manager entry."""
@@ -0,0 +1,105 @@
+"""
+Local dataset snapshot for ZeroToHire.
+Exports the LeetCode dataset once to an Arrow IPC file and opens it memory-mapped, with no network access.
+
+Usage:
+    python dataset_snapshot.py                       # writes LEETCODE_SNAPSHOT (data/leetcode.arrow)
+    python dataset_snapshot.py --dataset viccon23/leetcode --output /srv/leetcode.arrow
+
+The file is written uncompressed so opening it is zero-copy: columns point
+straight into the mapped pages, which every backend process shares through
+the OS page cache.
+"""
+
+import argparse
+import os
+from typing import Dict, Iterator, List
+
+import pyarrow as pa
+
+
+DEFAULT_SNAPSHOT_PATH = 'data/leetcode.arrow'
+
+
+class SnapshotSplit:
+    """Read-only, list-like view of a memory-mapped split, returning rows as dicts.
+
+    Supports the same access the app makes on a `datasets` split: len(),
+    split[i] and iteration.
+    """
+
+    def __init__(self, table: pa.Table):
+        self.table = table
+        self.column_names = table.column_names
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    def __getitem__(self, index: int) -> Dict:
+        if index < 0:
+            index += self.table.num_rows
+        if not 0 <= index < self.table.num_rows:
+            raise IndexError(f"Row {index} out of range")
+        return self.table.slice(index, 1).to_pylist()[0]
+
+    def __iter__(self) -> Iterator[Dict]:
+        for batch in self.table.to_batches():
+            yield from batch.to_pylist()
+
+    def column(self, name: str) -> List:
+        """All values of one column, without materializing the other columns."""
+        return self.table.column(name).to_pylist()
+
+
+def export_snapshot(dataset_name: str, output_path: str) -> int:
+    """Download the dataset's train split and write it as an uncompressed Arrow file. Returns the row count."""
+    from datasets import load_dataset
+
+    table = load_dataset(dataset_name)['train'].with_format('arrow')[:]
+
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    # Write to a temp file and rename so running processes never map a half-written file
+    tmp_path = output_path + '.tmp'
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, output_path)
+    return table.num_rows
+
+
+def open_snapshot(path: str) -> Dict[str, SnapshotSplit]:
+    """Open a snapshot memory-mapped. Returns {'train': split} like load_dataset()."""
+    source = pa.memory_map(path, 'r')
+    table = pa.ipc.open_file(source).read_all()
+    return {'train': SnapshotSplit(table)}
+
+
+def load_problems(dataset_name: str, snapshot_path: str):
+    """Open the local snapshot if there is one, otherwise fall back to the Hugging Face Hub."""
+    if os.path.exists(snapshot_path):
+        print(f"Loading LeetCode dataset from snapshot {snapshot_path}...")
+        return open_snapshot(snapshot_path)
+
+    from datasets import load_dataset
+
+    print("Loading LeetCode dataset from Hugging Face...")
+    print(f"(Run 'python dataset_snapshot.py' to create {snapshot_path} for faster, offline startup)")
+    return load_dataset(dataset_name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the LeetCode dataset to a local memory-mapped snapshot")
+    parser.add_argument('--dataset', default=os.getenv('LEETCODE_DATASET', 'viccon23/leetcode'))
+    parser.add_argument('--output', default=os.getenv('LEETCODE_SNAPSHOT', DEFAULT_SNAPSHOT_PATH))
+    args = parser.parse_args()
+
+    rows = export_snapshot(args.dataset, args.output)
+    size_mb = os.path.getsize(args.output) / (1024 * 1024)
+    print(f"Wrote {rows} problems to {args.output} ({size_mb:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,241 @@
+"""
+Database maintenance for ZeroToHire.
+Refreshes planner statistics, reclaims free pages, checkpoints the WAL and takes online backups while traffic is low.
+
+Usage:
+    python db_maintenance.py                      # run every task once against DATABASE_PATH
+    python db_maintenance.py --task backup        # run a single task
+    python db_maintenance.py --convert            # switch an existing database to incremental auto-vacuum
+"""
+
+import argparse
+import glob
+import os
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+
+from metrics import DB_MAINTENANCE_SECONDS, DB_MAINTENANCE_RECLAIMED_BYTES, DB_FILE_BYTES
+
+# Configuration
+MAINTENANCE_ENABLED = os.getenv('MAINTENANCE_ENABLED', 'True').lower() == 'true'
+IDLE_SECONDS = float(os.getenv('MAINTENANCE_IDLE_S', 120))
+POLL_SECONDS = float(os.getenv('MAINTENANCE_POLL_S', 30))
+# Relative to the database file's directory, so backups land next to the data whatever the working directory
+BACKUP_DIR = os.getenv('MAINTENANCE_BACKUP_DIR', 'backups')
+BACKUP_KEEP = int(os.getenv('MAINTENANCE_BACKUP_KEEP', 7))
+# Pages freed per incremental_vacuum call, so one pass never holds the write lock for long
+VACUUM_PAGES = int(os.getenv('MAINTENANCE_VACUUM_PAGES', 2000))
+
+# Seconds between runs of each task, cheapest and most frequent first
+INTERVALS = {
+    'optimize': float(os.getenv('MAINTENANCE_OPTIMIZE_INTERVAL_S', 3600)),
+    'checkpoint': float(os.getenv('MAINTENANCE_CHECKPOINT_INTERVAL_S', 600)),
+    'vacuum': float(os.getenv('MAINTENANCE_VACUUM_INTERVAL_S', 3600)),
+    'analyze': float(os.getenv('MAINTENANCE_ANALYZE_INTERVAL_S', 86400)),
+    'backup': float(os.getenv('MAINTENANCE_BACKUP_INTERVAL_S', 86400)),
+}
+
+# A task this many intervals overdue runs even if the server never goes idle
+OVERDUE_FACTOR = 2
+
+
+def _file_size(path: str) -> int:
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def _total_size(paths, suffix: str = '') -> int:
+    return sum(_file_size(path + suffix) for path in paths)
+
+
+def backup_dir(db_path: str) -> str:
+    """Directory backups of db_path go to (MAINTENANCE_BACKUP_DIR, resolved against the database's directory)."""
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), BACKUP_DIR)
+
+
+def new_backup_path(db, label: str = '') -> str:
+    """A path for a new backup of db that no existing file (or shard file) uses.
+
+    Names start with the database name and a timestamp, so they sort by age;
+    the process ID and a random suffix keep two backups in the same second apart.
+    """
+    directory = backup_dir(db.db_path)
+    os.makedirs(directory, exist_ok=True)
+    name = os.path.splitext(os.path.basename(db.db_path))[0]
+    target = os.path.join(
+        directory, f"{name}-{label}{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{uuid.uuid4().hex[:8]}.db"
+    )
+    existing = [path for path in db.backup_paths(target) if os.path.exists(path)]
+    if existing:
+        raise FileExistsError(f"Refusing to overwrite {', '.join(existing)}")
+    return target
+
+
+class MaintenanceScheduler:
+    """Daemon thread running each maintenance task on its interval, preferably while the model is idle.
+
+    is_idle() returns whether traffic is low right now (the backend passes the
+    router's idle time). Each run's duration and bytes reclaimed are logged,
+    exported as metrics and kept in last_results.
+    """
+
+    def __init__(self, db, is_idle: Optional[Callable[[], bool]] = None):
+        self.db = db
+        self.is_idle = is_idle or (lambda: True)
+        self.tasks: Dict[str, Callable[[], int]] = {
+            'optimize': self.optimize,
+            'checkpoint': self.checkpoint,
+            'vacuum': self.vacuum,
+            'analyze': self.analyze,
+            'backup': self.backup,
+        }
+        # Start the clocks at boot so a restart doesn't trigger every task at once
+        now = time.monotonic()
+        self._last_run: Dict[str, float] = {task: now for task in self.tasks}
+        self.last_results: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    # ==================== Tasks ====================
+    # Each returns the bytes it reclaimed
+
+    def optimize(self) -> int:
+        self.db.optimize()
+        return 0
+
+    def analyze(self) -> int:
+        self.db.analyze()
+        return 0
+
+    def vacuum(self) -> int:
+        reclaimed = 0
+        while True:
+            freed = self.db.incremental_vacuum(VACUUM_PAGES)
+            reclaimed += freed
+            if not freed or not self.is_idle():
+                return reclaimed
+            time.sleep(0.05)
+
+    def checkpoint(self) -> int:
+        before = _total_size(self.db.paths, '-wal')
+        # TRUNCATE also empties the log file; if a reader still needs it, the frames copied so far are kept
+        self.db.checkpoint('TRUNCATE')
+        return max(0, before - _total_size(self.db.paths, '-wal'))
+
+    def backup(self) -> int:
+        target = new_backup_path(self.db)
+        # Write under temporary names so a half-written file is never mistaken for a backup
+        files = self.db.backup_paths(target)
+        self.db.backup(target + '.tmp')
+        for tmp_file, final_file in zip(self.db.backup_paths(target + '.tmp'), files):
+            os.replace(tmp_file, final_file)
+        # Only scheduled backups rotate (others carry a label before the timestamp);
+        # shard files of a backup share its name, so only the global files are counted
+        name = os.path.splitext(os.path.basename(self.db.db_path))[0]
+        pattern = os.path.join(backup_dir(self.db.db_path), f"{name}-[0-9]*.db")
+        backups = sorted(path for path in glob.glob(pattern) if '.shard' not in path)
+        for old in backups[:max(0, len(backups) - BACKUP_KEEP)]:
+            for old_file in [old] + glob.glob(os.path.splitext(old)[0] + '.shard*'):
+                os.remove(old_file)
+        return 0
+
+    # ==================== Scheduling ====================
+
+    def run_task(self, task: str) -> Dict:
+        """Run one task now and record its duration and bytes reclaimed."""
+        with self._lock:
+            start = time.perf_counter()
+            try:
+                reclaimed = self.tasks[task]()
+                error = None
+            except Exception as e:
+                reclaimed, error = 0, str(e)
+            duration = time.perf_counter() - start
+            self._last_run[task] = time.monotonic()
+
+        DB_MAINTENANCE_SECONDS.labels(task=task).observe(duration)
+        if reclaimed:
+            DB_MAINTENANCE_RECLAIMED_BYTES.labels(task=task).inc(reclaimed)
+        DB_FILE_BYTES.labels(file='main').set(_total_size(self.db.paths))
+        DB_FILE_BYTES.labels(file='wal').set(_total_size(self.db.paths, '-wal'))
+
+        result = {
+            'finished_at': time.time(),
+            'duration_s': round(duration, 3),
+            'reclaimed_bytes': reclaimed,
+            'error': error
+        }
+        self.last_results[task] = result
+        if error:
+            print(f"Database maintenance {task} failed after {duration:.2f}s: {error}")
+        else:
+            print(f"Database maintenance {task} took {duration:.2f}s, reclaimed {reclaimed / 1024:.0f} KB")
+        return result
+
+    def due(self) -> List[Tuple[str, bool]]:
+        """Tasks whose interval has passed, and whether each is overdue enough to skip the idle check."""
+        now = time.monotonic()
+        due = []
+        for task, interval in INTERVALS.items():
+            elapsed = now - self._last_run[task]
+            if elapsed >= interval:
+                due.append((task, elapsed >= interval * OVERDUE_FACTOR))
+        return due
+
+    def run_due(self) -> int:
+        """Run the tasks that are due now. Returns how many ran."""
+        ran = 0
+        for task, overdue in self.due():
+            # Re-check before every task: traffic may have picked up during the previous one
+            if overdue or self.is_idle():
+                self.run_task(task)
+                ran += 1
+        return ran
+
+    def _run(self):
+        while True:
+            time.sleep(POLL_SECONDS)
+            try:
+                self.run_due()
+            except Exception as e:
+                print(f"Database maintenance failed, will retry: {e}")
+
+    def start(self):
+        """Start running maintenance in a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='db-maintenance', daemon=True)
+            self._thread.start()
+
+
+def main():
+    from dotenv import load_dotenv
+    from database import Database
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Run ZeroToHire database maintenance once")
+    parser.add_argument('--database', default=os.getenv('DATABASE_PATH', 'data/zerotohire.db'))
+    parser.add_argument('--task', choices=list(INTERVALS), action='append',
+                        help="Task to run (repeatable); all tasks by default")
+    parser.add_argument('--convert', action='store_true',
+                        help="Rewrite the database with VACUUM so incremental vacuum applies (stop the backend first)")
+    args = parser.parse_args()
+
+    db = Database(args.database)
+    if args.convert:
+        before = _total_size(db.paths)
+        start = time.perf_counter()
+        for conn in db.connections:
+            conn.execute("VACUUM")
+        db.checkpoint('TRUNCATE')
+        print(f"Converted {', '.join(db.paths)} to incremental auto-vacuum in {time.perf_counter() - start:.2f}s "
+              f"({before / 1024:.0f} KB -> {_total_size(db.paths) / 1024:.0f} KB)")
+
+    scheduler = MaintenanceScheduler(db)
+    for task in args.task or list(INTERVALS):
+        scheduler.run_task(task)
+    db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Shard rebalancing for ZeroToHire.
+Moves user-scoped rows between database files when DATABASE_SHARDS changes, including from and back to a single file.
+
+Usage (stop the backend first):
+    python db_shards.py --shards 4                # split data/zerotohire.db into 4 shards
+    python db_shards.py --shards 1                # merge the shards back into one file
+    python db_shards.py --status                  # rows per shard
+
+A backup of every file is written to MAINTENANCE_BACKUP_DIR (next to the database) before anything is moved.
+"""
+
+import argparse
+import os
+import time
+from typing import Dict
+
+from dotenv import load_dotenv
+
+from database import Database, SHARDED_TABLES, read_shard_count, shard_index
+from db_maintenance import new_backup_path
+
+# Users moved per transaction, so a large shard is split in many short commits
+BATCH_USERS = 100
+
+
+def shard_status(db: Database) -> Dict[str, Dict[str, int]]:
+    """Row counts of the user-scoped tables in every file."""
+    return {
+        path: {
+            table: conn.execute(f"SELECT COUNT(*) AS count FROM {table}").fetchone()['count']
+            for table in SHARDED_TABLES
+        }
+        for path, conn in zip(db.shard_paths, db.shards)
+    }
+
+
+def _columns(conn, table: str):
+    return [row['name'] for row in conn.execute(f"PRAGMA table_info({table})") if row['name'] != 'id']
+
+
+def rebalance(db_path: str, shards: int) -> Dict[str, int]:
+    """Move every user's rows to the file they belong in with `shards` shards. Returns rows moved per table."""
+    old_count = read_shard_count(db_path) or 1
+    old = Database(db_path, shards=old_count)
+
+    # Labelled, so scheduled backup rotation never deletes it
+    backup = new_backup_path(old, 'before-rebalance-')
+    old.backup(backup)
+    print(f"Backed up {', '.join(old.paths)} to {backup}")
+
+    # Tombstones refer to row IDs, which change when rows move; apply them all first
+    while old.pending_tombstones():
+        old.purge_tombstones(1000)
+
+    new = Database(db_path, shards=shards, check_layout=False)
+    moved = {table: 0 for table in SHARDED_TABLES}
+    for source_path, source in zip(old.shard_paths, old.shards):
+        for table in SHARDED_TABLES:
+            user_ids = [row['user_id'] for row in source.execute(f"SELECT DISTINCT user_id FROM {table}")]
+            # Only rows whose file changes are copied
+            leaving = [user_id for user_id in user_ids
+                       if new.shard_paths[shard_index(user_id, shards)] != source_path]
+            columns = _columns(source, table)
+            column_list = ', '.join(columns)
+            for start in range(0, len(leaving), BATCH_USERS):
+                batch = leaving[start:start + BATCH_USERS]
+                for user_id in batch:
+                    target = new._shard(user_id)
+                    rows = source.execute(
+                        f"SELECT {column_list} FROM {table} WHERE user_id IS ? ORDER BY id", (user_id,)
+                    ).fetchall()
+                    # The user's rows can only be in the target already if an earlier run stopped
+                    # before deleting the originals; replace them in the same transaction so a
+                    # re-run never duplicates anything
+                    target.execute(f"DELETE FROM {table} WHERE user_id IS ?", (user_id,))
+                    target.executemany(
+                        f"INSERT INTO {table} ({column_list}) VALUES ({', '.join('?' * len(columns))})",
+                        [tuple(row) for row in rows]
+                    )
+                    moved[table] += len(rows)
+                # Commit the copies before deleting the originals: a crash leaves duplicates, never losses
+                for target in new.shards:
+                    target.commit()
+                source.executemany(f"DELETE FROM {table} WHERE user_id IS ?", [(user_id,) for user_id in batch])
+                source.commit()
+
+    new.conn.execute("INSERT OR REPLACE INTO storage_meta (key, value) VALUES ('shards', ?)", (str(shards),))
+    new.conn.commit()
+
+    unused = [path for path in old.paths if path not in new.paths]
+    old.close()
+    new.close()
+    if unused:
+        print(f"No longer used (now empty, safe to delete): {', '.join(unused)}")
+    return moved
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Rebalance ZeroToHire's user data across shard files")
+    parser.add_argument('--database', default=os.getenv('DATABASE_PATH', 'data/zerotohire.db'))
+    parser.add_argument('--shards', type=int, help="Target shard count (set DATABASE_SHARDS to match afterwards)")
+    parser.add_argument('--status', action='store_true', help="Print rows per shard and exit")
+    args = parser.parse_args()
+
+    if args.status or not args.shards:
+        db = Database(args.database, shards=read_shard_count(args.database) or 1)
+        print(f"{args.database}: {db.shard_count} shard(s)")
+        for path, counts in shard_status(db).items():
+            print(f"  {path}: " + ', '.join(f"{table}={count}" for table, count in counts.items()))
+        db.close()
+        return
+
+    start = time.perf_counter()
+    moved = rebalance(args.database, args.shards)
+    print(f"Rebalanced to {args.shards} shard(s) in {time.perf_counter() - start:.2f}s: "
+          + ', '.join(f"{table}={count}" for table, count in moved.items()) + " rows moved")
+
+
+if __name__ == '__main__':
+    main()
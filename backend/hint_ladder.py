@@ -0,0 +1,166 @@
+"""
+Hint ladders for ZeroToHire.
+Pre-generates graded hints per problem while the model is idle, so stuck students get an instant answer.
+"""
+
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+from model_router import HINT_LADDER
+
+# Configuration
+PRECOMPUTE_ENABLED = os.getenv('HINT_PRECOMPUTE', 'True').lower() == 'true'
+IDLE_SECONDS = float(os.getenv('HINT_PRECOMPUTE_IDLE_S', 60))
+POLL_SECONDS = float(os.getenv('HINT_PRECOMPUTE_POLL_S', 10))
+MAX_PROBLEMS = int(os.getenv('HINT_PRECOMPUTE_MAX_PROBLEMS', 200))
+MAX_TOKENS = int(os.getenv('HINT_PRECOMPUTE_MAX_TOKENS', 400))
+
+# Each rung gives away a bit more than the one before
+HINT_LEVELS = ['nudge', 'approach', 'complexity', 'code']
+
+_LEVEL_PATTERN = re.compile(r'^\s*\**(' + '|'.join(HINT_LEVELS) + r')\**\s*:\s*', re.IGNORECASE | re.MULTILINE)
+
+
+def build_prompt(problem: Dict) -> str:
+    """Prompt asking for the whole ladder in one generation, one labelled section per level."""
+    content = re.sub(r'<[^>]+>', '', problem.get('content', '') or '')
+    content = re.sub(r'\n\s*\n+', '\n', content).strip()[:1500]
+    reference = (problem.get('python', '') or '').strip()[:1500]
+    return f"""You are Alex, a patient coding tutor. Write four hints for the problem below, each revealing a little more than the previous one. Never write the full solution.
+
+Problem: {problem.get('title', '')} ({problem.get('difficulty', '')})
+{content}
+
+Reference solution (for you only, do not copy it):
+{reference}
+
+Answer with exactly these four labelled lines:
+NUDGE: a question that points at the key observation, without naming the technique.
+APPROACH: the technique or data structure to use and why it fits.
+COMPLEXITY: the time and space complexity the approach reaches and what makes it possible.
+CODE: a short pseudocode outline of the main loop, with no complete Python.
+
+NUDGE:"""
+
+
+def parse_ladder(text: str) -> Optional[List[str]]:
+    """Split a generation into the hint levels, or None if any level is missing."""
+    # The prompt ends with the first label, so the text starts with the nudge itself
+    text = 'NUDGE: ' + text.strip()
+    hints = {}
+    matches = list(_LEVEL_PATTERN.finditer(text))
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        hint = text[match.end():end].strip()
+        level = match.group(1).lower()
+        if hint and level not in hints:
+            hints[level] = hint
+    if any(level not in hints for level in HINT_LEVELS):
+        return None
+    return [hints[level] for level in HINT_LEVELS]
+
+
+class HintLadders:
+    """Stored hint ladders for the tutor's model, plus the idle-time worker that fills them in.
+
+    problems is the dataset split (indexed by problem ID). Ladders are keyed by
+    the large model's version, so swapping the model regenerates them. Lookups
+    use db; the worker reads and writes through worker_db (its own connection,
+    see Database.open_worker()) so its commits never interleave with requests'.
+    """
+
+    def __init__(self, tutor, db, problems, worker_db=None):
+        self.tutor = tutor
+        self.db = db
+        self.worker_db = worker_db or db
+        self.problems = problems
+        self._cache: Dict[int, List[str]] = {}
+        self._failed = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def model_version(self) -> str:
+        return self.tutor.llm.model_version
+
+    def get(self, problem_id: int) -> List[str]:
+        """The problem's hints in order, or an empty list if none were generated yet."""
+        with self._lock:
+            if problem_id in self._cache:
+                return self._cache[problem_id]
+        hints = self.db.get_hint_ladder(problem_id, self.model_version)
+        if hints:
+            with self._lock:
+                self._cache[problem_id] = hints
+        return hints
+
+    def generate(self, problem_id: int) -> Optional[List[str]]:
+        """Generate and store one problem's ladder on spare model capacity."""
+        prompt = build_prompt(self.problems[problem_id])
+        response = self.tutor._generate(
+            HINT_LADDER, prompt,
+            max_tokens=MAX_TOKENS,
+            temperature=0.3,
+            top_p=0.9,
+            echo=False,
+            stop=["Student:", "User:", "Alex:", "\n\n\n"]
+        )
+        hints = parse_ladder(response['choices'][0]['text'])
+        if hints is None:
+            return None
+        self.worker_db.save_hint_ladder(problem_id, self.model_version, hints)
+        with self._lock:
+            self._cache[problem_id] = hints
+        return hints
+
+    def _candidates(self) -> List[int]:
+        """Problems still missing a ladder, most selected first, then in catalog order."""
+        done = set(self.worker_db.get_hinted_problems(self.model_version)) | self._failed
+        ordered = self.worker_db.get_popular_problems(MAX_PROBLEMS) + list(range(min(MAX_PROBLEMS, len(self.problems))))
+        seen = set()
+        candidates = []
+        for problem_id in ordered:
+            if problem_id in seen or not 0 <= problem_id < len(self.problems):
+                continue
+            seen.add(problem_id)
+            if problem_id not in done:
+                candidates.append(problem_id)
+        return candidates[:max(0, MAX_PROBLEMS - len(done))]
+
+    def run_once(self) -> bool:
+        """Fill in the next missing ladder if the model has been idle long enough. Returns whether it tried."""
+        if self.tutor.router.idle_for() < IDLE_SECONDS:
+            return False
+        candidates = self._candidates()
+        if not candidates:
+            return False
+        problem_id = candidates[0]
+        try:
+            hints = self.generate(problem_id)
+        except Exception as e:
+            print(f"Hint ladder generation failed for problem {problem_id}: {e}")
+            hints = None
+        if hints is None:
+            # Don't retry a problem the model can't produce a clean ladder for
+            self._failed.add(problem_id)
+        else:
+            print(f"Hint ladder ready for problem {problem_id} ({len(candidates) - 1} to go)")
+        return True
+
+    def _run(self):
+        while True:
+            time.sleep(POLL_SECONDS)
+            try:
+                self.run_once()
+            except Exception as e:
+                # e.g. "database is locked" while maintenance holds the write lock
+                print(f"Hint ladder precompute failed, will retry: {e}")
+
+    def start(self):
+        """Start filling in ladders in a background thread whenever the model has been idle."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='hint-ladders', daemon=True)
+            self._thread.start()
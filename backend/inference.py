@@ -0,0 +1,464 @@
+"""
+Inference backends for ZeroToHire.
+Every backend is called like llama_cpp.Llama (prompt plus sampling kwargs, optionally streamed) and
+returns the same completion dicts, so the tutor does not care where tokens come from.
+
+Backends (INFERENCE_BACKEND):
+    llama_cpp - in-process llama.cpp model (default)
+    http      - local OpenAI-compatible completions server
+    fake      - deterministic token emitter with configurable latency, for load testing
+    socket    - out-of-process model server (see model_server.py) over a local Unix socket
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+
+class InferenceBackend:
+    """Completion interface shared by all backends.
+
+    `concurrency` is how many generations the backend can run at once; the
+    model router admits that many requests per tier. `model_version` identifies
+    the weights, so stored generations (e.g. hint ladders) are tied to them.
+    """
+    name = 'base'
+    concurrency = 1
+
+    @property
+    def model_version(self) -> str:
+        return self.name
+
+    def __call__(self, prompt: str, max_tokens: int = 400, temperature: float = 0.7, top_p: float = 0.9,
+                 echo: bool = False, stop: Optional[List[str]] = None, stream: bool = False):
+        """Return a completion dict, or an iterator of chunk dicts when stream=True."""
+        raise NotImplementedError
+
+    def tokenize(self, text: bytes) -> List[int]:
+        """Approximate tokenization (4 bytes per token) for backends without a tokenizer."""
+        return list(range(max(1, len(text) // 4)))
+
+    def close(self):
+        pass
+
+
+def _completion(text: str, prompt_tokens: int, completion_tokens: int, finish_reason: str = 'stop') -> Dict:
+    return {
+        'object': 'text_completion',
+        'choices': [{'text': text, 'index': 0, 'finish_reason': finish_reason}],
+        'usage': {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens
+        }
+    }
+
+
+def _chunk(text: str, finish_reason: Optional[str] = None) -> Dict:
+    return {'object': 'text_completion', 'choices': [{'text': text, 'index': 0, 'finish_reason': finish_reason}]}
+
+
+# ==================== llama.cpp (in-process) ====================
+
+class LlamaCppBackend(InferenceBackend):
+    """In-process llama.cpp model loaded from a local GGUF file."""
+    name = 'llama_cpp'
+
+    def __init__(self, model_path: str):
+        from llama_cpp import Llama
+        from autotune import get_tuned_params
+
+        # Load model configuration from environment
+        n_ctx = int(os.getenv('MODEL_N_CTX', 4096))
+        n_threads = int(os.getenv('MODEL_N_THREADS', 4))
+        n_gpu_layers = int(os.getenv('MODEL_N_GPU_LAYERS', -1))
+        n_batch = int(os.getenv('MODEL_N_BATCH', 512))
+        use_mmap = True
+        use_mlock = False
+
+        # Auto-tune mode replaces the static defaults; explicitly set MODEL_* values still win
+        if os.getenv('MODEL_AUTOTUNE', 'False').lower() == 'true':
+            tuned = get_tuned_params(model_path, n_ctx, n_gpu_layers)
+            n_threads = int(os.getenv('MODEL_N_THREADS', tuned['n_threads']))
+            n_batch = int(os.getenv('MODEL_N_BATCH', tuned['n_batch']))
+            use_mmap = tuned['use_mmap']
+            use_mlock = tuned['use_mlock']
+
+        self.model_path = model_path
+        self.llm = Llama(
+            model_path=model_path,
+            n_ctx=n_ctx,
+            n_threads=n_threads,
+            n_gpu_layers=n_gpu_layers,
+            verbose=True,
+            n_batch=n_batch,
+            use_mmap=use_mmap,
+            use_mlock=use_mlock,
+            draft_model=self._create_draft_model()
+        )
+
+        # Keep evaluated prompt states in RAM so prefixes survive other sessions' requests
+        prompt_cache_mb = int(os.getenv('MODEL_PROMPT_CACHE_MB', 0))
+        if prompt_cache_mb > 0:
+            from llama_cpp import LlamaRAMCache
+            self.llm.set_cache(LlamaRAMCache(capacity_bytes=prompt_cache_mb * 1024 * 1024))
+
+    @staticmethod
+    def _create_draft_model():
+        """Create the speculative decoding draft model selected by MODEL_DRAFT_MODE.
+
+        Speculative decoding is opt-in. 'prompt_lookup' drafts tokens by matching
+        n-grams already present in the prompt, which pays off for code reviews that
+        quote the student's submission back verbatim.
+        """
+        draft_mode = os.getenv('MODEL_DRAFT_MODE', 'none').strip().lower()
+        if draft_mode in ('', 'none', 'off'):
+            return None
+
+        if draft_mode == 'prompt_lookup':
+            from llama_cpp.llama_speculative import LlamaPromptLookupDecoding
+
+            # ~10 draft tokens suits GPU inference, ~2 is better for CPU-only
+            num_pred_tokens = int(os.getenv('MODEL_DRAFT_NUM_PRED_TOKENS', 10))
+            max_ngram_size = int(os.getenv('MODEL_DRAFT_MAX_NGRAM_SIZE', 2))
+            print(f"Speculative decoding enabled: prompt lookup ({num_pred_tokens} draft tokens, n-gram size {max_ngram_size})")
+            return LlamaPromptLookupDecoding(
+                max_ngram_size=max_ngram_size,
+                num_pred_tokens=num_pred_tokens
+            )
+
+        raise ValueError(f"Unknown MODEL_DRAFT_MODE '{draft_mode}' (expected 'none' or 'prompt_lookup')")
+
+    @property
+    def model_version(self) -> str:
+        return os.path.basename(self.model_path)
+
+    def __call__(self, prompt, **kwargs):
+        return self.llm(prompt, **kwargs)
+
+    def tokenize(self, text: bytes) -> List[int]:
+        return self.llm.tokenize(text)
+
+    def close(self):
+        self.llm.close()
+
+
+# ==================== OpenAI-compatible HTTP server ====================
+
+class OpenAIHTTPBackend(InferenceBackend):
+    """Client for a local OpenAI-compatible /v1/completions server (llama.cpp server, vLLM, ...)."""
+    name = 'http'
+
+    def __init__(self, base_url: str, model: str, api_key: Optional[str] = None, timeout: float = 300.0):
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+        self.api_key = api_key
+        self.timeout = timeout
+
+    @property
+    def model_version(self) -> str:
+        return f"http:{self.model}"
+
+    def _post(self, body: Dict):
+        headers = {'Content-Type': 'application/json'}
+        if self.api_key:
+            headers['Authorization'] = f"Bearer {self.api_key}"
+        req = urllib.request.Request(
+            f"{self.base_url}/completions",
+            data=json.dumps(body).encode('utf-8'),
+            headers=headers
+        )
+        return urllib.request.urlopen(req, timeout=self.timeout)
+
+    def __call__(self, prompt, max_tokens=400, temperature=0.7, top_p=0.9, echo=False, stop=None, stream=False):
+        body = {
+            'model': self.model,
+            'prompt': prompt,
+            'max_tokens': max_tokens,
+            'temperature': temperature,
+            'top_p': top_p,
+            'echo': echo,
+            'stop': stop or [],
+            'stream': stream
+        }
+        if stream:
+            return self._stream(body)
+        with self._post(body) as resp:
+            return json.loads(resp.read().decode('utf-8'))
+
+    def _stream(self, body: Dict) -> Iterator[Dict]:
+        # Server-sent events: one "data: {...}" line per chunk, terminated by "data: [DONE]"
+        with self._post(body) as resp:
+            for raw_line in resp:
+                line = raw_line.decode('utf-8').strip()
+                if not line.startswith('data:'):
+                    continue
+                data = line[len('data:'):].strip()
+                if data == '[DONE]':
+                    break
+                chunk = json.loads(data)
+                choice = chunk['choices'][0]
+                yield _chunk(choice.get('text', ''), choice.get('finish_reason'))
+
+
+# ==================== Out-of-process model server ====================
+
+class WorkerAffinity:
+    """Picks the model_server.py worker for each completion.
+
+    Each worker keeps the KV state of the last prompt it evaluated per tier and
+    only re-evaluates what follows the longest common prefix. Sending a prompt
+    to the idle worker whose last prompt on that tier shares the longest prefix
+    with it means a speculative prefill (prefill.py) and the chat turn that
+    follows land on the same worker.
+    """
+
+    def __init__(self, socket_paths: List[str]):
+        self.socket_paths = socket_paths
+        self._busy = [0] * len(socket_paths)
+        self._last_prompt: Dict[tuple, str] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def worker(self, tier: str, prompt: str):
+        """Reserve a worker for one completion and yield its socket path."""
+        with self._lock:
+            workers = range(len(self.socket_paths))
+            # Another web process may be using "idle" workers; a busy one just queues the connection
+            idle = [i for i in workers if not self._busy[i]] or list(workers)
+            index = max(idle, key=lambda i: len(os.path.commonprefix([self._last_prompt.get((i, tier), ''), prompt])))
+            self._busy[index] += 1
+            self._last_prompt[(index, tier)] = prompt
+        try:
+            yield self.socket_paths[index]
+        finally:
+            with self._lock:
+                self._busy[index] -= 1
+
+
+class SocketBackend(InferenceBackend):
+    """Client for model_server.py workers listening on local Unix sockets.
+
+    Protocol: one JSON request line per connection, answered with JSON lines:
+    {"chunk": {...}} per streamed chunk then {"done": true}, {"result": {...}}
+    for blocking calls, or {"error": "..."}. Completions go to a worker's own
+    socket (see WorkerAffinity); other requests to the shared one, where any
+    free worker answers. Every worker serves every tier, so all tiers of one
+    server share `slot_group` and with it one pool of `concurrency` slots.
+    """
+    name = 'socket'
+
+    def __init__(self, socket_path: str, tier: str = 'large', concurrency: int = 1, timeout: float = 300.0,
+                 model_version: str = 'socket', affinity: Optional[WorkerAffinity] = None):
+        self.socket_path = socket_path
+        self.tier = tier
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.affinity = affinity
+        self.slot_group = socket_path
+        self._model_version = model_version
+
+    @property
+    def model_version(self) -> str:
+        return self._model_version
+
+    @staticmethod
+    def request(socket_path: str, payload: Dict, timeout: float = 300.0) -> Iterator[Dict]:
+        """Send one request and yield the decoded response lines."""
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+            conn.settimeout(timeout)
+            conn.connect(socket_path)
+            conn.sendall(json.dumps(payload).encode('utf-8') + b'\n')
+            with conn.makefile('rb') as reader:
+                for line in reader:
+                    message = json.loads(line)
+                    if 'error' in message:
+                        raise RuntimeError(f"Model server error: {message['error']}")
+                    yield message
+
+    @contextmanager
+    def _worker(self, prompt: str):
+        if self.affinity is None:
+            yield self.socket_path
+        else:
+            with self.affinity.worker(self.tier, prompt) as socket_path:
+                # The server removes a worker's socket when the worker dies
+                yield socket_path if os.path.exists(socket_path) else self.socket_path
+
+    def __call__(self, prompt, stream=False, **params):
+        payload = {'op': 'complete', 'tier': self.tier, 'prompt': prompt, 'params': params, 'stream': stream}
+        if stream:
+            return self._stream(payload)
+        with self._worker(prompt) as socket_path:
+            for message in self.request(socket_path, payload, self.timeout):
+                if 'result' in message:
+                    return message['result']
+        raise RuntimeError("Model server closed the connection without a result")
+
+    def _stream(self, payload: Dict) -> Iterator[Dict]:
+        with self._worker(payload['prompt']) as socket_path:
+            for message in self.request(socket_path, payload, self.timeout):
+                if message.get('done'):
+                    return
+                yield message['chunk']
+
+    def tokenize(self, text: bytes) -> List[int]:
+        payload = {'op': 'tokenize', 'tier': self.tier, 'text': text.decode('utf-8', errors='ignore')}
+        for message in self.request(self.socket_path, payload, self.timeout):
+            return message['tokens']
+        return super().tokenize(text)
+
+
+# ==================== Fake model for load testing ====================
+
+FAKE_REPLY = (
+    "Good question! Let's think about what the problem is really asking. "
+    "What happens if you walk through the first example by hand and write down every intermediate value? "
+    "Once you see the pattern, consider which data structure would let you look up what you've already seen in constant time. "
+    "Try sketching that idea in the editor and tell me what you come up with."
+)
+
+
+class FakeBackend(InferenceBackend):
+    """Deterministic token emitter that simulates prefill and decode time without a model."""
+    name = 'fake'
+
+    def __init__(self, tokens_per_sec: float = 20.0, first_token_latency: float = 0.3,
+                 prefill_tokens_per_sec: float = 0.0, reply: str = FAKE_REPLY):
+        self.tokens_per_sec = tokens_per_sec
+        self.first_token_latency = first_token_latency
+        self.prefill_tokens_per_sec = prefill_tokens_per_sec
+        # Word-level "tokens", keeping the leading space like a real tokenizer
+        words = reply.split(' ')
+        self.reply_tokens = [words[0]] + [' ' + w for w in words[1:]]
+
+    def _prefill_delay(self, prompt_tokens: int) -> float:
+        delay = self.first_token_latency
+        if self.prefill_tokens_per_sec > 0:
+            delay += prompt_tokens / self.prefill_tokens_per_sec
+        return delay
+
+    def _tokens(self, max_tokens: int) -> List[str]:
+        count = min(max_tokens, len(self.reply_tokens)) if max_tokens and max_tokens > 0 else len(self.reply_tokens)
+        return self.reply_tokens[:count]
+
+    def __call__(self, prompt, max_tokens=400, temperature=0.7, top_p=0.9, echo=False, stop=None, stream=False):
+        prompt_tokens = len(self.tokenize(prompt.encode('utf-8')))
+        tokens = self._tokens(max_tokens)
+        if stream:
+            return self._stream(prompt_tokens, tokens)
+
+        time.sleep(self._prefill_delay(prompt_tokens) + len(tokens) / self.tokens_per_sec)
+        finish_reason = 'length' if len(tokens) < len(self.reply_tokens) else 'stop'
+        return _completion(''.join(tokens), prompt_tokens, len(tokens), finish_reason)
+
+    def _stream(self, prompt_tokens: int, tokens: List[str]) -> Iterator[Dict]:
+        time.sleep(self._prefill_delay(prompt_tokens))
+        interval = 1.0 / self.tokens_per_sec
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(interval)
+            yield _chunk(token)
+        yield _chunk('', 'stop')
+
+
+# ==================== Factory ====================
+
+def resolve_model_paths():
+    """Locate (downloading if allowed) the configured GGUF files.
+
+    Returns (model_path, small_model_path); the small model is None unless
+    SMALL_MODEL_PATH or HUGGINGFACE_SMALL_MODEL_FILENAME is set.
+    """
+    from model_artifacts import prepare_model
+
+    model_path = prepare_model(
+        os.getenv('HUGGINGFACE_MODEL_REPO', 'Qwen/Qwen2.5-Coder-14B-Instruct-GGUF'),
+        os.getenv('HUGGINGFACE_MODEL_FILENAME', 'qwen2.5-coder-14b-instruct-q4_k_m.gguf'),
+        local_path=os.getenv('MODEL_PATH') or None,
+        revision=os.getenv('HUGGINGFACE_MODEL_REVISION') or None,
+        expected_sha256=os.getenv('MODEL_SHA256') or None
+    )
+
+    # Optional small model for quick conversational turns (disabled unless configured)
+    small_model_path = None
+    small_local_path = os.getenv('SMALL_MODEL_PATH') or None
+    small_model_filename = os.getenv('HUGGINGFACE_SMALL_MODEL_FILENAME', '')
+    if small_local_path or small_model_filename:
+        small_model_path = prepare_model(
+            os.getenv('HUGGINGFACE_SMALL_MODEL_REPO', 'Qwen/Qwen2.5-Coder-1.5B-Instruct-GGUF'),
+            small_model_filename,
+            local_path=small_local_path,
+            revision=os.getenv('HUGGINGFACE_SMALL_MODEL_REVISION') or None,
+            expected_sha256=os.getenv('SMALL_MODEL_SHA256') or None
+        )
+
+    return model_path, small_model_path
+
+
+def create_backends(kind: Optional[str] = None, model_path: Optional[str] = None,
+                    small_model_path: Optional[str] = None) -> Dict[str, InferenceBackend]:
+    """Build the 'large' (and optional 'small') model tiers for the configured backend."""
+    kind = (kind or os.getenv('INFERENCE_BACKEND', 'llama_cpp')).lower()
+
+    if kind == 'llama_cpp':
+        if not model_path:
+            raise ValueError("The llama_cpp backend requires a model path")
+        import torch
+        print("Checking CUDA availability...")
+        print(f"PyTorch CUDA available: {torch.cuda.is_available()}")
+        if torch.cuda.is_available():
+            print(f"GPU device: {torch.cuda.get_device_name(0)}")
+
+        models = {'large': LlamaCppBackend(model_path)}
+        if small_model_path:
+            print("Loading small model for quick replies...")
+            models['small'] = LlamaCppBackend(small_model_path)
+        return models
+
+    if kind == 'http':
+        base_url = os.getenv('INFERENCE_HTTP_URL', 'http://127.0.0.1:8080/v1')
+        api_key = os.getenv('INFERENCE_HTTP_API_KEY')
+        models = {'large': OpenAIHTTPBackend(base_url, os.getenv('INFERENCE_HTTP_MODEL', 'default'), api_key)}
+        small_model = os.getenv('INFERENCE_HTTP_SMALL_MODEL')
+        if small_model:
+            models['small'] = OpenAIHTTPBackend(base_url, small_model, api_key)
+        return models
+
+    if kind == 'fake':
+        models = {'large': FakeBackend(
+            tokens_per_sec=float(os.getenv('FAKE_TOKENS_PER_SEC', 20)),
+            first_token_latency=float(os.getenv('FAKE_FIRST_TOKEN_LATENCY_MS', 300)) / 1000,
+            prefill_tokens_per_sec=float(os.getenv('FAKE_PREFILL_TOKENS_PER_SEC', 0))
+        )}
+        small_rate = os.getenv('FAKE_SMALL_TOKENS_PER_SEC')
+        if small_rate:
+            # A smaller model also prefills faster
+            models['small'] = FakeBackend(
+                tokens_per_sec=float(small_rate),
+                first_token_latency=models['large'].first_token_latency / 4,
+                prefill_tokens_per_sec=models['large'].prefill_tokens_per_sec * 4
+            )
+        return models
+
+    if kind == 'socket':
+        socket_path = os.getenv('MODEL_SERVER_SOCKET', '/tmp/zerotohire-model.sock')
+        try:
+            info = next(SocketBackend.request(socket_path, {'op': 'info'}, timeout=10))
+        except OSError as e:
+            raise RuntimeError(f"Model server not reachable at {socket_path} (start it with model_server.py): {e}")
+        # Each worker process runs one generation at a time, on any tier
+        concurrency = int(os.getenv('MODEL_SERVER_CONCURRENCY', info['workers']))
+        print(f"Connected to model server at {socket_path} ({info['workers']} workers, tiers: {', '.join(info['tiers'])})")
+        versions = info.get('versions', {})
+        affinity = WorkerAffinity(info['worker_sockets']) if info.get('worker_sockets') else None
+        return {tier: SocketBackend(socket_path, tier, concurrency, model_version=versions.get(tier, 'socket'),
+                                    affinity=affinity)
+                for tier in info['tiers']}
+
+    raise ValueError(f"Unknown INFERENCE_BACKEND '{kind}' (expected 'llama_cpp', 'http', 'fake' or 'socket')")
@@ -0,0 +1,189 @@
+"""
+Intent routing for ZeroToHire.
+Answers slash commands, acknowledgements and navigation requests with canned replies instead of a model generation.
+"""
+
+import random
+import re
+from typing import Callable, Dict, List, Optional, Pattern, Tuple
+
+from metrics import INTENT_MATCHES_TOTAL
+
+
+class IntentResult:
+    """A reply produced without the model.
+
+    role is how the reply is stored in the conversation ('system' for command
+    confirmations, 'alex' for conversational replies); record_user_message says
+    whether the student's message is saved too. completion_changed tells the
+    caller to refresh anything derived from the user's completed problems.
+    """
+
+    def __init__(self, reply: str, role: str = 'alex', record_user_message: bool = True,
+                 completion_changed: bool = False):
+        self.reply = reply
+        self.role = role
+        self.record_user_message = record_user_message
+        self.completion_changed = completion_changed
+
+
+Handler = Callable[..., Optional[IntentResult]]
+
+
+class IntentRouter:
+    """Registry of commands ('/name args') and whole-message patterns.
+
+    Handlers are called as handler(tutor, text, context) and may return None to
+    let the message through to the model. Commands are matched first, then
+    patterns in registration order.
+    """
+
+    def __init__(self):
+        self._commands: Dict[str, Tuple[Handler, str]] = {}
+        self._patterns: List[Tuple[str, Pattern, Handler]] = []
+
+    def command(self, *names: str, help: str = ''):
+        """Register a handler for one or more slash commands."""
+        def decorate(handler: Handler) -> Handler:
+            for name in names:
+                self._commands[name.lower()] = (handler, help)
+            return handler
+        return decorate
+
+    def pattern(self, name: str, regex: str):
+        """Register a handler for messages matching a regex (full match, case-insensitive)."""
+        def decorate(handler: Handler) -> Handler:
+            self._patterns.append((name, re.compile(regex, re.IGNORECASE), handler))
+            return handler
+        return decorate
+
+    def commands(self) -> List[Tuple[str, str]]:
+        """(command, help) pairs for /help, one per handler."""
+        seen = {}
+        for name, (handler, help_text) in self._commands.items():
+            seen.setdefault(handler, (name, help_text))
+        return list(seen.values())
+
+    def _match_command(self, name: str) -> Optional[str]:
+        """The registered command a typed one refers to; prefixes count, so '/done!' is /done."""
+        if name in self._commands:
+            return name
+        matches = [command for command in self._commands if name.startswith(command)]
+        return max(matches, key=len) if matches else None
+
+    def route(self, tutor, message: str, context: Optional[Dict] = None) -> Optional[IntentResult]:
+        """Return a canned reply for the message, or None if it needs the model."""
+        text = message.strip()
+        context = context or {}
+
+        if text.startswith('/'):
+            name, _, args = text.partition(' ')
+            command = self._match_command(name.lower())
+            if command is None:
+                INTENT_MATCHES_TOTAL.labels(intent='unknown_command').inc()
+                return IntentResult(f"Unknown command {name}. Type /help to see what's available.",
+                                    role='system', record_user_message=False)
+            result = self._commands[command][0](tutor, args.strip(), context)
+            if result is not None:
+                INTENT_MATCHES_TOTAL.labels(intent=command.lstrip('/')).inc()
+            return result
+
+        normalized = re.sub(r'\s+', ' ', text)
+        for name, regex, handler in self._patterns:
+            if regex.fullmatch(normalized):
+                result = handler(tutor, normalized, context)
+                if result is not None:
+                    INTENT_MATCHES_TOTAL.labels(intent=name).inc()
+                    return result
+        return None
+
+    def apply(self, tutor, message: str, result: IntentResult):
+        """Record a routed exchange in the tutor's conversation."""
+        if result.record_user_message:
+            tutor._add_message_to_history('user', message)
+        tutor._add_message_to_history(result.role, result.reply)
+
+
+router = IntentRouter()
+
+
+# ==================== Commands ====================
+
+@router.command('/done', '/complete', help='Mark the current problem as completed')
+def mark_complete(tutor, args, context):
+    if tutor.current_problem is None:
+        return IntentResult('No problem is currently loaded to mark as complete.', role='system',
+                            record_user_message=False)
+    pid = tutor.current_problem.get('id')
+    if pid is not None:
+        tutor.mark_problem_completed(pid)
+    return IntentResult(f"Problem '{tutor.current_problem.get('title', '')}' marked as completed.", role='system',
+                        record_user_message=False, completion_changed=pid is not None)
+
+
+@router.command('/reset', '/clear', help='Clear the chat for the current problem')
+def clear_chat(tutor, args, context):
+    tutor.clear_chat()
+    return IntentResult('Chat cleared. Ask me anything about the problem to start again.', role='system',
+                        record_user_message=False)
+
+
+@router.command('/hint', help='Get the next hint for the current problem')
+def hint(tutor, args, context):
+    if tutor.current_problem is None:
+        return IntentResult('Pick a problem first and I can give you hints for it.', role='system',
+                            record_user_message=False)
+    reply = tutor.next_hint()
+    if reply is None:
+        # No stored ladder (or it's used up); let the model answer a plain request
+        return None
+    return IntentResult(reply)
+
+
+@router.command('/help', help='Show the available commands')
+def show_help(tutor, args, context):
+    lines = ['Available commands:'] + [f"{name} - {help_text}" for name, help_text in router.commands()]
+    return IntentResult('\n'.join(lines), role='system', record_user_message=False)
+
+
+# ==================== Patterns ====================
+
+# Only explicit requests: "I'm done" is as likely to be frustration as a finished problem
+@router.pattern('mark_complete', r"(please )?mark (it |this |the problem )?(as )?(complete|completed)( please)?[.!]*")
+def mark_complete_phrase(tutor, text, context):
+    return mark_complete(tutor, '', context)
+
+
+@router.pattern('hint', r"(can i (get|have) |could i (get|have) |give me |i need |need )?(a |another |one more |the next )?"
+                        r"hint( please)?[.!?]*|(i'?m|i am) (so |really |totally |completely )?stuck( on this( one)?)?[.!]*|"
+                        r"i (don'?t|do not) know (how|where) to (start|begin)[.!]*")
+def hint_phrase(tutor, text, context):
+    if tutor.current_problem is None:
+        return None
+    return hint(tutor, '', context)
+
+
+_ACK_REPLIES = [
+    "You're welcome! Give the next step a try and let me know how it goes.",
+    "Happy to help! What are you going to try next?",
+    "Anytime! Share your code or your thinking whenever you're ready."
+]
+
+
+@router.pattern('acknowledgement', r"(ok(ay)?|k|thanks?( you)?( so much)?|thx|ty|got it|cool|great|nice|awesome|"
+                                   r"sounds good|makes sense|will do|perfect|alright)[.! ]*(:\)|🙂|👍)?")
+def acknowledgement(tutor, text, context):
+    return IntentResult(random.choice(_ACK_REPLIES))
+
+
+@router.pattern('navigation', r"(can (i|we) )?(go to |get |give me |show me |pick |try )?(the |a )?"
+                              r"(next|new|another|different|other) (problem|question|one)( please)?[.!?]*|"
+                              r"what should i (do|solve|try) next\??")
+def navigation(tutor, text, context):
+    recommend = context.get('recommend')
+    suggestions = recommend() if recommend else []
+    if not suggestions:
+        return IntentResult("Open the problem browser to pick your next problem - you can filter by difficulty and topic.")
+    lines = ["Here are a few problems that build on what you've done - open the problem browser to start one:"]
+    lines += [f"- {problem['title']} ({problem['difficulty']})" for problem in suggestions]
+    return IntentResult('\n'.join(lines))
@@ -1,526 +1,28 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, Response
 from flask_cors import CORS
 from flask_sock import Sock
-from datasets import load_dataset
-from huggingface_hub import hf_hub_download
-import torch
-from llama_cpp import Llama
 import json
 import os
-from typing import Optional
-from datetime import datetime
-import re
+import time
 from dotenv import load_dotenv
 from database import Database
+from purger import TombstonePurger
+from db_maintenance import MaintenanceScheduler, MAINTENANCE_ENABLED, IDLE_SECONDS as MAINTENANCE_IDLE_SECONDS
+from tutor import CodingTutor
+from inference import resolve_model_paths
+from dataset_snapshot import load_problems, DEFAULT_SNAPSHOT_PATH
+from problem_catalog import ProblemCatalog
+from recommender import Recommender
+from hint_ladder import HintLadders, PRECOMPUTE_ENABLED as HINT_PRECOMPUTE_ENABLED
+from chat_frames import ChatFrames, SocketSession, socket_user, client_key as chat_client_key
+from admission import AdmissionController, AdmissionRejected, INTERACTIVE, REVIEW, client_address as admission_client_address
+from metrics import REGISTRY, CONTENT_TYPE, HTTP_REQUEST_SECONDS, HTTP_IN_FLIGHT
+import tracing
 from auth import AuthManager, token_required, optional_token, validate_password, validate_email, validate_username
 
 # Load environment variables
 load_dotenv()
 
-class CodingTutor:
-    def __init__(self, model_path, db: Database, user_id: Optional[int] = None):
-        """Initialize the coding tutor with database storage."""
-        self.db = db
-        self.user_id = user_id
-        
-        # Load conversation history from database (LIMIT to recent messages only to prevent context overflow)
-        self.conversation_history = self.db.get_conversation_history(limit=10, user_id=user_id)
-        
-        # Load current problem from database
-        self.current_problem = self.db.get_current_problem(user_id=user_id)
-        
-        print(f"Loaded session with {len(self.conversation_history)} recent messages")
-        
-        # Load model configuration from environment
-        n_ctx = int(os.getenv('MODEL_N_CTX', 4096))
-        n_threads = int(os.getenv('MODEL_N_THREADS', 4))
-        n_gpu_layers = int(os.getenv('MODEL_N_GPU_LAYERS', -1))
-        n_batch = int(os.getenv('MODEL_N_BATCH', 512))
-        
-        # Load the model
-        print("Loading model...")
-        print("Checking CUDA availability...")
-        print(f"PyTorch CUDA available: {torch.cuda.is_available()}")
-        if torch.cuda.is_available():
-            print(f"GPU device: {torch.cuda.get_device_name(0)}")
-        
-        self.llm = Llama(
-            model_path=model_path,
-            n_ctx=n_ctx,
-            n_threads=n_threads,
-            n_gpu_layers=n_gpu_layers,  
-            verbose=True,    
-            n_batch=n_batch,     
-            use_mmap=True,    
-            use_mlock=False   
-        )
-        print("Model loaded successfully!")
-    
-    def set_user_context(self, user_id: Optional[int] = None):
-        """Set the current user context and reload user-specific data."""
-        self.user_id = user_id
-        self.conversation_history = self.db.get_conversation_history(limit=10, user_id=user_id)
-        self.current_problem = self.db.get_current_problem(user_id=user_id)
-    
-    def _add_message_to_history(self, role: str, content: str):
-        """Add message to history and save to database."""
-        message = {
-            'role': role,
-            'content': content,
-            'timestamp': datetime.now().isoformat()
-        }
-        self.conversation_history.append(message)
-        
-        # Save to database
-        problem_id = self.current_problem.get('id') if self.current_problem else None
-        self.db.save_message(role, content, problem_id, user_id=self.user_id)
-    
-    def set_problem(self, problem_data):
-        """Set a new coding problem"""
-        self.current_problem = {
-            'title': problem_data.get('title', 'Unknown'),
-            'description': problem_data.get('description', ''),
-            'difficulty': problem_data.get('difficulty', 'Unknown'),
-            'problem_types': problem_data.get('problem_types', []),
-            'id': problem_data.get('id')
-        }
-        
-        # Save problem to database
-        self.db.set_problem(
-            self.current_problem['id'],
-            self.current_problem['title'],
-            self.current_problem['difficulty'],
-            user_id=self.user_id
-        )
-        
-        # Add system message about the new problem
-        problem_title = self.current_problem['title']
-        system_msg = f"New coding problem started: {problem_title}"
-        self._add_message_to_history('system', system_msg)
-        
-        # Check if this is the first problem or a new problem in an existing session
-        has_previous_conversation = len([msg for msg in self.conversation_history if msg['role'] in ['user', 'assistant', 'alex']]) > 0
-        
-        if has_previous_conversation:
-            # Continuing session with new problem
-            response = f"Great! Let's work on '{problem_title}'. I can see you have the problem description. Before we dive into coding, let's make sure we understand what we're being asked to do. Can you tell me in your own words what this problem is asking for? Let me know if you have any questions!"
-        else:
-            # First problem in session
-            response = f"Hello! I'm Alex, your coding assistant. I see you're working on '{problem_title}'. Before we start coding, let's make sure we understand the problem. Can you read through the problem description and tell me what you think it's asking us to do? Let me know if you have any questions!"
-        
-        # Add the response directly to history
-        self._add_message_to_history('alex', response)
-        
-        return response
-    
-    def mark_problem_completed(self, problem_id):
-        """Mark a problem as completed in database."""
-        self.db.mark_problem_complete(problem_id, user_id=self.user_id)
-        return True
-
-    def mark_problem_uncompleted(self, problem_id):
-        """Mark a problem as incomplete in database."""
-        self.db.mark_problem_incomplete(problem_id, user_id=self.user_id)
-        return True
-    
-    def is_problem_completed(self, problem_id):
-        """Check if problem is completed."""
-        return self.db.is_problem_completed(problem_id, user_id=self.user_id)
-    
-    def chat(self, user_message, is_initial=False, code_context=None):
-        """Continue the conversation with Alex
-        
-        Args:
-            user_message: The user's message
-            is_initial: Whether this is an initial message
-            code_context: Optional code context to include automatically
-        """
-        self._add_message_to_history('user', user_message)
-        
-        # Build the full conversation context
-        conversation_context = self._build_conversation_context(
-            user_message if is_initial else None,
-            code_context=code_context
-        )
-        
-        # Get model parameters from environment
-        max_tokens = int(os.getenv('MODEL_MAX_TOKENS', 400))
-        temperature = float(os.getenv('MODEL_TEMPERATURE', 0.7))
-        top_p = float(os.getenv('MODEL_TOP_P', 0.9))
-        
-        # Generate response with error handling
-        try:
-            print(f"Generating response (context: ~{len(conversation_context)//4} tokens)...")
-            response = self.llm(
-                conversation_context,
-                max_tokens=max_tokens,
-                temperature=temperature,
-                top_p=top_p,
-                echo=False,
-                stop=["Student:", "User:", "Alex:", "\n\nAlex:", "\nAlex:"]
-            )
-            print("Response generated successfully!")
-        except Exception as e:
-            print(f"ERROR during model generation: {str(e)}")
-            print(f"Context length was: {len(conversation_context)} chars (~{len(conversation_context)//4} tokens)")
-            print("Context may be too large or model encountered an error.")
-            # Return a safe fallback response
-            fallback = "I apologize, but I encountered a technical issue. Could you try rephrasing your question? If this persists, try using 'Clear Chat' to start fresh."
-            self._add_message_to_history('alex', fallback)
-            return fallback
-        
-        # Extract response text and clean it up
-        raw_response = response['choices'][0]['text'].strip()
-        
-        # Remove any leaked internal reasoning tags
-        if '</thought>' in raw_response:
-            raw_response = raw_response.split('</thought>', 1)[1].strip()
-        raw_response = re.sub(r'</?thought>', '', raw_response)
-        raw_response = re.sub(r'</?response>', '', raw_response)
-        
-        # Aggressively stop at any role markers that leaked through
-        role_markers = ['Alex:', 'Student:', 'User:']
-        for marker in role_markers:
-            if marker in raw_response:
-                raw_response = raw_response.split(marker)[0].strip()
-                break
-
-        response = self._clean_response(raw_response)
-        
-        # Add response to history
-        self._add_message_to_history('alex', response)
-        
-        return response
-    
-    def chat_stream(self, user_message, is_initial=False, code_context=None):
-        """Stream the assistant's response token-by-token."""
-        self._add_message_to_history('user', user_message)
-        
-        conversation_context = self._build_conversation_context(
-            user_message if is_initial else None,
-            code_context=code_context
-        )
-        
-        max_tokens = int(os.getenv('MODEL_MAX_TOKENS', 400))
-        temperature = float(os.getenv('MODEL_TEMPERATURE', 0.7))
-        top_p = float(os.getenv('MODEL_TOP_P', 0.9))
-        
-        accumulated_chunks = []
-        try:
-            print(f"Streaming response (context: ~{len(conversation_context)//4} tokens)...")
-            stream = self.llm(
-                conversation_context,
-                max_tokens=max_tokens,
-                temperature=temperature,
-                top_p=top_p,
-                echo=False,
-                stop=["Student:", "User:", "Alex:", "\n\nAlex:", "\nAlex:"],
-                stream=True
-            )
-            for chunk in stream:
-                token = chunk['choices'][0].get('text', '')
-                if not token:
-                    continue
-                accumulated_chunks.append(token)
-                yield {'type': 'token', 'token': token}
-        except Exception as e:
-            print(f"ERROR during streaming generation: {str(e)}")
-            print(f"Context length was: {len(conversation_context)} chars (~{len(conversation_context)//4} tokens)")
-            fallback = "I apologize, but I encountered a technical issue. Could you try rephrasing your question? If this persists, try using 'Clear Chat' to start fresh."
-            self._add_message_to_history('alex', fallback)
-            yield {'type': 'error', 'error': fallback}
-            return
-        
-        raw_response = ''.join(accumulated_chunks).strip()
-        if '</thought>' in raw_response:
-            raw_response = raw_response.split('</thought>', 1)[1].strip()
-        raw_response = re.sub(r'</?thought>', '', raw_response)
-        raw_response = re.sub(r'</?response>', '', raw_response)
-        
-        role_markers = ['Alex:', 'Student:', 'User:']
-        for marker in role_markers:
-            if marker in raw_response:
-                raw_response = raw_response.split(marker)[0].strip()
-                break
-        
-        response = self._clean_response(raw_response)
-        self._add_message_to_history('alex', response)
-        
-        yield {'type': 'final', 'message': response}
-    
-    def _clean_response(self, response):
-        """Clean up the response while preserving code blocks and line breaks.
-
-        Important: Do NOT strip parentheses or collapse whitespace globally,
-        as that destroys code formatting. Only clean non-code text segments.
-        """
-        # Split out fenced code blocks so we don't touch them
-        code_pattern = re.compile(r"```[\s\S]*?```", re.MULTILINE)
-        code_blocks = code_pattern.findall(response)
-        parts = code_pattern.split(response)
-
-        cleaned_parts = []
-        for part in parts:
-            text = part
-            # Remove light-weight stage directions in asterisks or brackets (non-greedy, single-line)
-            text = re.sub(r"\*[^^\n*]{0,80}\*", "", text)
-            text = re.sub(r"\[[^\]\n]{0,80}\]", "", text)
-            # Remove common meta phrases
-            text = re.sub(r"\b(let me think|thinking|pondering|considering)\b", "", text, flags=re.IGNORECASE)
-            # Remove duplicated role prefixes at start of lines
-            text = re.sub(r"(^|\n)\s*Alex:\s*", r"\1", text)
-            # Normalize excessive blank lines but keep line structure
-            text = re.sub(r"\n{3,}", "\n\n", text)
-            # Trim trailing spaces per line
-            lines = [ln.rstrip() for ln in text.splitlines()]
-            text = "\n".join(lines)
-            cleaned_parts.append(text)
-
-        # Reassemble, interleaving preserved code blocks
-        rebuilt = []
-        for i, part in enumerate(cleaned_parts):
-            rebuilt.append(part)
-            if i < len(code_blocks):
-                rebuilt.append(code_blocks[i])
-
-        cleaned = "".join(rebuilt).strip()
-        # Final minor cleanup: remove a trailing colon at end of entire message only
-        cleaned = re.sub(r":\s*$", "", cleaned)
-        return cleaned
-    
-    
-    def _build_conversation_context(self, initial_prompt=None, code_context=None):
-        """Build the full conversation context for the model
-        
-        Args:
-            initial_prompt: Optional initial prompt to use
-            code_context: Optional code context to include
-        """
-        if initial_prompt:
-            return initial_prompt
-        
-        '''
-        Here's where we'll let the llm know of what it should and shouldn't do. Finetuning would be good for getting it to sound more human, 
-        but I'm too lazy to create a dataset of conversations for that.
-        '''
-        context_parts = []
-        
-        # Core Role and Instructions
-        context_parts.append("You are Alex, an expert coding tutor specializing in LeetCode problems.")
-        context_parts.append("The user is the student.")
-        context_parts.append("Your goal is to guide the user to a solution, providing hints and asking questions to foster discovery, but provide the solution with explanation and Python code if they explicitly give up or request it.")
-        
-        # LeetCode-Specific Guidance
-        context_parts.append("For LeetCode problems, summarize key constraints (e.g., input size, edge cases) and guide the student to consider time and space complexity.")
-        context_parts.append("Encourage exploration of algorithmic patterns (e.g., two-pointer, dynamic programming, greedy) when relevant.")
-        context_parts.append("If the student submits code, analyze it for correctness, efficiency, and edge cases. Provide specific feedback and suggest improvements without rewriting unless requested.")
-        
-        # Communication Style
-        context_parts.append("COMMUNICATION STYLE:")
-        context_parts.append("- Be direct, honest, and natural. If you don't understand something, ask for clarification.")
-        context_parts.append("- Maintain an encouraging tone, especially when the student is frustrated, and celebrate small wins.")
-        context_parts.append("- Keep responses concise and focused. Ask ONE clear question at a time, NOT multiple questions.")
-        context_parts.append("- Avoid repeating the same question or concept multiple times in one response.")
-        
-        # Tutoring Approach
-        context_parts.append("TUTORING APPROACH:")
-        context_parts.append("- Ask questions to guide student discovery.")
-        context_parts.append("- Let students work through problems themselves, providing hints only when stuck.")
-        context_parts.append("- If the student says they cannot complete the problem or gives up, switch to concrete examples or simpler analogies.")
-        context_parts.append("- Stay focused on the current problem. If the student asks about off-topic subjects, briefly acknowledge but guide them back to the current problem.")
-        context_parts.append("- If the student wants to work on a different problem, suggest they use the 'Browse Problems' button to find and select it.")
-        
-        # Staying On Topic
-        context_parts.append("STAYING FOCUSED:")
-        context_parts.append("- Your primary role is to help with the current LeetCode problem.")
-        context_parts.append("- For brief off-topic questions (like simple coding concepts), give a concise answer then redirect to the current problem.")
-        context_parts.append("- If asked about other problems, say something like 'You can use the Browse Problems button to search for that specific problem if you'd like to work on it instead.'")
-        context_parts.append("- Keep the conversation centered on solving the problem at hand.")
-        
-        # Platform Integration
-        context_parts.append("PLATFORM FEATURES:")
-        context_parts.append("- Format code in clear Python code blocks for display in the website's code editor.")
-        context_parts.append("- Suggest test cases the student can run to verify their solution.")
-        context_parts.append("- The student can use 'Browse Problems' button to search for and select different problems.")
-        context_parts.append("- When relevant, suggest external resources (e.g., LeetCode problem URL, Python documentation).")
-        
-        # Never Do
-        context_parts.append("NEVER DO:")
-        context_parts.append("- Overuse conceptual questions when the student needs concrete examples.")
-        context_parts.append("- Refuse to help when the student explicitly gives up.")
-        context_parts.append("- Get sidetracked into long discussions unrelated to the current problem.")
-        context_parts.append("- Try to solve different problems that the student mentions - direct them to use the problem browser instead.")
-        
-        # Add code context if provided
-        if code_context and code_context.get('code', '').strip():
-            context_parts.append("")
-            context_parts.append("STUDENT'S CURRENT CODE:")
-            context_parts.append("```python")
-            context_parts.append(code_context['code'])
-            context_parts.append("```")
-            context_parts.append("Note: The student has this code in their editor. Consider it when providing guidance.")
-            context_parts.append("")
-        
-        # Problem and User Context
-        if self.current_problem:
-            context_parts.append(f"CURRENT PROBLEM: {self.current_problem['title']}")
-            context_parts.append(f"Difficulty: {self.current_problem.get('difficulty', 'Not specified')}")
-            context_parts.append("Focus all tutoring efforts on helping the student solve THIS specific problem.")
-            context_parts.append("")
-        else:
-            context_parts.append("No problem is currently loaded. Encourage the student to use the 'Browse Problems' button to select a problem to work on.")
-            context_parts.append("")
-
-        # CRITICAL: Limit conversation history to prevent context overflow
-        # Estimate: System prompt ~1000 tokens, each message ~100-200 tokens
-        # With 4096 context and 400 max_tokens output, we need ~3600 tokens max for input
-        # Keep only last 5 messages (10 turns) to be safe - roughly 1000-2000 tokens
-        history_limit = 5
-        recent_history = self.conversation_history[-history_limit:] if len(self.conversation_history) > history_limit else self.conversation_history
-
-        for msg in recent_history:
-            if msg['role'] == 'user':
-                context_parts.append(f"Student: {msg['content']}")
-            elif msg['role'] == 'alex':
-                context_parts.append(f"Alex: {msg['content']}")
-        context_parts.append("")
-        context_parts.append("Alex:")
-        
-        context = "\n".join(context_parts)
-        
-        # Safety check: Rough token estimate (4 chars ≈ 1 token)
-        estimated_tokens = len(context) // 4
-        max_input_tokens = 3500  # Leave room for output (4096 - 400 - buffer)
-        
-        if estimated_tokens > max_input_tokens:
-            print(f"WARNING: Context too large (~{estimated_tokens} tokens). Reducing history...")
-            # Reduce to last 3 messages only
-            history_limit = 3
-            context_parts = context_parts[:context_parts.index("")+1]  # Keep system prompt
-            recent_history = self.conversation_history[-history_limit:]
-            for msg in recent_history:
-                if msg['role'] == 'user':
-                    context_parts.append(f"Student: {msg['content']}")
-                elif msg['role'] == 'alex':
-                    context_parts.append(f"Alex: {msg['content']}")
-            context_parts.append("")
-            context_parts.append("Alex:")
-            context = "\n".join(context_parts)
-        
-        return context
-    
-    def clear_chat(self):
-        """Clear the current conversation history"""
-        self.conversation_history = []
-        problem_id = self.current_problem.get('id') if self.current_problem else None
-        self.db.clear_conversation_history(problem_id)
-        print("Chat cleared!")
-
-    def evaluate_code(self, code, language="python"):
-        """Evaluate user's code attempt"""
-        if not self.current_problem:
-            return "No problem is currently loaded."
-        
-        eval_prompt = f"""The student submitted the following {language} code for the problem "{self.current_problem['title']}":
-            ```{language}
-            {code}
-            ```
-
-            As Alex, their coding assistant, analyze this code for correctness and relevance to the problem.
-            - If the code is just a default template or boilerplate (e.g., `def solution(): pass`), gently encourage the user to start writing their actual solution.
-            - If the code is valid but doesn't logically contribute to solving the problem (e.g., printing a random string, performing unrelated calculations), gently point this out and guide the user back to the problem's requirements.
-            - If the code is incorrect or doesn't solve the problem, guide them toward a better solution.
-            - If the code is a good start, encourage them and ask what the next step is.
-            - Use the Socratic method to guide, don't just give the answer.
-            - Be encouraging and focus on helping them learn."""
-        
-        # Use internal chat method that doesn't show the prompt to user
-        return self._chat_internal(eval_prompt)
-    
-    def _chat_internal(self, prompt):
-        """Internal chat method that doesn't add the prompt to conversation history"""
-        # Build the full conversation context
-        conversation_context = self._build_conversation_context()
-        
-        # Add the evaluation prompt to the context
-        full_context = conversation_context + "\n\n" + prompt + "\n\nAlex:"
-        
-        # Generate response with error handling
-        try:
-            response = self.llm(
-                full_context,
-                max_tokens=800,
-                temperature=0.7,
-                top_p=0.9,
-                echo=False,
-                stop=["Student:", "User:", "Alex:", "\n\nAlex:"]
-            )
-        except Exception as e:
-            print(f"ERROR during code evaluation: {str(e)}")
-            fallback = "I encountered a technical issue while evaluating your code. Could you try submitting it again? If this persists, try 'Clear Chat'."
-            self._add_message_to_history('alex', fallback)
-            return fallback
-        
-        # Extract and clean response
-        raw_response = response['choices'][0]['text'].strip()
-        
-        # Remove any leaked internal reasoning tags
-        if '</thought>' in raw_response:
-            raw_response = raw_response.split('</thought>', 1)[1].strip()
-        raw_response = re.sub(r'</?thought>', '', raw_response)
-        raw_response = re.sub(r'</?response>', '', raw_response)
-        
-        # Remove any duplicate "Alex:" prefixes
-        raw_response = re.sub(r'^Alex:\s*', '', raw_response)
-        
-        # Split by "Alex:" and take only the first response
-        if 'Alex:' in raw_response:
-            raw_response = raw_response.split('Alex:')[0].strip()
-
-        response = self._clean_response(raw_response)
-        
-        # Add only the response to history
-        self._add_message_to_history('alex', response)
-        
-        return response
-    
-    def extract_function_signature(self, python_solution):
-        """Extract function signature from the complete solution"""
-        try:
-            lines = python_solution.strip().split('\n')
-            
-            for line in lines:
-                line = line.strip()
-                # Look for function definition
-                if line.startswith('def ') and ':' in line:
-                    # Extract the function signature
-                    if line.endswith(':'):
-                        return line + '\n    pass'
-                    else:
-                        # Handle multi-line function definitions
-                        func_def = line
-                        # You might need to handle cases where the signature spans multiple lines
-                        return func_def + ':\n    pass'
-                        
-                # Also look for class-based solutions
-                elif line.startswith('class Solution:'):
-                    # Look for the method definition in the next few lines
-                    line_idx = lines.index(line)
-                    for i, next_line in enumerate(lines[line_idx:line_idx+10]):
-                        if next_line.strip().startswith('def ') and ':' in next_line:
-                            method_line = next_line.strip()
-                            if method_line.endswith(':'):
-                                return f"class Solution:\n    {method_line}\n        pass"
-                            else:
-                                return f"class Solution:\n    {method_line}:\n        pass"
-            
-            # Fallback if no function found
-            return "def solution():\n    pass"
-            
-        except Exception as e:
-            print(f"Error extracting function signature: {e}")
-            return "def solution():\n    pass"
-
 # Initialize Flask app
 app = Flask(__name__)
 sock = Sock(app)
@@ -533,28 +35,119 @@ CORS(app, origins=allowed_origins)
 print("Initializing database...")
 db_path = os.getenv('DATABASE_PATH', 'data/zerotohire.db')
 db = Database(db_path)
-print(f"Database initialized at {db_path}")
+print(f"Database initialized at {db_path}" + (f" ({db.shard_count} shards)" if db.shard_count > 1 else ""))
+
+# Cleared chats, reset problems and deleted accounts are purged in the background
+purger = TombstonePurger(db.open_worker())
+purger.start()
 
 # Initialize the assistant (this will take a moment)
 print("Initializing AI Assistant...")
 
 # Get model configuration from environment
-model_repo = os.getenv('HUGGINGFACE_MODEL_REPO', 'Qwen/Qwen2.5-Coder-14B-Instruct-GGUF')
-model_filename = os.getenv('HUGGINGFACE_MODEL_FILENAME', 'qwen2.5-coder-14b-instruct-q4_k_m.gguf')
+inference_backend = os.getenv('INFERENCE_BACKEND', 'llama_cpp').lower()
+model_path = None
+small_model_path = None
 
-model_path = hf_hub_download(repo_id=model_repo, filename=model_filename)
-tutor = CodingTutor(model_path, db)
+# Only the in-process backend needs the GGUF weights locally
+if inference_backend == 'llama_cpp':
+    model_path, small_model_path = resolve_model_paths()
 
-# Load your enhanced LeetCode dataset from Hugging Face
-print("Loading LeetCode dataset from Hugging Face...")
+tutor = CodingTutor(model_path, db, small_model_path=small_model_path, backend=inference_backend)
+
+# Load your enhanced LeetCode dataset (local snapshot if present, else Hugging Face)
 dataset_name = os.getenv('LEETCODE_DATASET', 'viccon23/leetcode')
-dataset = load_dataset(dataset_name)
+dataset = load_problems(dataset_name, os.getenv('LEETCODE_SNAPSHOT', DEFAULT_SNAPSHOT_PATH))
 
 print("Loaded, lets roll.")
 print(f"Dataset contains {len(dataset['train'])} problems")
 
+# Search index and filter options, built once
+catalog = ProblemCatalog(dataset['train'])
+recommender = Recommender(catalog)
+
+# Per-user and per-endpoint limits in front of the model queue
+admission = AdmissionController(tutor.router)
+
+# Chat turns and streamed reviews, shared with the WebSocket gateway (ws_gateway.py)
+chat_frames = ChatFrames(admission, dataset['train'], recommender)
+
+# Hint ladders, filled in while the model is idle on a connection of their own
+tutor.hint_ladders = HintLadders(tutor, db, dataset['train'], worker_db=db.open_worker())
+if HINT_PRECOMPUTE_ENABLED:
+    tutor.hint_ladders.start()
+
+# Statistics, vacuum, WAL checkpoints and backups, run while the model is idle
+maintenance = MaintenanceScheduler(db.open_worker(), lambda: tutor.router.idle_for() >= MAINTENANCE_IDLE_SECONDS)
+if MAINTENANCE_ENABLED:
+    maintenance.start()
+
 print("Backend ready!")
 
+
+@app.before_request
+def start_request_metrics():
+    """Track in-flight requests and start the latency timer."""
+    g.metrics_route = request.url_rule.rule if request.url_rule else 'unmatched'
+    g.metrics_start = time.perf_counter()
+    HTTP_IN_FLIGHT.labels(route=g.metrics_route).inc()
+    g.trace = tracing.begin_trace(
+        f"{request.method} {g.metrics_route}",
+        request_id=request.headers.get('X-Request-ID'),
+        method=request.method,
+        route=g.metrics_route
+    )
+
+
+@app.after_request
+def record_response_status(response):
+    g.metrics_status = response.status_code
+    response.headers['X-Request-ID'] = tracing.current_request_id() or ''
+    if g.get('trace') and g.trace[0] is not None:
+        g.trace[0].set_attribute('status', response.status_code)
+    return response
+
+
+@app.teardown_request
+def finish_request_metrics(exc=None):
+    """Record request latency, including requests that raised."""
+    if 'metrics_start' not in g:
+        return
+    tracing.end_trace(g.trace, exc)
+    HTTP_IN_FLIGHT.labels(route=g.metrics_route).dec()
+    HTTP_REQUEST_SECONDS.labels(
+        method=request.method,
+        route=g.metrics_route,
+        status=g.get('metrics_status', 500)
+    ).observe(time.perf_counter() - g.metrics_start)
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Expose metrics in the Prometheus text format"""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+def client_address():
+    """Address of the client making the current request (see TRUSTED_PROXIES)."""
+    return admission_client_address(request.remote_addr, request.headers.get('X-Forwarded-For'))
+
+
+def client_key(current_user=None):
+    """Who a request counts against for rate limiting: the user, or the address of an anonymous client."""
+    return chat_client_key(current_user, client_address())
+
+
+def rejected_response(rejection: AdmissionRejected):
+    """429 with a Retry-After header for a request the admission controller refused."""
+    response = jsonify({'error': rejection.message, 'retry_after': rejection.retry_after})
+    return response, 429, {'Retry-After': str(rejection.retry_after)}
+
+
+def route_intent(message):
+    """Answer a chat message without the model if the intent router recognizes it."""
+    return chat_frames.route_intent(tutor, message)
+
+
 @app.route('/api/chat', methods=['POST'])
 @optional_token
 def chat(current_user=None):
@@ -577,42 +170,21 @@ def chat(current_user=None):
         # Get optional code context
         code_context = data.get('codeContext')  # {'code': '...', 'includeInContext': true}
 
-        # Handle simple slash commands without invoking the LLM
-        lower = message.lower()
-        if lower.startswith('/done') or lower.startswith('/complete') or lower == 'mark as complete':
-            if tutor.current_problem is None:
-                # No current problem to complete
-                sys_msg = {
-                    'role': 'system',
-                    'content': 'No problem is currently loaded to mark as complete.',
-                    'timestamp': datetime.now().isoformat()
-                }
-                tutor.conversation_history.append(sys_msg)
-                tutor.save_session()
-                return jsonify({
-                    'response': sys_msg['content'],
-                    'conversation_history': tutor.conversation_history,
-                    'current_problem': tutor.current_problem,
-                    'problem_changed': False
-                })
-
-            pid = tutor.current_problem.get('id')
-            if pid is not None:
-                tutor.mark_problem_completed(pid)
-            sys_msg = {
-                'role': 'system',
-                'content': f"Problem '{tutor.current_problem.get('title','')}' marked as completed.",
-                'timestamp': datetime.now().isoformat()
-            }
-            tutor.conversation_history.append(sys_msg)
-            tutor.save_session()
+        # Commands, acknowledgements and navigation are answered without the model
+        intent = route_intent(message)
+        if intent is not None:
             return jsonify({
-                'response': sys_msg['content'],
+                'response': intent.reply,
                 'conversation_history': tutor.conversation_history,
                 'current_problem': tutor.current_problem,
                 'problem_changed': False
             })
         
+        try:
+            admission.admit(client_key(current_user), INTERACTIVE)
+        except AdmissionRejected as e:
+            return rejected_response(e)
+        
         # Pass code context if provided and enabled
         context = None
         if code_context and code_context.get('includeInContext', False):
@@ -634,9 +206,26 @@ def chat(current_user=None):
         return jsonify({'error': 'An error occurred processing your message. Please try again.'}), 500
 
 
+def current_problem_record():
+    """The dataset row for the tutor's current problem, which carries the reference solution."""
+    return chat_frames.current_problem_record(tutor)
+
+
 @sock.route('/ws/chat')
 def chat_socket(ws):
-    """WebSocket endpoint for streaming chatbot responses."""
+    """WebSocket endpoint for streaming chatbot responses.
+    
+    Signed-in clients pass their access token as ?token= (browsers can't set
+    headers on WebSockets) or in a payload's 'token' field. Each connection
+    gets its own tutor session.
+    """
+    token = request.args.get('token')
+    current_user = socket_user(token)
+    if token and current_user is None:
+        ws.send(json.dumps({'type': 'error', 'error': 'Invalid or expired token'}))
+        return
+    connection = SocketSession(tutor, current_user, client_address())
+    
     while True:
         try:
             payload_raw = ws.receive()
@@ -653,49 +242,12 @@ def chat_socket(ws):
             ws.send(json.dumps({'type': 'error', 'error': 'Invalid JSON payload'}))
             continue
 
-        message = payload.get('message', '').strip()
-        if not message:
-            ws.send(json.dumps({'type': 'error', 'error': 'No message provided'}))
-            continue
-
-        code_context_payload = payload.get('codeContext')
-        context = None
-        if code_context_payload and code_context_payload.get('includeInContext'):
-            context = code_context_payload
-
-        lower = message.lower()
-        if lower.startswith('/done') or lower.startswith('/complete') or lower == 'mark as complete':
-            if tutor.current_problem is None:
-                response_text = 'No problem is currently loaded to mark as complete.'
-            else:
-                pid = tutor.current_problem.get('id')
-                if pid is not None:
-                    tutor.mark_problem_completed(pid)
-                response_text = f"Problem '{tutor.current_problem.get('title','')}' marked as completed."
-
-            ws.send(json.dumps({
-                'type': 'final',
-                'message': response_text,
-                'conversation_history': tutor.conversation_history,
-                'current_problem': tutor.current_problem,
-                'problem_changed': False
-            }))
-            continue
-
-        for event in tutor.chat_stream(message, code_context=context):
-            if event['type'] == 'token':
-                ws.send(json.dumps({'type': 'token', 'token': event['token']}))
-            elif event['type'] == 'error':
-                ws.send(json.dumps({'type': 'error', 'error': event['error']}))
-                break
-            elif event['type'] == 'final':
-                ws.send(json.dumps({
-                    'type': 'final',
-                    'message': event['message'],
-                    'conversation_history': tutor.conversation_history,
-                    'current_problem': tutor.current_problem,
-                    'problem_changed': False
-                }))
+        # Each message is traced on its own rather than as part of the long-lived connection
+        with tracing.start_trace('WS /ws/chat message', request_id=payload.get('requestId')):
+            error = connection.begin_turn(payload)
+            frames = [error] if error else chat_frames.chat(connection.session, payload, connection.client)
+            for frame in frames:
+                ws.send(json.dumps(frame))
 
 
 @app.route('/api/problems', methods=['GET'])
@@ -709,45 +261,22 @@ def get_problems(current_user=None):
         # Get query parameters for filtering
         difficulty_filters = request.args.getlist('difficulty')  # Can have multiple
         type_filters = request.args.getlist('type')              # Can have multiple
-        search_query = request.args.get('search', '').lower()    # Search in title
+        search_query = request.args.get('search', '')            # Full-text search over title and description
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 20))
         
-        problems = []
-        for i, prob in enumerate(dataset["train"]):
-            # Apply filters
-            if difficulty_filters and prob.get('difficulty') not in difficulty_filters:
-                continue
-                
-            # Check if ALL of the selected types are present in the problem's types (AND logic)
-            if type_filters:
-                problem_types_str = prob.get('problem_types', '')
-                # Check that every selected type is present in the problem's types
-                if not all(ptype in problem_types_str for ptype in type_filters):
-                    continue
-                
-            if search_query and search_query not in prob['title'].lower():
-                continue
-            
-            # Process problem types into an array
-            problem_types_str = prob.get('problem_types', '')
-            problem_types_array = []
-            if problem_types_str:
-                problem_types_array = [ptype.strip() for ptype in problem_types_str.split(',') if ptype.strip()]
-            
-            problems.append({
-                'id': i,
-                'title': prob['title'],
-                'difficulty': prob.get('difficulty', 'Unknown'),
-                'problem_types': problem_types_array,
-                'completed': tutor.is_problem_completed(i)
-            })
+        page_problems, total_problems = catalog.search(
+            search_query,
+            difficulties=difficulty_filters,
+            types=type_filters,
+            page=page,
+            per_page=per_page
+        )
         
-        # Apply pagination
-        total_problems = len(problems)
-        start_index = (page - 1) * per_page
-        end_index = start_index + per_page
-        paginated_problems = problems[start_index:end_index]
+        # One query for the user's completions instead of one per problem
+        completed_ids = set(db.get_completed_problems(user_id=user_id))
+        paginated_problems = [dict(summary, completed=summary['id'] in completed_ids) for summary in page_problems]
+        end_index = max(1, page) * per_page
         
         return jsonify({
             'problems': paginated_problems,
@@ -760,6 +289,24 @@ def get_problems(current_user=None):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/problems/autocomplete', methods=['GET'])
+def autocomplete_problems():
+    """Typo-tolerant title suggestions for as-you-type search"""
+    try:
+        query = request.args.get('q', '')
+        limit = min(int(request.args.get('limit', 8)), 20)
+        
+        response = jsonify({
+            'query': query,
+            'suggestions': catalog.autocomplete(query, limit)
+        })
+        # Suggestions depend only on the query and the catalog, so clients can cache them by prefix
+        response.headers['Cache-Control'] = 'public, max-age=3600'
+        return response
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/problems/<int:problem_id>', methods=['POST'])
 @optional_token
 def select_problem(problem_id, current_user=None):
@@ -823,6 +370,7 @@ def toggle_problem_completion(problem_id, current_user=None):
             tutor.mark_problem_completed(problem_id)
         else:
             tutor.mark_problem_uncompleted(problem_id)
+        recommender.invalidate(user_id)
         
         return jsonify({
             'problem_id': problem_id,
@@ -834,37 +382,41 @@ def toggle_problem_completion(problem_id, current_user=None):
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/recommendations', methods=['GET'])
+@optional_token
+def get_recommendations(current_user=None):
+    """Suggest the next problems to solve based on the user's completed problems"""
+    try:
+        user_id = current_user['user_id'] if current_user else None
+        limit = min(int(request.args.get('limit', 5)), 50)
+        
+        recommendations = recommender.recommend(
+            user_id,
+            lambda: db.get_completed_problems(user_id=user_id),
+            limit=limit
+        )
+        
+        return jsonify({'recommendations': recommendations})
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/api/filters', methods=['GET'])
 def get_filters():
     """Get available filter options"""
     try:
-        # Get unique difficulties
-        difficulties = set()
-        problem_types = set()
-        
-        for prob in dataset["train"]:
-            difficulty = prob.get('difficulty')
-            if difficulty:
-                difficulties.add(difficulty)
-            
-            types = prob.get('problem_types', '')
-            if types:
-                # Split problem types and clean them
-                for ptype in types.split(','):
-                    cleaned_type = ptype.strip()
-                    if cleaned_type:
-                        problem_types.add(cleaned_type)
-        
         return jsonify({
-            'difficulties': sorted(list(difficulties)),
-            'problem_types': sorted(list(problem_types))
+            'difficulties': catalog.difficulties,
+            'problem_types': catalog.problem_types
         })
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/evaluate-code', methods=['POST'])
-def evaluate_code():
+@optional_token
+def evaluate_code(current_user=None):
     """Evaluate user's code submission"""
     try:
         data = request.json
@@ -874,7 +426,21 @@ def evaluate_code():
         if not code.strip():
             return jsonify({'error': 'No code provided'}), 400
         
-        response = tutor.evaluate_code(code, language)
+        # Set user context if authenticated
+        user_id = current_user['user_id'] if current_user else None
+        tutor.set_user_context(user_id)
+        
+        if not tutor.current_problem:
+            return jsonify({'response': "No problem is currently loaded.", 'conversation_history': tutor.conversation_history})
+        
+        # Triage and the sandbox answer many submissions outright; only a model review uses the review budget
+        response, eval_prompt, max_tokens = tutor.prepare_evaluation(code, language, current_problem_record())
+        if response is None:
+            try:
+                admission.admit(client_key(current_user), REVIEW)
+            except AdmissionRejected as e:
+                return rejected_response(e)
+            response = tutor.review(eval_prompt, max_tokens)
         
         return jsonify({
             'response': response,
@@ -920,6 +486,7 @@ def reset_problem(current_user=None):
             return jsonify({'error': 'Problem ID is required'}), 400
         
         db.reset_problem(problem_id, user_id=user_id)
+        recommender.invalidate(user_id)
         
         # If this is the current problem, clear the in-memory conversation history too
         if tutor.current_problem and tutor.current_problem.get('id') == problem_id:
@@ -1347,7 +914,7 @@ def delete_account(current_user):
         if not AuthManager.verify_password(password, user['password_hash']):
             return jsonify({'error': 'Invalid password'}), 401
         
-        # Delete user (cascades to all related data)
+        # Deactivate the account now; its data is purged in the background
         db.delete_user(current_user['user_id'])
         
         return jsonify({
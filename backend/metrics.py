@@ -0,0 +1,366 @@
+"""
+In-process metrics for ZeroToHire.
+Counters, gauges and histograms rendered in the Prometheus text exposition format at /metrics.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+TOKEN_BUCKETS = (32, 64, 128, 256, 512, 1024, 2048, 3072, 4096, 8192)
+RATE_BUCKETS = (1, 2, 5, 10, 15, 20, 30, 50, 75, 100, 200)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    """Base class: a named metric family with optional labels.
+
+    Children (one per label combination) are created once and cached, so hot
+    paths should resolve them up front with labels() and keep the child.
+    """
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def labels(self, **labels):
+        """Get the child metric for a label combination."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        if self.labelnames:
+            raise ValueError(f"Metric {self.name} requires labels {self.labelnames}")
+        return self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for key, child in sorted(self._children.items()):
+            lines.extend(child.render(self.name, self.labelnames, key))
+        return lines
+
+
+class _ValueChild:
+    __slots__ = ('_value', '_lock')
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1):
+        with self._lock:
+            self._value -= amount
+
+    def set(self, value: float):
+        self._value = value
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def render(self, name, labelnames, key):
+        return [f'{name}{_format_labels(labelnames, key)} {_format_value(self._value)}']
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+    kind = 'counter'
+
+    def _new_child(self):
+        return _ValueChild()
+
+    def inc(self, amount: float = 1):
+        self._default().inc(amount)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+    kind = 'gauge'
+
+    def _new_child(self):
+        return _ValueChild()
+
+    def inc(self, amount: float = 1):
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1):
+        self._default().dec(amount)
+
+    def set(self, value: float):
+        self._default().set(value)
+
+
+class _HistogramChild:
+    __slots__ = ('_upper_bounds', '_counts', '_sum', '_lock')
+
+    def __init__(self, buckets):
+        self._upper_bounds = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self._upper_bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    @property
+    def count(self) -> int:
+        return sum(self._counts)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate quantile from the bucket counts (upper bound of the matching bucket)."""
+        with self._lock:
+            counts = list(self._counts)
+        total = sum(counts)
+        if total == 0:
+            return None
+        rank = q * total
+        cumulative = 0
+        for bound, count in zip(self._upper_bounds + (float('inf'),), counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return float('inf')
+
+    def render(self, name, labelnames, key):
+        with self._lock:
+            counts = list(self._counts)
+            total_sum = self._sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self._upper_bounds + (float('inf'),), counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{_format_labels(labelnames, key, ("le", _format_value(bound)))} {cumulative}')
+        lines.append(f'{name}_sum{_format_labels(labelnames, key)} {_format_value(total_sum)}')
+        lines.append(f'{name}_count{_format_labels(labelnames, key)} {cumulative}')
+        return lines
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets."""
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+
+class Registry:
+    """Collection of metric families rendered together."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric):
+        with self._lock:
+            self._metrics.append(metric)
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+# ==================== Application Metrics ====================
+
+# HTTP
+HTTP_REQUEST_SECONDS = Histogram(
+    'zerotohire_http_request_duration_seconds', 'HTTP request latency by route.',
+    ['method', 'route', 'status']
+)
+HTTP_IN_FLIGHT = Gauge(
+    'zerotohire_http_requests_in_flight', 'HTTP requests currently being served by route.',
+    ['route']
+)
+
+# Inference
+INFERENCE_QUEUE_DEPTH = Gauge(
+    'zerotohire_inference_queue_depth', 'Requests waiting for a model.',
+    ['tier']
+)
+INFERENCE_IN_FLIGHT = Gauge(
+    'zerotohire_inference_in_flight', 'Generations currently running on a model.',
+    ['tier']
+)
+INFERENCE_TTFT_SECONDS = Histogram(
+    'zerotohire_inference_time_to_first_token_seconds', 'Time from model acquisition to the first streamed token.',
+    ['tier', 'request_type']
+)
+INFERENCE_DURATION_SECONDS = Histogram(
+    'zerotohire_inference_duration_seconds', 'Total generation time.',
+    ['tier', 'request_type']
+)
+INFERENCE_DECODE_TPS = Histogram(
+    'zerotohire_inference_decode_tokens_per_second', 'Decode throughput per generation.',
+    ['tier', 'request_type'], buckets=RATE_BUCKETS
+)
+INFERENCE_PROMPT_TOKENS = Histogram(
+    'zerotohire_inference_prompt_tokens', 'Prompt size in tokens (estimated for streamed requests).',
+    ['request_type'], buckets=TOKEN_BUCKETS
+)
+INFERENCE_COMPLETION_TOKENS = Histogram(
+    'zerotohire_inference_completion_tokens', 'Generated tokens per request.',
+    ['request_type'], buckets=TOKEN_BUCKETS
+)
+PROMPT_PREFILLS_TOTAL = Counter(
+    'zerotohire_prompt_prefills_total', 'Speculative prompt prefills on problem selection.',
+    ['tier', 'outcome']
+)
+SLO_DEGRADATION_LEVEL = Gauge(
+    'zerotohire_slo_degradation_level', 'Current SLO controller level (0 = full budgets).'
+)
+SLO_DECISIONS_TOTAL = Counter(
+    'zerotohire_slo_decisions_total', 'SLO controller level changes.',
+    ['action', 'level']
+)
+SLO_P95_SECONDS = Gauge(
+    'zerotohire_slo_p95_seconds', 'p95 inference latency over the SLO controller window.'
+)
+SLO_MAX_TOKENS = Gauge(
+    'zerotohire_slo_max_tokens', 'max_tokens granted to the latest request of each type.',
+    ['request_type']
+)
+CONTEXT_OVERFLOW_TOTAL = Counter(
+    'zerotohire_context_overflow_fallbacks_total', 'Prompts that had to be trimmed or fell back to a canned reply.',
+    ['kind']
+)
+
+# Admission
+ADMISSION_REJECTIONS_TOTAL = Counter(
+    'zerotohire_admission_rejections_total', 'Model-bound requests refused with 429 before queuing.',
+    ['request_class', 'reason']
+)
+
+# Intents
+INTENT_MATCHES_TOTAL = Counter(
+    'zerotohire_intent_matches_total', 'Chat messages answered by the intent router instead of the model.',
+    ['intent']
+)
+
+# Code evaluation
+SANDBOX_RUN_SECONDS = Histogram(
+    'zerotohire_sandbox_run_seconds', 'Wall time of one sandboxed test run.'
+)
+CODE_EVALUATIONS_TOTAL = Counter(
+    'zerotohire_code_evaluations_total', 'Code submissions by how they were answered.',
+    ['path']
+)
+
+# Database
+DB_QUERY_SECONDS = Histogram(
+    'zerotohire_db_query_duration_seconds', 'Database method latency.',
+    ['method']
+)
+DB_QUERY_ERRORS = Counter(
+    'zerotohire_db_query_errors_total', 'Database method calls that raised.',
+    ['method']
+)
+PURGED_ROWS_TOTAL = Counter(
+    'zerotohire_db_purged_rows_total', 'Tombstoned rows deleted by the background purger.'
+)
+PENDING_TOMBSTONES = Gauge(
+    'zerotohire_db_pending_tombstones', 'Deletions waiting for the background purger.'
+)
+DB_MAINTENANCE_SECONDS = Histogram(
+    'zerotohire_db_maintenance_duration_seconds', 'Duration of scheduled database maintenance tasks.',
+    ['task']
+)
+DB_MAINTENANCE_RECLAIMED_BYTES = Counter(
+    'zerotohire_db_maintenance_reclaimed_bytes_total', 'Bytes returned to the filesystem by maintenance tasks.',
+    ['task']
+)
+DB_FILE_BYTES = Gauge(
+    'zerotohire_db_file_bytes', 'Size of the database file and its write-ahead log.',
+    ['file']
+)
+
+
+def instrument_methods(histogram: Histogram, errors: Counter, exclude: Sequence[str] = ()):
+    """Class decorator timing every public method into a histogram labelled by method name."""
+    def decorate(cls):
+        for name, attr in list(vars(cls).items()):
+            if name.startswith('_') or name in exclude or not callable(attr):
+                continue
+            setattr(cls, name, _timed_method(attr, histogram.labels(method=name), errors.labels(method=name)))
+        return cls
+    return decorate
+
+
+def _timed_method(func, histogram_child, error_child):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            error_child.inc()
+            raise
+        finally:
+            histogram_child.observe(time.perf_counter() - start)
+    return wrapper
@@ -0,0 +1,159 @@
+"""
+Model artifact management for ZeroToHire.
+Resolves GGUF files from a local path or a pinned Hub revision, verifies them against a cached checksum and warms the page cache.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Dict, Optional
+
+
+HASH_CHUNK_BYTES = 8 * 1024 * 1024
+_SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+_COMMIT_RE = re.compile(r'^[0-9a-f]{40}$')
+
+
+def is_offline() -> bool:
+    """MODEL_OFFLINE (or the Hub's own HF_HUB_OFFLINE) forbids any network access."""
+    return (os.getenv('MODEL_OFFLINE', 'False').lower() == 'true'
+            or os.getenv('HF_HUB_OFFLINE', '0').lower() in ('1', 'true'))
+
+
+# ==================== Resolution ====================
+
+def resolve_artifact(repo_id: str, filename: str, local_path: Optional[str] = None,
+                     revision: Optional[str] = None) -> str:
+    """Return a local path for a model file.
+
+    - An explicit local path is used as-is and never touches the network.
+    - Otherwise the file comes from the Hugging Face cache. A revision pinned to
+      a commit hash is immutable, so a cached copy is used without revalidating;
+      in offline mode only the cache is consulted.
+    """
+    if local_path:
+        if not os.path.isfile(local_path):
+            raise FileNotFoundError(f"Model file not found: {local_path}")
+        return local_path
+
+    from huggingface_hub import hf_hub_download
+
+    if is_offline() or (revision and _COMMIT_RE.match(revision)):
+        try:
+            return hf_hub_download(repo_id=repo_id, filename=filename, revision=revision, local_files_only=True)
+        except Exception as e:
+            if is_offline():
+                raise RuntimeError(
+                    f"{repo_id}/{filename} is not in the local cache and MODEL_OFFLINE is set. "
+                    f"Download it once online or point MODEL_PATH at the file: {e}"
+                )
+
+    return hf_hub_download(repo_id=repo_id, filename=filename, revision=revision)
+
+
+# ==================== Integrity ====================
+
+def _load_cache(cache_path: str) -> Dict:
+    try:
+        with open(cache_path, 'r') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _save_cache(cache_path: str, cache: Dict):
+    directory = os.path.dirname(cache_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = cache_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(cache, f, indent=2)
+    os.replace(tmp_path, cache_path)
+
+
+def sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def expected_checksum(path: str, expected_sha256: Optional[str] = None) -> Optional[str]:
+    """The checksum to verify against: an explicit one, or the Hub cache blob name (LFS blobs are named by SHA-256)."""
+    if expected_sha256:
+        return expected_sha256.lower()
+    blob_name = os.path.basename(os.path.realpath(path))
+    return blob_name if _SHA256_RE.match(blob_name) else None
+
+
+def verify_artifact(path: str, expected_sha256: Optional[str] = None) -> bool:
+    """Check a model file against its expected SHA-256.
+
+    The full hash only runs when the file's size or mtime differs from the last
+    verified run recorded in MODEL_INTEGRITY_CACHE; otherwise the cached result
+    is trusted. Returns False when there is nothing to verify against.
+    """
+    expected = expected_checksum(path, expected_sha256)
+    if expected is None:
+        return False
+
+    cache_path = os.getenv('MODEL_INTEGRITY_CACHE', 'data/model_integrity.json')
+    real_path = os.path.realpath(path)
+    stat = os.stat(real_path)
+    cache = _load_cache(cache_path)
+    entry = cache.get(real_path)
+
+    if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+        actual = entry['sha256']
+    else:
+        print(f"Verifying {os.path.basename(path)} ({stat.st_size / (1024 ** 3):.1f} GB)...")
+        actual = sha256_file(real_path)
+        cache[real_path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': actual}
+        _save_cache(cache_path, cache)
+
+    if actual != expected:
+        raise RuntimeError(f"Checksum mismatch for {path}: expected {expected}, got {actual}")
+    return True
+
+
+# ==================== Page cache warm-up ====================
+
+def _touch(path: str):
+    with open(path, 'rb', buffering=0) as f:
+        while f.read(HASH_CHUNK_BYTES):
+            pass
+
+
+def prefetch(path: str, mode: str = 'readahead') -> Optional[threading.Thread]:
+    """Pull a model file into the page cache so the first request doesn't fault it in.
+
+    readahead - ask the kernel to read the file asynchronously (posix_fadvise WILLNEED)
+    touch     - read the whole file on a background thread
+    none      - do nothing
+    """
+    if mode == 'readahead' and hasattr(os, 'posix_fadvise'):
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+        return None
+
+    if mode in ('touch', 'readahead'):
+        thread = threading.Thread(target=_touch, args=(path,), name='model-prefetch', daemon=True)
+        thread.start()
+        return thread
+    return None
+
+
+def prepare_model(repo_id: str, filename: str, local_path: Optional[str] = None, revision: Optional[str] = None,
+                  expected_sha256: Optional[str] = None) -> str:
+    """Resolve, verify and prefetch a model file. Returns its local path."""
+    path = resolve_artifact(repo_id, filename, local_path, revision)
+    if os.getenv('MODEL_VERIFY', 'True').lower() == 'true' and verify_artifact(path, expected_sha256):
+        print(f"Verified {os.path.basename(path)}")
+    prefetch(path, os.getenv('MODEL_PREFETCH', 'readahead').lower())
+    return path
@@ -0,0 +1,185 @@
+"""
+Model tier routing for ZeroToHire.
+Picks which loaded model serves a request based on request type, prompt size and current load.
+"""
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+from metrics import INFERENCE_QUEUE_DEPTH, INFERENCE_IN_FLIGHT
+
+
+# Request types the tutor issues
+CHAT = 'chat'
+CHAT_STREAM = 'chat_stream'
+EVALUATE_CODE = 'evaluate_code'
+HINT_LADDER = 'hint_ladder'
+PREFILL = 'prefill'
+
+# Requests that only run on spare capacity and don't count as user activity
+BACKGROUND_REQUEST_TYPES = {HINT_LADDER, PREFILL}
+
+# Scheduling priority when requests queue for a model: interactive chat, then reviews, then background work
+PRIORITIES = {CHAT_STREAM: 0, CHAT: 0, EVALUATE_CODE: 1, HINT_LADDER: 2, PREFILL: 2}
+# Lowest priority a user is waiting on; anything after it only runs on spare capacity
+FOREGROUND_PRIORITY = max(priority for request_type, priority in PRIORITIES.items()
+                          if request_type not in BACKGROUND_REQUEST_TYPES)
+
+
+class PrioritySlots:
+    """Counting semaphore that hands free slots to the highest-priority waiter (lowest number), FIFO within a priority."""
+
+    def __init__(self, value: int):
+        self._free = value
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def waiting_up_to(self, priority: int) -> int:
+        """Waiters at this priority or a more urgent one."""
+        with self._cond:
+            return sum(1 for waiter_priority, _ in self._waiters if waiter_priority <= priority)
+
+    def acquire(self, priority: int = 0):
+        with self._cond:
+            entry = (priority, next(self._sequence))
+            heapq.heappush(self._waiters, entry)
+            while self._free == 0 or self._waiters[0] != entry:
+                self._cond.wait()
+            heapq.heappop(self._waiters)
+            self._free -= 1
+            if self._free and self._waiters:
+                self._cond.notify_all()
+
+    def release(self):
+        with self._cond:
+            self._free += 1
+            self._cond.notify_all()
+
+
+class ModelRouter:
+    """Routes requests between a 'large' model and an optional 'small' model.
+
+    Each tier admits as many concurrent generations as its model's `concurrency`
+    (1 for an in-process llama.cpp context, which is not thread-safe), and the
+    number of requests holding or waiting for a tier is its current load.
+    Tiers whose models report the same `slot_group` run on the same hardware
+    (model_server.py workers serve every tier) and share one pool of slots.
+    Waiting requests are served in PRIORITIES order.
+    """
+
+    def __init__(self, models: Dict[str, Any]):
+        """Initialize the router with the loaded models keyed by tier name."""
+        if 'large' not in models:
+            raise ValueError("ModelRouter requires a 'large' model tier")
+
+        self.models = models
+        self.concurrency = {tier: max(1, getattr(model, 'concurrency', 1)) for tier, model in models.items()}
+        pools = {}
+        self._slots = {}
+        for tier, model in models.items():
+            group = getattr(model, 'slot_group', None) or tier
+            if group not in pools:
+                pools[group] = PrioritySlots(self.concurrency[tier])
+            self._slots[tier] = pools[group]
+        self._load = {tier: 0 for tier in models}
+        self._load_lock = threading.Lock()
+        self._last_activity = time.monotonic()
+        # Optional slo.SLOController; set by the tutor
+        self.slo = None
+
+        # Routing policy configuration
+        self.short_message_chars = int(os.getenv('ROUTER_SHORT_MESSAGE_CHARS', 80))
+        self.small_max_context_tokens = int(os.getenv('ROUTER_SMALL_MAX_CONTEXT_TOKENS', 2500))
+        self.large_overload = int(os.getenv('ROUTER_LARGE_OVERLOAD', 2))
+
+    @property
+    def has_small(self) -> bool:
+        return 'small' in self.models
+
+    def load(self, tier: str) -> int:
+        """Number of requests currently running on or queued for a tier."""
+        with self._load_lock:
+            return self._load.get(tier, 0)
+
+    def queued(self, foreground_only: bool = False) -> int:
+        """Requests waiting for a model slot across all tiers.
+
+        foreground_only leaves out background work (BACKGROUND_REQUEST_TYPES),
+        which is served after every user request and so never delays one.
+        """
+        pools = {id(slots): slots for slots in self._slots.values()}
+        if foreground_only:
+            return sum(slots.waiting_up_to(FOREGROUND_PRIORITY) for slots in pools.values())
+        return sum(slots.waiting for slots in pools.values())
+
+    def idle_for(self) -> float:
+        """Seconds since the last user request finished, or 0 while any tier is busy."""
+        with self._load_lock:
+            if any(self._load.values()):
+                return 0.0
+            return time.monotonic() - self._last_activity
+
+    def choose(self, request_type: str, user_message: Optional[str] = None, context_tokens: int = 0) -> str:
+        """Pick the model tier for a request.
+
+        - Code reviews and hint ladders always use the large model.
+        - Short conversational turns use the small model.
+        - Other chat turns use the large model, unless it is overloaded or the SLO
+          controller is protecting latency, in which case they degrade to the
+          small model instead of queuing.
+        """
+        if not self.has_small or request_type in (EVALUATE_CODE, HINT_LADDER):
+            return 'large'
+
+        # The small model is only trusted with prompts that fit its budget
+        if context_tokens > self.small_max_context_tokens:
+            return 'large'
+
+        if user_message is not None and len(user_message.strip()) <= self.short_message_chars:
+            return 'small'
+
+        if self.load('large') >= self.large_overload * self.concurrency['large']:
+            return 'small'
+
+        if self.slo is not None and self.slo.prefer_small(request_type):
+            return 'small'
+
+        return 'large'
+
+    @contextmanager
+    def acquire(self, tier: str, request_type: str = CHAT):
+        """Wait for a free slot on a tier's model and yield the model.
+
+        Background request types still count towards load but don't reset idle_for().
+        """
+        background = request_type in BACKGROUND_REQUEST_TYPES
+        queued = INFERENCE_QUEUE_DEPTH.labels(tier=tier)
+        running = INFERENCE_IN_FLIGHT.labels(tier=tier)
+        with self._load_lock:
+            self._load[tier] += 1
+        try:
+            queued.inc()
+            try:
+                self._slots[tier].acquire(PRIORITIES.get(request_type, 0))
+            finally:
+                queued.dec()
+            running.inc()
+            try:
+                yield self.models[tier]
+            finally:
+                running.dec()
+                self._slots[tier].release()
+        finally:
+            with self._load_lock:
+                self._load[tier] -= 1
+                if not background:
+                    self._last_activity = time.monotonic()
@@ -0,0 +1,186 @@
+"""
+Out-of-process model server for ZeroToHire.
+A pool of worker processes owning the model weights, serving completions to web workers over a Unix socket.
+
+Usage:
+    python model_server.py --workers 2
+    INFERENCE_BACKEND=socket python llm_comm.py
+
+The parent process binds the socket and forks the workers, which each load the
+models after the fork (the GGUF files are memory-mapped, so the weights are
+shared through the page cache) and take turns accepting connections. Each
+worker also listens on its own socket (<socket>.<n>), where web processes send
+completions whose prompt prefix that worker has evaluated last. Each worker
+runs one generation at a time on any tier; the web process admits up to
+--workers concurrent requests across all tiers and queues the rest.
+"""
+
+import argparse
+import json
+import os
+import selectors
+import signal
+import socket
+import sys
+from typing import Dict, List
+
+from dotenv import load_dotenv
+from inference import create_backends, resolve_model_paths
+
+
+def _send(conn: socket.socket, message: Dict):
+    conn.sendall(json.dumps(message).encode('utf-8') + b'\n')
+
+
+def worker_socket_path(socket_path: str, index: int) -> str:
+    """The socket only worker `index` accepts on."""
+    return f"{socket_path}.{index}"
+
+
+def _listen(path: str) -> socket.socket:
+    if os.path.exists(path):
+        os.unlink(path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(64)
+    return server
+
+
+def handle_connection(conn: socket.socket, models: Dict, worker_sockets: List[str]):
+    """Serve a single request read from a client connection."""
+    with conn.makefile('rb') as reader:
+        line = reader.readline()
+    if not line:
+        return
+
+    try:
+        request = json.loads(line)
+        op = request.get('op')
+
+        if op == 'info':
+            _send(conn, {
+                'workers': len(worker_sockets),
+                'worker_sockets': worker_sockets,
+                'tiers': list(models),
+                'versions': {tier: model.model_version for tier, model in models.items()},
+                'pid': os.getpid()
+            })
+            return
+
+        model = models.get(request.get('tier', 'large'))
+        if model is None:
+            _send(conn, {'error': f"Unknown tier '{request.get('tier')}'"})
+            return
+
+        if op == 'tokenize':
+            _send(conn, {'tokens': model.tokenize(request['text'].encode('utf-8'))})
+        elif op == 'complete':
+            params = request.get('params', {})
+            if request.get('stream'):
+                for chunk in model(request['prompt'], stream=True, **params):
+                    _send(conn, {'chunk': chunk})
+                _send(conn, {'done': True})
+            else:
+                _send(conn, {'result': model(request['prompt'], **params)})
+        else:
+            _send(conn, {'error': f"Unknown op '{op}'"})
+    except (BrokenPipeError, ConnectionResetError):
+        # Client went away (e.g. the WebSocket closed); stop generating
+        pass
+    except Exception as e:
+        try:
+            _send(conn, {'error': str(e)})
+        except OSError:
+            pass
+
+
+def worker_loop(server: socket.socket, own: socket.socket, backend: str, model_path, small_model_path,
+                worker_sockets: List[str]):
+    """Load the models in this process and serve connections on both sockets until terminated."""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    models = create_backends(backend, model_path, small_model_path)
+    print(f"Model worker {os.getpid()} ready on {own.getsockname()} (tiers: {', '.join(models)})")
+
+    # Workers race to accept on the shared socket, so a lost race must not block
+    server.setblocking(False)
+    selector = selectors.DefaultSelector()
+    selector.register(server, selectors.EVENT_READ)
+    selector.register(own, selectors.EVENT_READ)
+    while True:
+        for key, _ in selector.select():
+            try:
+                conn, _ = key.fileobj.accept()
+            except BlockingIOError:
+                continue
+            conn.setblocking(True)
+            with conn:
+                handle_connection(conn, models, worker_sockets)
+
+
+def serve(socket_path: str, workers: int, backend: str):
+    model_path = small_model_path = None
+    if backend == 'llama_cpp':
+        # Download once in the parent so the workers don't race on the cache
+        model_path, small_model_path = resolve_model_paths()
+
+    server = _listen(socket_path)
+    worker_sockets = [worker_socket_path(socket_path, i) for i in range(workers)]
+    own_servers = [_listen(path) for path in worker_sockets]
+    print(f"Model server listening on {socket_path} with {workers} workers ({backend} backend)")
+
+    children = {}
+    for own in own_servers:
+        pid = os.fork()
+        if pid == 0:
+            try:
+                for other in own_servers:
+                    if other is not own:
+                        other.close()
+                worker_loop(server, own, backend, model_path, small_model_path, worker_sockets)
+            finally:
+                os._exit(1)
+        children[pid] = own
+
+    def shutdown(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for listener, path in [(server, socket_path)] + list(zip(own_servers, worker_sockets)):
+            listener.close()
+            if os.path.exists(path):
+                os.unlink(path)
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    # If a worker dies, the others keep serving; exit once all are gone
+    while children:
+        pid, status = os.wait()
+        if pid in children:
+            # Remove its own socket so clients send its share of the work to the shared one
+            own = children.pop(pid)
+            os.unlink(own.getsockname())
+            print(f"Model worker {pid} exited with status {status}")
+    shutdown(None, None)
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Run the model worker pool")
+    parser.add_argument('--socket', default=os.getenv('MODEL_SERVER_SOCKET', '/tmp/zerotohire-model.sock'),
+                        help="Unix socket path the web process connects to")
+    parser.add_argument('--workers', type=int, default=int(os.getenv('MODEL_SERVER_WORKERS', 1)),
+                        help="Worker processes (each holds its own model context)")
+    parser.add_argument('--backend', default=os.getenv('MODEL_SERVER_BACKEND', 'llama_cpp'),
+                        choices=['llama_cpp', 'http', 'fake'],
+                        help="Backend each worker runs in-process")
+    args = parser.parse_args()
+
+    serve(args.socket, max(1, args.workers), args.backend)
+
+
+if __name__ == '__main__':
+    main()
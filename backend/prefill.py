@@ -0,0 +1,69 @@
+"""
+Speculative prompt prefill for ZeroToHire.
+Evaluates a session's prompt prefix in the background when a problem is selected, so the first reply skips most of the prefill.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from metrics import PROMPT_PREFILLS_TOTAL
+from model_router import PREFILL
+
+# Configuration
+PREFILL_ENABLED = os.getenv('MODEL_SPECULATIVE_PREFILL', 'True').lower() == 'true'
+
+
+class PromptPrefiller:
+    """Background worker that runs a one-token generation over a prompt prefix.
+
+    The model keeps the evaluated tokens in its KV state (and in its prompt
+    cache, if MODEL_PROMPT_CACHE_MB is set), so a later prompt starting with the
+    same prefix only has to evaluate what follows. Prefills are low priority:
+    only the newest prefix per tier is kept, and it is dropped rather than run
+    if the tier is serving a request.
+    """
+
+    def __init__(self, router):
+        self.router = router
+        self._pending: Dict[str, str] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def schedule(self, prompt: str):
+        """Queue a prefix for every tier, replacing any prefix not yet started."""
+        if not PREFILL_ENABLED or not prompt:
+            return
+        with self._cond:
+            for tier in self.router.models:
+                if tier in self._pending:
+                    PROMPT_PREFILLS_TOTAL.labels(tier=tier, outcome='superseded').inc()
+                self._pending[tier] = prompt
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='prompt-prefill', daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                tier, prompt = self._pending.popitem()
+            self._prefill(tier, prompt)
+
+    def _prefill(self, tier: str, prompt: str):
+        if self.router.load(tier) > 0:
+            PROMPT_PREFILLS_TOTAL.labels(tier=tier, outcome='skipped_busy').inc()
+            return
+        start = time.perf_counter()
+        try:
+            with self.router.acquire(tier, PREFILL) as llm:
+                llm(prompt, max_tokens=1, temperature=0.0, echo=False)
+        except Exception as e:
+            print(f"Prompt prefill on {tier} model failed: {e}")
+            PROMPT_PREFILLS_TOTAL.labels(tier=tier, outcome='error').inc()
+            return
+        PROMPT_PREFILLS_TOTAL.labels(tier=tier, outcome='done').inc()
+        print(f"Prefilled ~{len(prompt)//4} prompt tokens on {tier} model in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,263 @@
+"""
+Problem catalog for ZeroToHire.
+Precomputed problem summaries, filter indexes and a BM25 full-text index over titles and descriptions.
+"""
+
+import bisect
+import math
+import re
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+_TAG_RE = re.compile(r'<[^>]+>')
+
+# BM25 parameters; title matches count as several occurrences (a simple BM25F)
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_WEIGHT = 3
+MAX_PREFIX_EXPANSIONS = 50
+
+# Autocomplete: trigram candidates re-ranked by edit distance
+AUTOCOMPLETE_CANDIDATES = 50
+AUTOCOMPLETE_CACHE_SIZE = 2048
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(_TAG_RE.sub(' ', text or '').lower())
+
+
+def _normalize_title(text: str) -> str:
+    return ' '.join(tokenize(text))
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text}"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance."""
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def allowed_edits(query: str) -> int:
+    """Typos tolerated for a query of this length."""
+    if len(query) <= 2:
+        return 0
+    return 1 if len(query) <= 5 else 2
+
+
+def split_types(problem_types: str) -> List[str]:
+    """'Array, Hash Table' -> ['Array', 'Hash Table']"""
+    return [ptype.strip() for ptype in (problem_types or '').split(',') if ptype.strip()]
+
+
+class ProblemCatalog:
+    """In-memory index over the problem set, built once at startup.
+
+    Search terms are ANDed; the last term also matches as a prefix (so results
+    update while typing), as does any term ending in '*'. Results are ranked
+    by BM25 over title and description.
+    """
+
+    def __init__(self, problems: Iterable[Dict]):
+        self.summaries: List[Dict] = []
+        self._by_difficulty: Dict[str, Set[int]] = defaultdict(set)
+        self._by_type: Dict[str, Set[int]] = defaultdict(set)
+
+        # term -> {problem_id: weighted term frequency}
+        self._postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self._doc_lengths: List[int] = []
+
+        for problem_id, prob in enumerate(problems):
+            problem_types = split_types(prob.get('problem_types', ''))
+            difficulty = prob.get('difficulty', 'Unknown')
+            self.summaries.append({
+                'id': problem_id,
+                'title': prob['title'],
+                'difficulty': difficulty,
+                'problem_types': problem_types
+            })
+            if prob.get('difficulty'):
+                self._by_difficulty[difficulty].add(problem_id)
+            for ptype in problem_types:
+                self._by_type[ptype].add(problem_id)
+
+            frequencies: Dict[str, int] = defaultdict(int)
+            for term in tokenize(prob['title']):
+                frequencies[term] += TITLE_WEIGHT
+            for term in tokenize(prob.get('content', '')):
+                frequencies[term] += 1
+            for term, tf in frequencies.items():
+                self._postings[term][problem_id] = tf
+            self._doc_lengths.append(sum(frequencies.values()))
+
+        # Title trigram index for autocomplete
+        self._titles = [_normalize_title(summary['title']) for summary in self.summaries]
+        self._title_trigrams: Dict[str, List[int]] = defaultdict(list)
+        for problem_id, title in enumerate(self._titles):
+            for trigram in _trigrams(title):
+                self._title_trigrams[trigram].append(problem_id)
+        self._autocomplete_cache: 'OrderedDict[Tuple[str, int], List[Dict]]' = OrderedDict()
+        self._autocomplete_lock = threading.Lock()
+
+        self._vocabulary = sorted(self._postings)
+        self._avg_length = (sum(self._doc_lengths) / len(self._doc_lengths)) if self._doc_lengths else 0.0
+        self.difficulties = sorted(self._by_difficulty)
+        self.problem_types = sorted(self._by_type)
+
+    def __len__(self) -> int:
+        return len(self.summaries)
+
+    # ==================== Search ====================
+
+    def _expand(self, term: str) -> List[str]:
+        """Vocabulary terms starting with a prefix, most common first."""
+        start = bisect.bisect_left(self._vocabulary, term)
+        matches = []
+        for candidate in self._vocabulary[start:]:
+            if not candidate.startswith(term):
+                break
+            matches.append(candidate)
+        if len(matches) > MAX_PREFIX_EXPANSIONS:
+            matches.sort(key=lambda t: len(self._postings[t]), reverse=True)
+            matches = matches[:MAX_PREFIX_EXPANSIONS]
+        return matches
+
+    def _term_scores(self, terms: List[str]) -> Dict[int, float]:
+        """BM25 score per problem for one query term (best of its expansions)."""
+        total = len(self.summaries)
+        scores: Dict[int, float] = {}
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for problem_id, tf in postings.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_lengths[problem_id] / self._avg_length)
+                score = idf * tf * (BM25_K1 + 1) / (tf + norm)
+                if score > scores.get(problem_id, 0.0):
+                    scores[problem_id] = score
+        return scores
+
+    def _rank(self, query: str) -> List[Tuple[int, float]]:
+        raw_terms = query.lower().split()
+        if not raw_terms:
+            return []
+
+        combined: Optional[Dict[int, float]] = None
+        for position, raw in enumerate(raw_terms):
+            is_prefix = raw.endswith('*') or position == len(raw_terms) - 1
+            for term in tokenize(raw):
+                candidates = self._expand(term) if is_prefix else [term]
+                scores = self._term_scores(candidates)
+                if combined is None:
+                    combined = scores
+                else:
+                    combined = {pid: combined[pid] + s for pid, s in scores.items() if pid in combined}
+                if not combined:
+                    return []
+
+        return sorted((combined or {}).items(), key=lambda item: (-item[1], item[0]))
+
+    def search(self, query: str = '', difficulties: Optional[List[str]] = None, types: Optional[List[str]] = None,
+               page: int = 1, per_page: int = 20) -> Tuple[List[Dict], int]:
+        """Filter and rank problems. Returns (summaries for the page, total matches).
+
+        Without a query, problems keep their catalog order.
+        """
+        allowed: Optional[Set[int]] = None
+        if difficulties:
+            allowed = set().union(*(self._by_difficulty.get(d, set()) for d in difficulties))
+        for ptype in types or []:
+            # Every selected type must be present (AND logic)
+            ids = self._by_type.get(ptype, set())
+            allowed = ids if allowed is None else allowed & ids
+
+        if query.strip():
+            ranked = [pid for pid, _ in self._rank(query)]
+            if allowed is not None:
+                ranked = [pid for pid in ranked if pid in allowed]
+        elif allowed is not None:
+            ranked = sorted(allowed)
+        else:
+            ranked = range(len(self.summaries))
+
+        page = max(1, page)
+        start = (page - 1) * per_page
+        return [self.summaries[pid] for pid in ranked[start:start + per_page]], len(ranked)
+
+    # ==================== Autocomplete ====================
+
+    def _prefix_distance(self, query: str, title: str) -> Tuple[int, int]:
+        """Best edit distance between the query and the start of any word in the title.
+
+        Returns (distance, word position), comparing against slices one
+        character shorter or longer than the query to allow insertions and
+        deletions.
+        """
+        best = (len(query), 0)
+        starts = [0] + [i + 1 for i, char in enumerate(title) if char == ' ']
+        for position, start in enumerate(starts):
+            for length in (len(query) - 1, len(query), len(query) + 1):
+                if length <= 0:
+                    continue
+                distance = edit_distance(query, title[start:start + length])
+                if (distance, position) < best:
+                    best = (distance, position)
+            if best[0] == 0:
+                break
+        return best
+
+    def autocomplete(self, query: str, limit: int = 8) -> List[Dict]:
+        """Top title matches for a partial, possibly misspelled query.
+
+        Candidates sharing the most trigrams with the query are re-ranked by
+        edit distance to a word prefix of the title. Results are cached per
+        normalized query.
+        """
+        normalized = _normalize_title(query)
+        if not normalized:
+            return []
+
+        key = (normalized, limit)
+        with self._autocomplete_lock:
+            cached = self._autocomplete_cache.get(key)
+            if cached is not None:
+                self._autocomplete_cache.move_to_end(key)
+                return cached
+
+        overlap: Dict[int, int] = defaultdict(int)
+        for trigram in _trigrams(normalized):
+            for problem_id in self._title_trigrams.get(trigram, ()):
+                overlap[problem_id] += 1
+        candidates = sorted(overlap, key=lambda pid: (-overlap[pid], pid))[:AUTOCOMPLETE_CANDIDATES]
+
+        max_edits = allowed_edits(normalized)
+        ranked = []
+        for problem_id in candidates:
+            title = self._titles[problem_id]
+            distance, position = self._prefix_distance(normalized, title)
+            if distance <= max_edits:
+                ranked.append((distance, position, len(title), problem_id))
+        ranked.sort()
+
+        results = [
+            {key_: self.summaries[problem_id][key_] for key_ in ('id', 'title', 'difficulty')}
+            for _, _, _, problem_id in ranked[:limit]
+        ]
+
+        with self._autocomplete_lock:
+            self._autocomplete_cache[key] = results
+            if len(self._autocomplete_cache) > AUTOCOMPLETE_CACHE_SIZE:
+                self._autocomplete_cache.popitem(last=False)
+        return results
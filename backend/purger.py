@@ -0,0 +1,54 @@
+"""
+Background purge of deleted data for ZeroToHire.
+Removes tombstoned chats, code snapshots and accounts in small batches so no single delete holds the SQLite write lock for long.
+"""
+
+import os
+import threading
+import time
+from typing import Optional
+
+from metrics import PURGED_ROWS_TOTAL, PENDING_TOMBSTONES
+
+# Configuration
+BATCH_SIZE = int(os.getenv('PURGE_BATCH_SIZE', 500))
+INTERVAL_S = float(os.getenv('PURGE_INTERVAL_S', 5))
+# Pause between batches so request threads get the write lock in between
+PAUSE_S = float(os.getenv('PURGE_PAUSE_S', 0.05))
+
+
+class TombstonePurger:
+    """Daemon thread draining Database tombstones one batched transaction at a time."""
+
+    def __init__(self, db):
+        self.db = db
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> int:
+        """Purge until no tombstones are left. Returns the rows deleted."""
+        total = 0
+        while True:
+            pending = self.db.pending_tombstones()
+            PENDING_TOMBSTONES.set(pending)
+            if not pending:
+                return total
+            deleted = self.db.purge_tombstones(BATCH_SIZE)
+            PURGED_ROWS_TOTAL.inc(deleted)
+            total += deleted
+            time.sleep(PAUSE_S)
+
+    def _run(self):
+        while True:
+            try:
+                deleted = self.run_once()
+                if deleted:
+                    print(f"Purged {deleted} deleted rows")
+            except Exception as e:
+                print(f"Purge failed, will retry: {e}")
+            time.sleep(INTERVAL_S)
+
+    def start(self):
+        """Start purging in a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='tombstone-purger', daemon=True)
+            self._thread.start()
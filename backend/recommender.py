@@ -0,0 +1,112 @@
+"""
+Problem recommendations for ZeroToHire.
+Scores every problem against a user's completed set using precomputed tag and difficulty vectors.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from problem_catalog import ProblemCatalog
+
+
+DIFFICULTY_LEVELS = {'Easy': 0.0, 'Medium': 1.0, 'Hard': 2.0}
+
+# How far past the user's average difficulty to aim, and how much a mismatch costs
+DIFFICULTY_STEP = 0.5
+DIFFICULTY_WEIGHT = 0.35
+CACHE_SIZE = 4096
+
+
+class Recommender:
+    """Suggests what to solve next from problem tags and difficulty.
+
+    Each problem is a unit-length multi-hot vector over problem types. A user's
+    profile is the mean vector of their completed problems, and candidates are
+    scored in one matrix-vector product by cosine similarity to it, minus a
+    penalty for straying from a difficulty slightly above what they have done.
+    Results are cached per user until their completions change.
+    """
+
+    def __init__(self, catalog: ProblemCatalog):
+        self.catalog = catalog
+        self.type_index = {ptype: i for i, ptype in enumerate(catalog.problem_types)}
+
+        count = len(catalog)
+        self.vectors = np.zeros((count, max(1, len(self.type_index))), dtype=np.float32)
+        self.difficulty = np.full(count, DIFFICULTY_LEVELS['Medium'], dtype=np.float32)
+        for summary in catalog.summaries:
+            for ptype in summary['problem_types']:
+                self.vectors[summary['id'], self.type_index[ptype]] = 1.0
+            self.difficulty[summary['id']] = DIFFICULTY_LEVELS.get(summary['difficulty'], DIFFICULTY_LEVELS['Medium'])
+
+        norms = np.linalg.norm(self.vectors, axis=1, keepdims=True)
+        self.vectors /= np.maximum(norms, 1e-9)
+
+        self._cache: 'OrderedDict[Optional[int], List[Dict]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def invalidate(self, user_id: Optional[int]):
+        """Drop a user's cached recommendations (call when their completions change)."""
+        with self._lock:
+            self._cache.pop(user_id, None)
+
+    def scores(self, completed_ids: Iterable[int]) -> np.ndarray:
+        """Score every problem for a user; completed problems score -inf."""
+        completed = np.fromiter((pid for pid in completed_ids if 0 <= pid < len(self.difficulty)), dtype=np.int64)
+        if completed.size == 0:
+            # New users start with the easiest problems, in catalog order
+            return -DIFFICULTY_WEIGHT * self.difficulty
+
+        profile = self.vectors[completed].mean(axis=0)
+        norm = np.linalg.norm(profile)
+        similarity = self.vectors @ (profile / norm) if norm > 0 else np.zeros(len(self.difficulty), dtype=np.float32)
+
+        target = min(self.difficulty[completed].mean() + DIFFICULTY_STEP, DIFFICULTY_LEVELS['Hard'])
+        scores = similarity - DIFFICULTY_WEIGHT * np.abs(self.difficulty - target)
+        scores[completed] = -np.inf
+        return scores
+
+    def recommend(self, user_id: Optional[int], load_completed: Callable[[], Iterable[int]], limit: int = 5) -> List[Dict]:
+        """Top problems for a user, served from the per-user cache when possible.
+
+        load_completed is only called on a cache miss.
+        """
+        with self._lock:
+            cached = self._cache.get(user_id)
+            if cached is not None and len(cached) >= limit:
+                self._cache.move_to_end(user_id)
+                return cached[:limit]
+
+        completed_ids = list(load_completed())
+        completed_set = set(completed_ids)
+        scores = self.scores(completed_ids)
+
+        count = min(limit, len(scores))
+        if count == 0:
+            return []
+        # Full sort (a few thousand rows) so ties keep catalog order rather than whatever a partition leaves
+        top = np.argsort(-scores, kind='stable')[:count]
+
+        # Explain each pick by the topics it shares with the user's completed problems
+        completed_types = {ptype for pid in completed_set if 0 <= pid < len(self.catalog)
+                           for ptype in self.catalog.summaries[pid]['problem_types']}
+        results = []
+        for problem_id in top:
+            if not np.isfinite(scores[problem_id]):
+                break
+            summary = self.catalog.summaries[int(problem_id)]
+            results.append(dict(
+                summary,
+                score=round(float(scores[problem_id]), 4),
+                matched_types=[ptype for ptype in summary['problem_types'] if ptype in completed_types]
+            ))
+
+        with self._lock:
+            self._cache[user_id] = results
+            self._cache.move_to_end(user_id)
+            if len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return results
@@ -0,0 +1,284 @@
+"""
+Sandboxed code execution for ZeroToHire.
+Runs Python submissions against a problem's examples in resource-limited child processes before any model review.
+"""
+
+import ast
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from metrics import SANDBOX_RUN_SECONDS
+
+
+RUNNER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sandbox_runner.py')
+
+# Configuration
+SANDBOX_ENABLED = os.getenv('SANDBOX_ENABLED', 'True').lower() == 'true'
+MAX_PROCESSES = int(os.getenv('SANDBOX_MAX_PROCESSES', 4))
+TEST_TIMEOUT_S = float(os.getenv('SANDBOX_TEST_TIMEOUT_S', 2.0))
+CPU_LIMIT_S = int(os.getenv('SANDBOX_CPU_LIMIT_S', 5))
+MEMORY_LIMIT_MB = int(os.getenv('SANDBOX_MEMORY_LIMIT_MB', 256))
+# Unprivileged user submissions run as (nobody by default)
+SANDBOX_UID = int(os.getenv('SANDBOX_UID', 65534))
+
+# Reference solutions that need LeetCode's node classes or mutate their input can't be compared by return value
+_NODE_CLASSES = {'ListNode', 'TreeNode', 'Node'}
+_IN_PLACE_MARKER = 'do not return anything'
+_LITERAL_WORDS = {'true': 'True', 'false': 'False', 'null': 'None'}
+
+_slots = threading.BoundedSemaphore(MAX_PROCESSES)
+
+
+# ==================== Test case extraction ====================
+
+def _pythonize_literals(text: str) -> str:
+    """Rewrite JSON-style true/false/null outside of string literals."""
+    parts = re.split(r'("(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\')', text)
+    for i in range(0, len(parts), 2):
+        parts[i] = re.sub(r'\b(true|false|null)\b', lambda m: _LITERAL_WORDS[m.group(1)], parts[i])
+    return ''.join(parts)
+
+
+def parse_arguments(input_text: str) -> Optional[List[Any]]:
+    """'nums = [2,7,11,15], target = 9' -> [[2, 7, 11, 15], 9]"""
+    try:
+        call = ast.parse(f"f({_pythonize_literals(input_text.strip())})", mode='eval').body
+    except SyntaxError:
+        return None
+    if not isinstance(call, ast.Call) or call.args:
+        return None
+    try:
+        return [ast.literal_eval(keyword.value) for keyword in call.keywords]
+    except ValueError:
+        return None
+
+
+def parse_value(output_text: str) -> Any:
+    try:
+        return ast.literal_eval(_pythonize_literals(output_text.strip()))
+    except (ValueError, SyntaxError):
+        return None
+
+
+def parse_examples(content: str) -> List[Dict]:
+    """Pull Input/Output pairs out of a problem description."""
+    text = re.sub(r'<[^>]+>', '', content or '')
+    text = text.replace('&quot;', '"').replace('&lt;', '<').replace('&gt;', '>').replace('&amp;', '&')
+    examples = []
+    for match in re.finditer(r'Input:?\s*(.+?)\s*\n\s*Output:?\s*(.+?)\s*(?:\n|$)', text):
+        args = parse_arguments(match.group(1))
+        if args is not None:
+            examples.append({'args': args, 'output_text': match.group(2)})
+    return examples
+
+
+def entry_point(reference: str) -> Optional[str]:
+    """Name of the method (or function) the reference solution implements."""
+    try:
+        tree = ast.parse(reference)
+    except SyntaxError:
+        return None
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and node.name == 'Solution':
+            for item in node.body:
+                if isinstance(item, ast.FunctionDef) and not item.name.startswith('_'):
+                    return item.name
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef):
+            return node.name
+    return None
+
+
+def is_supported(reference: str) -> bool:
+    """Whether a reference solution returns a plain value (no node classes, no in-place mutation)."""
+    if not reference or _IN_PLACE_MARKER in reference.lower():
+        return False
+    try:
+        tree = ast.parse(reference)
+    except SyntaxError:
+        return False
+    # Names, attributes and string annotations only: prose in comments or docstrings doesn't count
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and node.id in _NODE_CLASSES:
+            return False
+        if isinstance(node, ast.Attribute) and node.attr in _NODE_CLASSES:
+            return False
+        if isinstance(node, ast.arg) and isinstance(node.annotation, ast.Constant) \
+                and isinstance(node.annotation.value, str) \
+                and _NODE_CLASSES & set(re.findall(r'\w+', node.annotation.value)):
+            return False
+    return True
+
+
+# ==================== Execution ====================
+
+def execute(code: str, entry: Optional[str], tests: List[List[Any]]) -> Dict:
+    """Run code against argument lists in a sandboxed child. Waits for a free process slot.
+    
+    The child isolates itself before running anything (sandbox_runner.isolate):
+    no host filesystem, network or processes, as an unprivileged user. If that
+    fails the code is not run and the result carries 'isolation_error'.
+    """
+    request = json.dumps({
+        'code': code, 'entry': entry, 'tests': tests, 'test_timeout': TEST_TIMEOUT_S,
+        'limits': {'cpu_s': CPU_LIMIT_S, 'memory_mb': MEMORY_LIMIT_MB}, 'uid': SANDBOX_UID
+    })
+    wall_timeout = TEST_TIMEOUT_S * max(1, len(tests)) + 2
+
+    with _slots, tempfile.TemporaryDirectory(prefix='zth-sandbox-') as workdir:
+        start = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, '-I', '-S', RUNNER_PATH],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+            cwd=workdir, env={'PATH': '/usr/bin:/bin'}, start_new_session=True
+        )
+        try:
+            stdout, _ = proc.communicate(request, timeout=wall_timeout)
+        except subprocess.TimeoutExpired:
+            # The runner forks into its own PID namespace; kill the whole group, not just the runner
+            os.killpg(proc.pid, signal.SIGKILL)
+            proc.communicate()
+            return {'compiled': True, 'error': 'Time limit exceeded', 'results': [{'status': 'timeout'}] * len(tests)}
+        finally:
+            SANDBOX_RUN_SECONDS.observe(time.perf_counter() - start)
+
+    try:
+        return json.loads(stdout)
+    except json.JSONDecodeError:
+        # Killed by a resource limit before it could report
+        reason = 'Memory or CPU limit exceeded' if proc.returncode and proc.returncode < 0 else 'Execution failed'
+        return {'compiled': True, 'error': reason, 'results': []}
+
+
+_isolation_checked: Optional[bool] = None
+
+
+def isolation_available() -> bool:
+    """Whether this host can isolate submissions (checked once). Without it nothing is executed."""
+    global _isolation_checked
+    if _isolation_checked is None:
+        run = execute("def f():\n    return 1\n", 'f', [[]])
+        _isolation_checked = 'isolation_error' not in run and run.get('results', [{}])[0].get('output') == 1
+        if not _isolation_checked:
+            print(f"Code sandbox unavailable, reviews will skip test runs: {run.get('error')}")
+    return _isolation_checked
+
+
+def _outputs_match(actual: Any, expected: Any) -> bool:
+    if actual == expected:
+        return True
+    # Many problems accept any order
+    if isinstance(actual, list) and isinstance(expected, list) and len(actual) == len(expected):
+        try:
+            return sorted(actual, key=repr) == sorted(expected, key=repr)
+        except TypeError:
+            return False
+    if isinstance(actual, float) and isinstance(expected, (int, float)):
+        return abs(actual - expected) < 1e-5
+    return False
+
+
+class SandboxReport:
+    """Outcome of running a submission against a problem's examples."""
+
+    def __init__(self, compiled: bool, error: Optional[str], cases: List[Dict]):
+        self.compiled = compiled
+        self.error = error
+        self.cases = cases
+
+    @property
+    def passed(self) -> int:
+        return sum(1 for case in self.cases if case['status'] == 'pass')
+
+    @property
+    def all_passed(self) -> bool:
+        return self.compiled and not self.error and bool(self.cases) and self.passed == len(self.cases)
+
+    def summary(self) -> str:
+        """Compact test results for the review prompt."""
+        if not self.compiled:
+            return f"The code does not run: {self.error}"
+        if self.error:
+            return f"The code could not be tested: {self.error}"
+        lines = [f"Passed {self.passed}/{len(self.cases)} example tests."]
+        for i, case in enumerate(self.cases, 1):
+            if case['status'] == 'pass':
+                continue
+            detail = {
+                'fail': f"returned {case.get('output')!r}, expected {case['expected']!r}",
+                'error': f"raised {case.get('error')}" + (f" (line {case['line']})" if case.get('line') else ''),
+                'timeout': f"exceeded {TEST_TIMEOUT_S:g}s"
+            }[case['status']]
+            lines.append(f"- Example {i} ({case['input']}): {detail}")
+        return '\n'.join(lines)
+
+
+class ProblemSandbox:
+    """Test cases and reference outputs per problem, computed once and cached."""
+
+    def __init__(self):
+        self._cases: Dict[int, Optional[Dict]] = {}
+        self._lock = threading.Lock()
+
+    def _build_cases(self, problem: Dict) -> Optional[Dict]:
+        reference = problem.get('python', '')
+        if not is_supported(reference):
+            return None
+        examples = parse_examples(problem.get('content', ''))
+        entry = entry_point(reference)
+        if not examples or not entry:
+            return None
+
+        # Expected outputs come from running the reference solution, falling back to the stated output
+        reference_run = execute(reference, entry, [example['args'] for example in examples])
+        reference_results = reference_run.get('results', [])
+        cases = []
+        for i, example in enumerate(examples):
+            result = reference_results[i] if i < len(reference_results) else {}
+            expected = result['output'] if result.get('status') == 'ok' else parse_value(example['output_text'])
+            if expected is None:
+                continue
+            cases.append({'args': example['args'], 'expected': expected})
+        return {'entry': entry, 'cases': cases} if cases else None
+
+    def cases_for(self, problem_id: int, problem: Dict) -> Optional[Dict]:
+        with self._lock:
+            if problem_id in self._cases:
+                return self._cases[problem_id]
+        cases = self._build_cases(problem)
+        with self._lock:
+            self._cases[problem_id] = cases
+        return cases
+
+    def run(self, problem_id: int, problem: Dict, code: str) -> Optional[SandboxReport]:
+        """Test a submission. Returns None when the problem can't be tested automatically."""
+        if not SANDBOX_ENABLED or not isolation_available():
+            return None
+        spec = self.cases_for(problem_id, problem)
+        if spec is None:
+            return None
+
+        run = execute(code, spec['entry'], [case['args'] for case in spec['cases']])
+        if 'isolation_error' in run:
+            return None
+        if not run.get('compiled') or run.get('error'):
+            return SandboxReport(run.get('compiled', False), run.get('error'), [])
+
+        cases = []
+        for case, result in zip(spec['cases'], run['results']):
+            status = result['status']
+            if status == 'ok':
+                status = 'pass' if _outputs_match(result['output'], case['expected']) else 'fail'
+            cases.append(dict(
+                result, status=status, expected=case['expected'],
+                input=', '.join(repr(arg) for arg in case['args'])
+            ))
+        return SandboxReport(True, None, cases)
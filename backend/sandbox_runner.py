@@ -0,0 +1,240 @@
+"""
+Sandboxed test harness for ZeroToHire.
+Runs inside a child process started by sandbox.py; not meant to be imported.
+
+Reads {"code", "entry", "tests", "test_timeout", "limits", "uid"} as JSON on stdin,
+isolates itself (see isolate()), applies the resource limits, calls the entry
+point once per test's positional arguments and writes per-test results as
+JSON on stdout.
+"""
+
+import ctypes
+import importlib
+import json
+import os
+import resource
+import signal
+import sys
+import time
+import traceback
+
+# The same conveniences LeetCode's Python environment preloads
+PRELUDE = (
+    "from typing import *\n"
+    "import collections, heapq, math, bisect, itertools, functools, string, re, operator\n"
+    "from collections import *\n"
+    "from heapq import *\n"
+    "from bisect import *\n"
+    "from itertools import *\n"
+    "from functools import *\n"
+    "from math import *\n"
+)
+
+# Imported before isolation: the sandbox root is empty, so submissions can only import what is already loaded
+PRELOADED_MODULES = (
+    'typing', 'collections', 'heapq', 'math', 'bisect', 'itertools', 'functools', 'string', 're', 'operator',
+    'random', 'copy', 'array', 'decimal', 'fractions', 'statistics', 'dataclasses', 'enum', 'numbers', 'cmath',
+)
+
+# From <sched.h>, <sys/mount.h> and <linux/prctl.h>
+CLONE_NEWNS = 0x00020000
+CLONE_NEWUTS = 0x04000000
+CLONE_NEWIPC = 0x08000000
+CLONE_NEWUSER = 0x10000000
+CLONE_NEWPID = 0x20000000
+CLONE_NEWNET = 0x40000000
+MS_RDONLY = 1
+MS_NOSUID = 2
+MS_NODEV = 4
+MS_NOEXEC = 8
+MS_REC = 0x4000
+MS_PRIVATE = 1 << 18
+PR_SET_PDEATHSIG = 1
+PR_SET_NO_NEW_PRIVS = 38
+_LINUX_CAPABILITY_VERSION_3 = 0x20080522
+
+
+class TestTimeout(Exception):
+    pass
+
+
+class IsolationError(Exception):
+    """The sandbox could not be set up; the submission must not run."""
+
+
+def _on_alarm(signum, frame):
+    raise TestTimeout()
+
+
+def _jsonable(value):
+    if isinstance(value, (tuple, list)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted((_jsonable(v) for v in value), key=repr)
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return repr(value)
+
+
+# ==================== Isolation ====================
+
+_libc = ctypes.CDLL(None, use_errno=True)
+
+
+def _check(result: int, what: str):
+    if result != 0:
+        errno = ctypes.get_errno()
+        raise IsolationError(f"{what} failed: {os.strerror(errno)}")
+
+
+def _write(path: str, data: str):
+    with open(path, 'w') as f:
+        f.write(data)
+
+
+def _drop_capabilities():
+    """Clear the effective, permitted and inheritable capability sets (no mount, chroot, kill or setuid)."""
+    header = (ctypes.c_uint32 * 2)(_LINUX_CAPABILITY_VERSION_3, 0)
+    data = (ctypes.c_uint32 * 6)()
+    _check(_libc.capset(header, data), 'capset')
+
+
+def isolate(uid: int):
+    """Move this process into an empty, read-only, offline sandbox running as an unprivileged user.
+    
+    New mount, network, PID, IPC and UTS namespaces hide the host's files,
+    network, processes and shared memory. Without root, a user namespace
+    provides the privileges for that. The process then forks so the child
+    is PID 1 of the new PID namespace. The child mounts an empty read-only
+    tmpfs and chroots into it. It then drops to uid and clears all
+    capabilities, so it can't undo any of this. The parent only waits for
+    the child and passes on its exit status. Raises IsolationError if any
+    step fails.
+    """
+    flags = CLONE_NEWNS | CLONE_NEWNET | CLONE_NEWPID | CLONE_NEWIPC | CLONE_NEWUTS
+    outer_uid, outer_gid = os.geteuid(), os.getegid()
+    if outer_uid != 0:
+        flags |= CLONE_NEWUSER
+    _check(_libc.unshare(flags), 'unshare')
+    if outer_uid != 0:
+        # Only our own IDs can be mapped; they become uid inside the namespace
+        _write('/proc/self/setgroups', 'deny')
+        _write('/proc/self/uid_map', f'{uid} {outer_uid} 1')
+        _write('/proc/self/gid_map', f'{uid} {outer_gid} 1')
+
+    pid = os.fork()
+    if pid:
+        _, status = os.waitpid(pid, 0)
+        if os.WIFSIGNALED(status):
+            # Die the same way, so sandbox.py can tell a resource limit from a crash
+            os.kill(os.getpid(), os.WTERMSIG(status))
+        os._exit(os.waitstatus_to_exitcode(status))
+    # Killing the parent (on the wall-clock timeout) takes the sandbox with it
+    _check(_libc.prctl(PR_SET_PDEATHSIG, signal.SIGKILL, 0, 0, 0), 'prctl(PDEATHSIG)')
+
+    # Don't let mounts below propagate back to the host
+    _check(_libc.mount(None, b'/', None, MS_REC | MS_PRIVATE, None), 'mount --make-rprivate')
+    os.mkdir('root', 0o555)
+    _check(_libc.mount(b'tmpfs', b'root', b'tmpfs', MS_RDONLY | MS_NOSUID | MS_NODEV | MS_NOEXEC, b'size=4k'),
+           'mount tmpfs')
+    os.chroot('root')
+    os.chdir('/')
+
+    if outer_uid == 0:
+        os.setgroups([])
+        os.setresgid(uid, uid, uid)
+        os.setresuid(uid, uid, uid)
+    _drop_capabilities()
+    _check(_libc.prctl(PR_SET_NO_NEW_PRIVS, 1, 0, 0, 0), 'prctl(NO_NEW_PRIVS)')
+
+
+def _apply_limits(limits):
+    """Cap CPU, memory, file writes, open files and process creation."""
+    resource.setrlimit(resource.RLIMIT_CPU, (limits['cpu_s'], limits['cpu_s']))
+    memory = limits['memory_mb'] * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (0, 0))
+    resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    resource.setrlimit(resource.RLIMIT_NOFILE, (16, 16))
+
+
+def _resolve_entry(namespace, entry):
+    """Find the callable to test: Solution().<entry>, a function named <entry>, or the only public one."""
+    solution_cls = namespace.get('Solution')
+    if isinstance(solution_cls, type):
+        instance = solution_cls()
+        if entry and hasattr(instance, entry):
+            return getattr(instance, entry)
+        methods = [name for name, attr in vars(solution_cls).items() if callable(attr) and not name.startswith('_')]
+        if len(methods) == 1:
+            return getattr(instance, methods[0])
+
+    if entry and callable(namespace.get(entry)):
+        return namespace[entry]
+
+    functions = [value for name, value in namespace.items()
+                 if callable(value) and getattr(value, '__module__', None) == '__sandbox__' and not name.startswith('_')
+                 and not isinstance(value, type)]
+    if len(functions) == 1:
+        return functions[0]
+    return None
+
+
+def main():
+    request = json.load(sys.stdin)
+    real_stdout = sys.stdout
+    # Anything the submission prints must not corrupt the result stream
+    sys.stdout = open(os.devnull, 'w')
+    for module in PRELOADED_MODULES:
+        importlib.import_module(module)
+    try:
+        isolate(request['uid'])
+    except (IsolationError, OSError) as e:
+        real_stdout.write(json.dumps({'compiled': True, 'isolation_error': str(e), 'error': str(e), 'results': []}))
+        real_stdout.flush()
+        return
+    _apply_limits(request['limits'])
+
+    report = {'compiled': True, 'error': None, 'results': []}
+    namespace = {'__name__': '__sandbox__'}
+    try:
+        exec(compile(PRELUDE + request['code'], '<submission>', 'exec'), namespace)
+    except SyntaxError as e:
+        report.update(compiled=False, error=f"SyntaxError: {e.msg} (line {max(1, (e.lineno or 1) - PRELUDE.count(chr(10)))})")
+    except Exception as e:
+        report.update(compiled=False, error=f"{type(e).__name__}: {e}")
+
+    func = _resolve_entry(namespace, request.get('entry')) if report['compiled'] else None
+    if report['compiled'] and func is None:
+        report['error'] = f"Could not find the function to test ({request.get('entry') or 'no entry point'})"
+
+    if func is not None:
+        signal.signal(signal.SIGALRM, _on_alarm)
+        for args in request['tests']:
+            start = time.perf_counter()
+            signal.setitimer(signal.ITIMER_REAL, request.get('test_timeout', 2.0))
+            try:
+                output = func(*args)
+                result = {'status': 'ok', 'output': _jsonable(output)}
+            except TestTimeout:
+                result = {'status': 'timeout'}
+            except RecursionError:
+                result = {'status': 'error', 'error': 'RecursionError: maximum recursion depth exceeded'}
+            except Exception as e:
+                frame = traceback.extract_tb(e.__traceback__)[-1]
+                line = frame.lineno - PRELUDE.count('\n') if frame.filename == '<submission>' else None
+                result = {'status': 'error', 'error': f"{type(e).__name__}: {e}", 'line': line}
+            finally:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+            result['time_ms'] = round((time.perf_counter() - start) * 1000, 2)
+            report['results'].append(result)
+
+    real_stdout.write(json.dumps(report))
+    real_stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
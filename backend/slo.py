@@ -0,0 +1,158 @@
+"""
+Latency SLO controller for ZeroToHire.
+Trades reply length, prompt history and model size for latency when the p95 target is at risk, and restores them as load drops.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from metrics import SLO_DEGRADATION_LEVEL, SLO_DECISIONS_TOTAL, SLO_P95_SECONDS, SLO_MAX_TOKENS
+from model_router import BACKGROUND_REQUEST_TYPES, EVALUATE_CODE
+
+# Configuration
+SLO_ENABLED = os.getenv('SLO_ENABLED', 'True').lower() == 'true'
+P95_TARGET_S = float(os.getenv('SLO_P95_TARGET_S', 20))
+WINDOW_S = float(os.getenv('SLO_WINDOW_S', 120))
+RECOVER_RATIO = float(os.getenv('SLO_RECOVER_RATIO', 0.6))
+COOLDOWN_S = float(os.getenv('SLO_COOLDOWN_S', 15))
+MIN_MAX_TOKENS = int(os.getenv('SLO_MIN_MAX_TOKENS', 96))
+
+DEFAULT_HISTORY_LIMIT = 5
+
+# (max_tokens scale, history messages, route chat to the small model), mildest first
+LEVELS = [
+    (1.0, DEFAULT_HISTORY_LIMIT, False),
+    (0.75, DEFAULT_HISTORY_LIMIT, False),
+    (0.5, 3, False),
+    (0.5, 3, True),
+]
+
+
+class Budget:
+    """Generation limits for one request."""
+
+    def __init__(self, max_tokens: int, history_limit: int):
+        self.max_tokens = max_tokens
+        self.history_limit = history_limit
+
+
+class SLOController:
+    """Picks a degradation level from recent latency, queue depth and decode speed.
+
+    Latencies (queue wait plus generation) of interactive requests are kept for
+    the last SLO_WINDOW_S seconds. The level steps up as soon as the window's
+    p95, or the latency predicted for a request joining the current queue,
+    exceeds the target. It steps back down one level at a time, once both are
+    under SLO_RECOVER_RATIO of the target and SLO_COOLDOWN_S has passed since
+    the last change. A window without samples counts as healthy, and after an
+    idle spell every cooldown that passed restores a level, so the first
+    requests after a quiet period get full quality.
+    """
+
+    def __init__(self, router):
+        self.router = router
+        self.level = 0
+        self._latencies: Deque[Tuple[float, float]] = deque()
+        self._decode_tps: Dict[str, Deque[Tuple[float, float]]] = {tier: deque() for tier in router.models}
+        self._changed_at = 0.0
+        self._lock = threading.Lock()
+        SLO_DEGRADATION_LEVEL.set(0)
+
+    def _trim(self, samples: Deque[Tuple[float, float]], now: float):
+        while samples and samples[0][0] < now - WINDOW_S:
+            samples.popleft()
+
+    def observe(self, tier: str, request_type: str, latency_s: float, completion_tokens: int = 0,
+                decode_s: float = 0.0):
+        """Record a finished generation and re-evaluate the level.
+
+        completion_tokens and decode_s cover the decode phase only (after the
+        first token); leave them out when prefill can't be told apart.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if completion_tokens > 1 and decode_s > 0:
+                self._decode_tps[tier].append((now, completion_tokens / decode_s))
+                self._trim(self._decode_tps[tier], now)
+            if request_type not in BACKGROUND_REQUEST_TYPES:
+                self._latencies.append((now, latency_s))
+                self._trim(self._latencies, now)
+        self.update()
+
+    def p95(self) -> Optional[float]:
+        """p95 latency over the window, or None without samples."""
+        with self._lock:
+            self._trim(self._latencies, time.monotonic())
+            values = sorted(latency for _, latency in self._latencies)
+        if not values:
+            return None
+        return values[min(len(values) - 1, math.ceil(0.95 * len(values)) - 1)]
+
+    def decode_tps(self, tier: str) -> Optional[float]:
+        """Median decode speed of a tier over the window."""
+        with self._lock:
+            self._trim(self._decode_tps[tier], time.monotonic())
+            values = sorted(tps for _, tps in self._decode_tps[tier])
+        return values[len(values) // 2] if values else None
+
+    def predicted_latency(self, tier: str = 'large') -> Optional[float]:
+        """Rough latency of a default-length reply joining the tier's queue now."""
+        tps = self.decode_tps(tier)
+        if not tps:
+            return None
+        per_request = int(os.getenv('MODEL_MAX_TOKENS', 400)) * LEVELS[self.level][0] / tps
+        waves = self.router.load(tier) / self.router.concurrency[tier] + 1
+        return waves * per_request
+
+    def update(self):
+        """Step the level up when the target is at risk, or down when load has dropped."""
+        if not SLO_ENABLED:
+            return
+        p95 = self.p95()
+        predicted = self.predicted_latency()
+        if p95 is not None:
+            SLO_P95_SECONDS.set(p95)
+        signals = [value for value in (p95, predicted) if value is not None]
+        # No recent traffic means nothing is at risk
+        worst = max(signals, default=0.0)
+
+        now = time.monotonic()
+        with self._lock:
+            level = self.level
+            since_change = now - self._changed_at
+            # Degrading reacts faster than restoring, but still lets the previous step take effect
+            if worst > P95_TARGET_S and level < len(LEVELS) - 1 and since_change >= COOLDOWN_S / 3:
+                level += 1
+                action = 'degrade'
+            elif worst < P95_TARGET_S * RECOVER_RATIO and level > 0 and since_change >= COOLDOWN_S:
+                # While idle nobody asked, so catch up on every cooldown that passed
+                steps = 1 if signals else (int(since_change // COOLDOWN_S) if COOLDOWN_S > 0 else level)
+                level = max(0, level - steps)
+                action = 'restore'
+            else:
+                return
+            self.level = level
+            self._changed_at = now
+
+        SLO_DEGRADATION_LEVEL.set(level)
+        SLO_DECISIONS_TOTAL.labels(action=action, level=level).inc()
+        print(f"SLO controller: {action} to level {level} (p95 {p95 or 0:.1f}s, predicted {predicted or 0:.1f}s, "
+              f"target {P95_TARGET_S:g}s)")
+
+    def budget(self, request_type: str, max_tokens: int) -> Budget:
+        """Limits for a request whose normal reply length is max_tokens."""
+        if not SLO_ENABLED:
+            return Budget(max_tokens, DEFAULT_HISTORY_LIMIT)
+        self.update()
+        scale, history_limit, _ = LEVELS[self.level]
+        budget = Budget(max(min(max_tokens, MIN_MAX_TOKENS), int(max_tokens * scale)), history_limit)
+        SLO_MAX_TOKENS.labels(request_type=request_type).set(budget.max_tokens)
+        return budget
+
+    def prefer_small(self, request_type: str) -> bool:
+        """Whether chat turns should go to the small model to protect latency."""
+        return SLO_ENABLED and request_type != EVALUATE_CODE and LEVELS[self.level][2]
@@ -0,0 +1,16 @@
+"""
+Shared fixtures for the ZeroToHire backend tests.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Path for a fresh SQLite database in a temporary directory."""
+    return str(tmp_path / 'data' / 'zerotohire.db')
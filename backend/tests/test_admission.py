@@ -0,0 +1,131 @@
+"""
+Tests for admission control: token buckets, queue bounds and client identity.
+"""
+
+import threading
+import time
+
+import pytest
+
+import admission
+from admission import INTERACTIVE, REVIEW, AdmissionController, AdmissionRejected, TokenBucket, client_address
+from chat_frames import ChatFrames
+from database import Database
+from inference import FakeBackend
+from model_router import CHAT, PREFILL, ModelRouter
+from tutor import CodingTutor
+
+
+def test_bucket_allows_a_burst_then_refills_at_its_rate():
+    bucket = TokenBucket(rate=0.5, burst=2)
+    start = bucket.updated
+
+    assert bucket.take(start) == 0 and bucket.take(start) == 0
+    assert bucket.take(start) == pytest.approx(2.0)
+    assert bucket.take(start + 1.0) == pytest.approx(1.0)
+    assert bucket.take(start + 2.0) == 0
+    # Idle time never stores more than the burst
+    assert [bucket.take(start + 100) for _ in range(3)][2] > 0
+
+
+@pytest.fixture
+def controller(monkeypatch):
+    monkeypatch.setattr(admission, 'ADMISSION_ENABLED', True)
+    monkeypatch.setattr(admission, 'MAX_QUEUE', 4)
+    monkeypatch.setattr(admission, 'LIMITS', {
+        INTERACTIVE: (60.0, 2, 600.0, 3),
+        REVIEW: (6.0, 1, 120.0, 10),
+    })
+    return AdmissionController(ModelRouter({'large': FakeBackend()}))
+
+
+def rejection(controller, client, request_class):
+    with pytest.raises(AdmissionRejected) as info:
+        controller.admit(client, request_class)
+    return info.value
+
+
+def test_each_client_has_its_own_bucket(controller):
+    controller.admit('user:1', INTERACTIVE)
+    controller.admit('user:1', INTERACTIVE)
+    rejected = rejection(controller, 'user:1', INTERACTIVE)
+    assert rejected.reason == 'user_rate' and rejected.retry_after == 1
+
+    controller.admit('user:2', INTERACTIVE)
+    # Classes are limited separately
+    controller.admit('user:1', REVIEW)
+
+
+def test_endpoint_limit_gives_the_client_its_token_back(controller):
+    for client in ('user:1', 'user:2', 'user:3'):
+        controller.admit(client, INTERACTIVE)
+    assert rejection(controller, 'user:4', INTERACTIVE).reason == 'endpoint_rate'
+    assert controller._user_buckets[('user:4', INTERACTIVE)].tokens == pytest.approx(2, abs=0.01)
+
+
+def test_reviews_are_shed_before_chat(controller, monkeypatch):
+    monkeypatch.setattr(controller.router, 'queued', lambda foreground_only=False: 2)
+    rejected = rejection(controller, 'user:1', REVIEW)
+    assert rejected.reason == 'queue_full' and 'busy' in rejected.message
+    controller.admit('user:1', INTERACTIVE)
+
+    monkeypatch.setattr(controller.router, 'queued', lambda foreground_only=False: 4)
+    assert rejection(controller, 'user:1', INTERACTIVE).reason == 'queue_full'
+
+
+def test_background_waiters_dont_fill_the_queue(controller):
+    router = controller.router
+    holding = router.acquire('large', CHAT)
+    holding.__enter__()
+
+    def prefill():
+        with router.acquire('large', PREFILL):
+            pass
+
+    waiters = [threading.Thread(target=prefill) for _ in range(4)]
+    for waiter in waiters:
+        waiter.start()
+    while router.queued() < 4:
+        time.sleep(0.01)
+
+    assert router.queued(foreground_only=True) == 0
+    controller.admit('user:1', INTERACTIVE)
+    controller.admit('user:1', REVIEW)
+    holding.__exit__(None, None, None)
+    for waiter in waiters:
+        waiter.join(timeout=5)
+
+
+def test_disabled_admission_lets_everything_through(controller, monkeypatch):
+    monkeypatch.setattr(admission, 'ADMISSION_ENABLED', False)
+    for _ in range(10):
+        controller.admit('user:1', INTERACTIVE)
+
+
+def test_forwarded_for_is_only_trusted_from_listed_proxies(monkeypatch):
+    monkeypatch.setattr(admission, 'TRUSTED_PROXIES', {'10.0.0.2', '10.0.0.3'})
+
+    assert client_address('10.0.0.2', '203.0.113.7') == '203.0.113.7'
+    # A client can prepend anything; the proxies' own entries are on the right
+    assert client_address('10.0.0.2', '1.1.1.1, 203.0.113.7, 10.0.0.3') == '203.0.113.7'
+    assert client_address('198.51.100.9', '203.0.113.7') == '198.51.100.9'
+    assert client_address('10.0.0.2', None) == '10.0.0.2'
+
+
+def test_only_model_reviews_use_the_review_budget(controller, db_path, monkeypatch):
+    monkeypatch.setenv('FAKE_TOKENS_PER_SEC', '5000')
+    monkeypatch.setenv('FAKE_FIRST_TOKEN_LATENCY_MS', '1')
+    db = Database(db_path)
+    tutor = CodingTutor(None, db, backend='fake')
+    tutor.current_problem = {'id': 0, 'title': 'Two Sum', 'difficulty': 'Easy'}
+    frames = ChatFrames(controller, [])
+    template = {'type': 'evaluate', 'code': 'class Solution:\n    def twoSum(self, nums, target):\n        pass\n'}
+    attempt = {'type': 'evaluate', 'code': 'def twoSum(nums, target):\n    return [0, 1]\n'}
+
+    # Triage answers these without the model, so a budget of one review is never touched
+    for _ in range(3):
+        assert [frame['type'] for frame in frames.chat(tutor, template, 'user:1')] == ['final']
+    assert [frame['type'] for frame in frames.chat(tutor, attempt, 'user:1')][-1] == 'final'
+    rejected = list(frames.chat(tutor, attempt, 'user:1'))
+    assert [frame['type'] for frame in rejected] == ['error'] and rejected[0]['retryAfter'] >= 1
+    db.close()
@@ -0,0 +1,29 @@
+"""
+Tests for the llama.cpp autotuner's calibration workload and cache.
+"""
+
+import autotune
+from inference import FakeBackend
+
+
+HARDWARE = {'physical_cores': 8, 'cgroup_cpu_limit': None, 'usable_cores': 8, 'available_memory': 16 << 30}
+
+
+def test_calibration_prompt_outgrows_every_batch_candidate():
+    tokenize = FakeBackend().tokenize
+    prompt, prompt_tokens = autotune.calibration_prompt(tokenize, max(autotune.BATCH_CANDIDATES))
+
+    assert prompt_tokens == len(tokenize(prompt.encode('utf-8'))) > max(autotune.BATCH_CANDIDATES)
+    assert prompt.endswith('\nAlex:')
+
+
+def test_cache_key_tracks_reserved_threads_and_memory(tmp_path):
+    model = tmp_path / 'model.gguf'
+    model.write_bytes(b'GGUF')
+    key = autotune._cache_key(str(model), HARDWARE, 4096, 0, 2)
+
+    assert autotune._cache_key(str(model), HARDWARE, 4096, 0, 2) == key
+    assert autotune._cache_key(str(model), HARDWARE, 4096, 0, 4) != key
+    assert autotune._cache_key(str(model), {**HARDWARE, 'available_memory': 4 << 30}, 4096, 0, 2) != key
+    # Small fluctuations in free memory keep the cached result
+    assert autotune._cache_key(str(model), {**HARDWARE, 'available_memory': (16 << 30) + (100 << 20)}, 4096, 0, 2) == key
@@ -0,0 +1,82 @@
+"""
+Tests for the llama.cpp parameter sweep in benchmark.py.
+"""
+
+import multiprocessing
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+import benchmark
+from inference import FakeBackend
+
+
+@pytest.fixture
+def fast_fake(monkeypatch):
+    """Make the fake backend quick; the sweep's child processes inherit the environment."""
+    monkeypatch.setenv('FAKE_TOKENS_PER_SEC', '2000')
+    monkeypatch.setenv('FAKE_FIRST_TOKEN_LATENCY_MS', '1')
+
+
+def test_measure_generation_counts_tokenizer_tokens():
+    llm = FakeBackend(tokens_per_sec=2000, first_token_latency=0.001)
+    run = benchmark.measure_generation(llm, 'Explain hash maps.', max_tokens=20)
+
+    # The fake streams one word per chunk but its tokenizer counts 4 bytes per token
+    text = ''.join(llm.reply_tokens[:20])
+    assert run['completion_tokens'] == benchmark.count_tokens(llm, text) != 20
+    assert run['decode_tps'] > 0
+
+
+def test_sweep_reports_every_scenario(fast_fake):
+    results = benchmark.run_sweep(None, [1, 2], [64], [2048], max_tokens=8, backend='fake', timeout=120)
+
+    assert [(r['n_threads'], r['n_batch'], r['n_ctx']) for r in results] == [(1, 64, 2048), (2, 64, 2048)]
+    for result in results:
+        assert 'error' not in result, result['error']
+        assert set(result['scenarios']) == set(benchmark.SWEEP_SCENARIOS)
+        assert all(row['prompt_tokens'] > 0 and row['completion_tokens'] > 0 for row in result['scenarios'].values())
+
+
+def test_sweep_stops_a_configuration_that_hangs(monkeypatch):
+    monkeypatch.setenv('FAKE_TOKENS_PER_SEC', '1')
+    start = time.monotonic()
+    [result] = benchmark.run_sweep(None, [1], [64], [2048], max_tokens=128, backend='fake', timeout=5)
+
+    assert result['error'] == 'timed out after 5s'
+    assert time.monotonic() - start < 30
+    assert not multiprocessing.active_children()
+
+
+def test_sweep_reports_a_configuration_that_crashes(monkeypatch):
+    monkeypatch.setenv('FAKE_TOKENS_PER_SEC', '1')
+    results = []
+    sweep = threading.Thread(target=lambda: results.extend(
+        benchmark.run_sweep(None, [1], [64], [2048], max_tokens=128, backend='fake', timeout=120)
+    ))
+    sweep.start()
+    while not multiprocessing.active_children():
+        time.sleep(0.05)
+    # What the OOM killer would do to a configuration that doesn't fit in memory
+    os.kill(multiprocessing.active_children()[0].pid, signal.SIGKILL)
+    sweep.join(timeout=60)
+
+    assert results == [{'n_threads': 1, 'n_batch': 64, 'n_ctx': 2048, 'error': 'benchmark process exited with code -9'}]
+
+
+def test_sweep_against_a_tiny_gguf():
+    """Set BENCHMARK_TEST_MODEL to a small GGUF (e.g. a stories260K build) to run the real backend."""
+    pytest.importorskip('llama_cpp')
+    model_path = os.getenv('BENCHMARK_TEST_MODEL')
+    if not model_path or not os.path.exists(model_path):
+        pytest.skip('BENCHMARK_TEST_MODEL is not set to a GGUF file')
+
+    [result] = benchmark.run_sweep(model_path, [1], [32], [2048], max_tokens=8, timeout=300)
+
+    assert 'error' not in result, result['error']
+    for row in result['scenarios'].values():
+        assert 0 < row['completion_tokens'] <= 8
+        assert row['ttft_s'] > 0 and row['prefill_tps'] > 0
@@ -0,0 +1,88 @@
+"""
+Tests for the static triage of code submissions in code_triage.py.
+"""
+
+import pytest
+
+from code_triage import triage
+from database import Database
+from tutor import CodingTutor
+
+
+TEMPLATE = '''class Solution:
+    def twoSum(self, nums, target):
+        pass
+'''
+
+SOLUTION = '''class Solution:
+    def twoSum(self, nums, target):
+        for i in range(len(nums)):
+            for j in range(i + 1, len(nums)):
+                if nums[i] + nums[j] == target:
+                    return [i, j]
+        return []
+'''
+
+
+def test_syntax_errors_name_the_line():
+    result = triage('class Solution:\n    def twoSum(self, nums, target)\n        return []\n')
+    assert result.trivial
+    assert result.syntax_error[1] == 2
+    assert 'on line 2' in result.reply()
+
+
+def test_untouched_template_is_trivial_despite_formatting():
+    reformatted = 'class Solution:\n\n    def twoSum(self, nums,   target):\n        """Fill me in."""  # TODO\n        pass\n'
+    result = triage(reformatted, TEMPLATE)
+    assert result.unchanged_template and result.trivial
+    assert 'starting template' in result.reply()
+
+
+def test_empty_bodies_and_missing_functions():
+    result = triage('def helper(x):\n    ...\n\ndef solve(nums):\n    pass\n')
+    assert result.all_empty and result.empty_functions == ['helper', 'solve']
+
+    result = triage('print("hello")\n')
+    assert not result.has_function and result.trivial
+    assert 'solution function' in result.reply()
+
+
+def test_findings_for_real_attempts():
+    result = triage(SOLUTION, TEMPLATE)
+    assert not result.trivial and result.reply() is None
+    assert result.nested_loops == [(4, 2)]
+    assert result.findings() == ["Loops nested 2 deep starting at line 4 (possible O(n^2) hot spot)."]
+
+    result = triage('def solve(nums, target, unused):\n    return [n for row in nums for n in row if n == target]\n')
+    assert result.unused_params == [('solve', ['unused'])]
+    assert result.nested_loops == [(2, 2)]
+
+    # A comprehension inside a loop is another level
+    code = 'def solve(grid):\n    for row in grid:\n        total = sum([x * y for x in row for y in row])\n    return total\n'
+    assert triage(code).nested_loops == [(3, 3)]
+
+
+def test_nested_functions_are_not_counted_as_nesting():
+    code = 'def solve(grid):\n    for row in grid:\n        def check(row):\n            for cell in row:\n                pass\n        check(row)\n'
+    assert triage(code).nested_loops == []
+
+
+@pytest.fixture
+def tutor(db_path):
+    db = Database(db_path)
+    tutor = CodingTutor(None, db, backend='fake')
+    tutor.current_problem = {'id': 0, 'title': 'Two Sum', 'difficulty': 'Easy'}
+    yield tutor
+    db.close()
+
+
+def test_trivial_submissions_never_reach_the_model(tutor, monkeypatch):
+    monkeypatch.setattr(tutor, '_generate', lambda *args, **kwargs: pytest.fail('the model was called'))
+    monkeypatch.setattr(tutor, '_generate_stream', lambda *args, **kwargs: pytest.fail('the model was called'))
+    record = {'python': TEMPLATE}
+
+    reply = tutor.evaluate_code(TEMPLATE, 'python', record)
+    assert 'starting template' in reply
+    events = list(tutor.evaluate_code_stream('def twoSum(:\n', 'python', record))
+    assert [event['type'] for event in events] == ['final'] and "can't parse" in events[0]['message']
+    assert [message['role'] for message in tutor.conversation_history][-2:] == ['alex', 'alex']
@@ -0,0 +1,137 @@
+"""
+Tests for shard rebalancing and the backups taken around it.
+"""
+
+import glob
+import os
+
+import pytest
+
+import db_maintenance
+from database import Database, SHARDED_TABLES, read_shard_count, shard_index
+from db_shards import rebalance, shard_status
+
+
+def fill(db, users=12):
+    """A few users (and anonymous rows) with data in every user-scoped table."""
+    user_ids = [db.create_user(f"user{i}", f"user{i}@example.com", 'hash') for i in range(users)]
+    for user_id in user_ids + [None]:
+        for problem_id in (1, 2):
+            db.set_problem(problem_id, f"Problem {problem_id}", 'Easy', user_id=user_id)
+            db.save_message('user', f"stuck on {problem_id}", problem_id=problem_id, user_id=user_id)
+            db.save_message('alex', f"hint for {problem_id}", problem_id=problem_id, user_id=user_id)
+            db.save_code(problem_id, f"# attempt by {user_id}", user_id=user_id)
+        db.mark_problem_complete(1, user_id=user_id)
+        db.save_setting('theme', f"theme-{user_id}", user_id=user_id)
+    return user_ids
+
+
+def snapshot(db, user_ids):
+    """Everything a user can see, per user."""
+    return {
+        user_id: (
+            [(m['role'], m['content'], m['problem_id']) for m in db.get_conversation_history(user_id=user_id)],
+            sorted(db.get_completed_problems(user_id=user_id)),
+            [db.get_code_history(problem_id, user_id=user_id)[0]['code'] for problem_id in (1, 2)],
+            db.get_setting('theme', user_id=user_id),
+        )
+        for user_id in user_ids
+    }
+
+
+def totals(db):
+    counts = shard_status(db).values()
+    return {table: sum(count[table] for count in counts) for table in SHARDED_TABLES}
+
+
+@pytest.fixture
+def elsewhere(tmp_path, monkeypatch):
+    """Run from a working directory unrelated to the database's."""
+    cwd = tmp_path / 'elsewhere'
+    cwd.mkdir()
+    monkeypatch.chdir(cwd)
+    return cwd
+
+
+def test_rebalance_out_and_back_keeps_every_row(db_path, elsewhere):
+    db = Database(db_path, shards=1)
+    user_ids = fill(db)
+    before, before_totals = snapshot(db, user_ids), totals(db)
+    db.close()
+
+    moved = rebalance(db_path, 3)
+    assert sum(moved.values()) > 0 and read_shard_count(db_path) == 3
+    db = Database(db_path, shards=3)
+    assert snapshot(db, user_ids) == before and totals(db) == before_totals
+    # Every row sits in the shard its user maps to
+    for index, conn in enumerate(db.shards):
+        for row in conn.execute("SELECT DISTINCT user_id FROM conversations"):
+            assert shard_index(row['user_id'], 3) == index
+    db.close()
+
+    rebalance(db_path, 1)
+    db = Database(db_path, shards=1)
+    assert snapshot(db, user_ids) == before and totals(db) == before_totals
+    db.close()
+
+
+def test_rerun_after_an_interrupted_copy_does_not_duplicate(db_path, elsewhere):
+    db = Database(db_path, shards=1)
+    user_ids = fill(db, users=4)
+    before, before_totals = snapshot(db, user_ids), totals(db)
+    db.close()
+
+    # What a crash between committing the copies and deleting the originals leaves behind
+    moving = next(user_id for user_id in user_ids if shard_index(user_id, 3) != 0)
+    source = Database(db_path, shards=1)
+    target = Database(db_path, shards=3, check_layout=False)
+    columns = [row['name'] for row in source.conn.execute("PRAGMA table_info(conversations)") if row['name'] != 'id']
+    rows = source.conn.execute(
+        f"SELECT {', '.join(columns)} FROM conversations WHERE user_id = ?", (moving,)
+    ).fetchall()
+    target._shard(moving).executemany(
+        f"INSERT INTO conversations ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+        [tuple(row) for row in rows]
+    )
+    target._shard(moving).commit()
+    source.close()
+    target.close()
+
+    rebalance(db_path, 3)
+    db = Database(db_path, shards=3)
+    assert snapshot(db, user_ids) == before and totals(db) == before_totals
+    db.close()
+
+
+def test_backups_are_unique_and_next_to_the_database(db_path, elsewhere):
+    db = Database(db_path, shards=1)
+    fill(db, users=2)
+    db.close()
+
+    rebalance(db_path, 2)
+    rebalance(db_path, 1)
+
+    backup_dir = os.path.join(os.path.dirname(db_path), 'backups')
+    backups = sorted(glob.glob(os.path.join(backup_dir, '*-before-rebalance-*.db')))
+    # One single-file backup, then one of the two-shard layout: its global file plus one file per shard
+    assert len([path for path in backups if '.shard' not in path]) == 2
+    assert len(backups) == 4
+    assert not os.listdir(elsewhere)
+
+
+def test_scheduled_rotation_keeps_rebalance_backups(db_path, elsewhere, monkeypatch):
+    monkeypatch.setattr(db_maintenance, 'BACKUP_KEEP', 1)
+    db = Database(db_path, shards=1)
+    fill(db, users=2)
+    db.close()
+    rebalance(db_path, 1)
+
+    db = Database(db_path, shards=1)
+    scheduler = db_maintenance.MaintenanceScheduler(db)
+    for _ in range(3):
+        assert scheduler.run_task('backup')['error'] is None
+    db.close()
+
+    names = os.listdir(os.path.join(os.path.dirname(db_path), 'backups'))
+    assert len([name for name in names if 'before-rebalance' in name]) == 1
+    assert len([name for name in names if 'before-rebalance' not in name]) == 1
@@ -0,0 +1,172 @@
+"""
+Tests for hint ladders: parsing generations, filling them in and serving them rung by rung.
+"""
+
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from database import Database
+import hint_ladder
+from hint_ladder import HintLadders, parse_ladder
+from inference import FakeBackend
+from tutor import CodingTutor
+
+
+LADDER = [
+    "What do you need to remember about the numbers you have already seen?",
+    "A hash map from value to index gives constant-time lookups of the complement.",
+    "One pass: O(n) time and O(n) space for the map.",
+    "for each index i: if target - nums[i] is in the map, return both indices; else store nums[i].",
+]
+GENERATION = (f" {LADDER[0]}\nAPPROACH: {LADDER[1]}\n**Complexity**: {LADDER[2]}\nCODE: {LADDER[3]}")
+PROBLEMS = [{'title': f"Problem {i}", 'difficulty': 'Easy', 'content': '<p>Find two numbers.</p>', 'python': ''}
+            for i in range(5)]
+
+
+def test_parse_ladder_reads_every_level():
+    assert parse_ladder(GENERATION) == LADDER
+
+
+def test_parse_ladder_rejects_a_missing_level():
+    assert parse_ladder(GENERATION.split('\nCODE:')[0]) is None
+
+
+@pytest.fixture
+def db(db_path):
+    db = Database(db_path)
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def tutor(db, monkeypatch):
+    monkeypatch.setenv('FAKE_TOKENS_PER_SEC', '5000')
+    monkeypatch.setenv('FAKE_FIRST_TOKEN_LATENCY_MS', '1')
+    tutor = CodingTutor(None, db, backend='fake')
+    tutor.hint_ladders = HintLadders(tutor, db, PROBLEMS)
+    return tutor
+
+
+def user(db, name):
+    return db.create_user(name, f"{name}@example.com", 'hash')
+
+
+def select(tutor, problem_id, user_id=None):
+    tutor.db.set_problem(problem_id, PROBLEMS[problem_id]['title'], 'Easy', user_id=user_id)
+    tutor.set_user_context(user_id)
+
+
+def test_generate_stores_the_ladder(tutor, db):
+    tutor.router.models['large'] = FakeBackend(tokens_per_sec=5000, first_token_latency=0, reply=GENERATION)
+
+    assert tutor.hint_ladders.generate(2) == LADDER
+    assert db.get_hint_ladder(2, tutor.llm.model_version) == LADDER
+    assert 2 not in tutor.hint_ladders._candidates()
+
+
+def test_worker_writes_on_its_own_connection(tutor, db):
+    tutor.router.models['large'] = FakeBackend(tokens_per_sec=5000, first_token_latency=0, reply=GENERATION)
+    worker_db = db.open_worker()
+    ladders = HintLadders(tutor, db, PROBLEMS, worker_db=worker_db)
+    # A request mid-transaction: the worker waits for it instead of committing the request's writes
+    db.conn.execute("INSERT INTO problems (user_id, problem_id, title) VALUES (NULL, 4, 'Problem 4')")
+    worker = threading.Thread(target=ladders.generate, args=(2,))
+    worker.start()
+    time.sleep(0.2)
+    db.conn.rollback()
+    worker.join(timeout=10)
+
+    assert db.get_current_problem() is None
+    assert ladders.get(2) == LADDER
+    worker_db.close()
+
+
+def test_worker_survives_database_errors(tutor, db, monkeypatch):
+    tutor.router.models['large'] = FakeBackend(tokens_per_sec=5000, first_token_latency=0, reply=GENERATION)
+    monkeypatch.setattr(hint_ladder, 'POLL_SECONDS', 0.01)
+    monkeypatch.setattr(hint_ladder, 'IDLE_SECONDS', 0)
+    hinted = db.get_hinted_problems
+    failures = []
+
+    def locked_at_first(model_version):
+        if len(failures) < 3:
+            failures.append(1)
+            raise sqlite3.OperationalError('database is locked')
+        return hinted(model_version)
+
+    monkeypatch.setattr(db, 'get_hinted_problems', locked_at_first)
+    tutor.hint_ladders.start()
+    deadline = time.monotonic() + 10
+    while db.get_hint_ladder(0, tutor.llm.model_version) == [] and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert len(failures) == 3
+    assert db.get_hint_ladder(0, tutor.llm.model_version) == LADDER
+
+
+def test_candidates_put_popular_problems_first(tutor, db):
+    for name in ('alice', 'bob'):
+        db.set_problem(3, 'Problem 3', 'Easy', user_id=user(db, name))
+    db.save_hint_ladder(0, tutor.llm.model_version, LADDER)
+
+    assert tutor.hint_ladders._candidates() == [3, 1, 2, 4]
+
+
+def test_hints_are_served_one_rung_at_a_time(tutor, db):
+    db.save_hint_ladder(1, tutor.llm.model_version, LADDER)
+    select(tutor, 1)
+
+    replies = [tutor.next_hint() for _ in range(5)]
+    assert [reply.split(':')[0] for reply in replies[:4]] == [
+        'Hint 1/4 (nudge)', 'Hint 2/4 (approach)', 'Hint 3/4 (complexity)', 'Hint 4/4 (code)'
+    ]
+    assert LADDER[3] in replies[3]
+    # Past the last rung the question goes to the model
+    assert replies[4] is None
+
+
+def test_hint_progress_survives_a_restart_and_clears_with_the_chat(tutor, db):
+    db.save_hint_ladder(1, tutor.llm.model_version, LADDER)
+    alice = user(db, 'alice')
+    select(tutor, 1, user_id=alice)
+    tutor.next_hint()
+    tutor.next_hint()
+
+    restarted = CodingTutor(None, db, user_id=alice, backend='fake')
+    restarted.hint_ladders = HintLadders(restarted, db, PROBLEMS)
+    assert restarted.next_hint().startswith('Hint 3/4')
+
+    restarted.clear_chat()
+    assert restarted.next_hint().startswith('Hint 1/4')
+
+
+def test_hint_progress_is_per_user(tutor, db):
+    db.save_hint_ladder(1, tutor.llm.model_version, LADDER)
+    alice_id, bob_id = user(db, 'alice'), user(db, 'bob')
+    select(tutor, 1, user_id=alice_id)
+    tutor.next_hint()
+    alice = tutor.session(alice_id)
+    bob = tutor.session(None)
+    select(bob, 1, user_id=bob_id)
+
+    assert alice.next_hint().startswith('Hint 2/4')
+    assert bob.next_hint().startswith('Hint 1/4')
+
+
+def test_older_databases_get_the_progress_column(db_path, tmp_path):
+    legacy = str(tmp_path / 'legacy' / 'zerotohire.db')
+    Database(legacy).close()
+    conn = sqlite3.connect(legacy)
+    conn.execute("ALTER TABLE problems DROP COLUMN hints_shown")
+    conn.execute("INSERT INTO problems (user_id, problem_id, title) VALUES (NULL, 1, 'Problem 1')")
+    conn.commit()
+    conn.close()
+
+    db = Database(legacy)
+    assert db.get_hints_shown(1) == 0
+    db.set_hints_shown(1, 2)
+    assert db.get_hints_shown(1) == 2
+    db.close()
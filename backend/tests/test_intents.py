@@ -0,0 +1,108 @@
+"""
+Tests for intent routing: which messages are answered without the model, and what they change.
+"""
+
+import pytest
+
+from chat_frames import ChatFrames
+from database import Database
+from intents import router
+from problem_catalog import ProblemCatalog
+from recommender import Recommender
+from tutor import CodingTutor
+
+
+PROBLEMS = [
+    {'title': 'Two Sum', 'difficulty': 'Easy', 'problem_types': 'Array, Hash Table'},
+    {'title': 'Contains Duplicate', 'difficulty': 'Easy', 'problem_types': 'Array, Hash Table'},
+    {'title': 'Group Anagrams', 'difficulty': 'Medium', 'problem_types': 'Array, Hash Table, String'},
+]
+
+
+@pytest.fixture
+def db(db_path):
+    db = Database(db_path)
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def tutor(db):
+    user_id = db.create_user('ada', 'ada@example.com', 'hash')
+    tutor = CodingTutor(None, db, backend='fake').session(user_id)
+    tutor.set_problem({'id': 0, 'title': 'Two Sum', 'difficulty': 'Easy'})
+    return tutor
+
+
+@pytest.mark.parametrize('message', [
+    'thanks!', 'Thank you so much', 'ok', 'got it 👍', 'makes sense.',
+    'next problem please', 'what should I solve next?', 'can we try another one',
+    '/help', '/HELP', '/done!', 'mark it as complete', 'Please mark this completed.',
+])
+def test_recognized_messages(tutor, message):
+    assert router.route(tutor, message) is not None
+
+
+@pytest.mark.parametrize('message', [
+    'thanks, but why does this loop never end?',
+    'ok so what if the array is empty',
+    'how do I find the next problem in a linked list',
+    "I'm done with the first loop, what about the second?",
+    "ugh, I'm done", "I'm done!", 'mark it as done',
+    'what is a hint of recursion',
+])
+def test_questions_go_to_the_model(tutor, message):
+    assert router.route(tutor, message) is None
+
+
+def test_unknown_commands_are_answered_without_being_recorded(tutor):
+    result = router.route(tutor, '/nope now')
+    assert 'Unknown command /nope' in result.reply
+    assert result.role == 'system' and not result.record_user_message
+
+
+def test_help_lists_each_command_once(tutor):
+    reply = router.route(tutor, '/help').reply
+    assert reply.count('Mark the current problem as completed') == 1
+    assert '/done - ' in reply and '/hint - ' in reply
+
+
+def test_marking_complete_updates_the_database(tutor, db):
+    result = router.route(tutor, 'Please mark this as completed!')
+    assert result.completion_changed
+    assert db.get_completed_problems(user_id=tutor.user_id) == [0]
+
+    # Typed variants of a command still run it
+    assert router.route(tutor, '/done!').completion_changed
+
+    tutor.current_problem = None
+    result = router.route(tutor, '/done')
+    assert not result.completion_changed and 'No problem' in result.reply
+
+
+def test_hints_without_a_ladder_go_to_the_model(tutor):
+    # No stored ladder, so both the command and the phrase fall through
+    assert router.route(tutor, '/hint') is None
+    assert router.route(tutor, "I'm really stuck on this one") is None
+
+
+def test_clear_empties_the_stored_conversation(tutor, db):
+    tutor._add_message_to_history('user', 'How do I start?')
+    router.apply(tutor, '/reset', router.route(tutor, '/reset'))
+
+    # Only the confirmation is left; the command itself isn't recorded
+    assert [message['role'] for message in tutor.conversation_history] == ['system']
+    assert [message['role'] for message in db.get_conversation_history(0, user_id=tutor.user_id)] == ['system']
+
+
+def test_routed_turns_refresh_recommendations(tutor):
+    recommender = Recommender(ProblemCatalog(PROBLEMS))
+    frames = ChatFrames(admission=None, problems=PROBLEMS, recommender=recommender)
+
+    reply = frames.route_intent(tutor, 'what should I do next?').reply
+    assert '- Two Sum (Easy)' in reply
+    # Completing through a routed command invalidates the cached recommendations
+    frames.route_intent(tutor, '/done')
+    reply = frames.route_intent(tutor, 'next problem').reply
+    assert 'Two Sum' not in reply and '- Contains Duplicate (Easy)' in reply
+    assert [message['role'] for message in tutor.conversation_history][-2:] == ['user', 'alex']
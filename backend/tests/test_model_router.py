@@ -0,0 +1,58 @@
+"""
+Tests for tier routing over model_server.py workers: shared slots and prefix affinity.
+"""
+
+import threading
+import time
+
+from inference import SocketBackend, WorkerAffinity
+from model_router import ModelRouter
+
+
+def socket_tiers(workers):
+    affinity = WorkerAffinity([f"/tmp/model.sock.{i}" for i in range(workers)])
+    return {tier: SocketBackend('/tmp/model.sock', tier, workers, affinity=affinity) for tier in ('large', 'small')}
+
+
+def test_tiers_on_one_server_share_its_workers():
+    router = ModelRouter(socket_tiers(2))
+    running = []
+    peak = []
+
+    def generate(tier):
+        with router.acquire(tier):
+            running.append(tier)
+            peak.append(len(running))
+            time.sleep(0.05)
+            running.remove(tier)
+
+    threads = [threading.Thread(target=generate, args=(tier,)) for tier in ('large', 'small') * 3]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(peak) == 2
+
+
+def test_completions_follow_their_prefill():
+    affinity = WorkerAffinity(['w0', 'w1'])
+    with affinity.worker('large', 'SYSTEM problem A') as prefill_a:
+        with affinity.worker('large', 'SYSTEM problem B') as prefill_b:
+            pass
+    with affinity.worker('large', 'SYSTEM problem B\nStudent: hi') as reply_b:
+        with affinity.worker('large', 'SYSTEM problem A\nStudent: hi') as reply_a:
+            pass
+
+    assert prefill_a != prefill_b
+    assert (reply_a, reply_b) == (prefill_a, prefill_b)
+
+
+def test_affinity_is_tracked_per_tier():
+    affinity = WorkerAffinity(['w0', 'w1'])
+    with affinity.worker('large', 'SYSTEM problem A') as large:
+        with affinity.worker('small', 'SYSTEM problem A') as small:
+            pass
+    # Only w1's small model has evaluated the prompt, whatever w0's large model holds
+    with affinity.worker('small', 'SYSTEM problem A\nStudent: hi') as reply:
+        assert reply == small != large
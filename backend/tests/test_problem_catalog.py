@@ -0,0 +1,127 @@
+"""
+Tests for problem search and autocomplete in problem_catalog.py, against a small synthetic problem set.
+"""
+
+import pytest
+
+import problem_catalog
+from problem_catalog import ProblemCatalog, allowed_edits, edit_distance
+
+
+PROBLEMS = [
+    {'title': 'Two Sum', 'difficulty': 'Easy', 'problem_types': 'Array, Hash Table',
+     'content': '<p>Given an array of integers, return indices of the two numbers that add up to a target.</p>'},
+    {'title': 'Valid Parentheses', 'difficulty': 'Easy', 'problem_types': 'String, Stack',
+     'content': '<p>Determine if the input string of brackets is valid.</p>'},
+    {'title': 'Merge Intervals', 'difficulty': 'Medium', 'problem_types': 'Array, Sorting',
+     'content': '<p>Merge all overlapping intervals in an array of intervals.</p>'},
+    {'title': 'LRU Cache', 'difficulty': 'Medium', 'problem_types': 'Hash Table, Design',
+     'content': '<p>Design a cache with a hash map and a linked list.</p>'},
+    {'title': 'Longest Substring Without Repeating Characters', 'difficulty': 'Medium',
+     'problem_types': 'String, Hash Table, Sliding Window',
+     'content': '<p>Find the length of the longest substring without repeating characters, '
+                'using a sliding window and a hash set.</p>'},
+    {'title': 'Median of Two Sorted Arrays', 'difficulty': 'Hard', 'problem_types': 'Array, Binary Search',
+     'content': '<p>Return the median of two sorted arrays. The overall run time should be logarithmic.</p>'},
+    {'title': 'Word Ladder', 'difficulty': 'Hard', 'problem_types': 'Hash Table, String, Breadth-First Search',
+     'content': '<p>Return the number of words in the shortest transformation sequence.</p>'},
+]
+
+
+@pytest.fixture
+def catalog():
+    return ProblemCatalog(PROBLEMS)
+
+
+def titles(results):
+    return [summary['title'] for summary in results]
+
+
+def test_title_matches_outrank_description_matches(catalog):
+    # Both have 'two' in the title and description; the shorter problem ranks first
+    results, total = catalog.search('two')
+    assert total == 2
+    assert titles(results) == ['Two Sum', 'Median of Two Sorted Arrays']
+
+    # Equally rare terms: one in the title (and description), the other only in the description
+    scores = dict(catalog._rank('substring'))
+    assert scores[4] > dict(catalog._rank('window'))[4]
+
+
+def test_rare_terms_weigh_more(catalog):
+    # Both terms appear in Merge Intervals; 'array' is common, 'overlapping' is not
+    ranked = catalog._rank('array overlapping')
+    assert [pid for pid, _ in ranked] == [2]
+    array_only = dict(catalog._rank('array'))
+    overlapping_only = dict(catalog._rank('overlapping'))
+    assert overlapping_only[2] > array_only[2]
+
+
+def test_terms_are_anded_and_the_last_is_a_prefix(catalog):
+    assert titles(catalog.search('sliding wind')[0]) == ['Longest Substring Without Repeating Characters']
+    assert titles(catalog.search('interv')[0]) == ['Merge Intervals']
+    # Earlier terms only match whole words unless they end in '*'
+    assert catalog.search('interv merge') == ([], 0)
+    assert titles(catalog.search('interv* merge')[0]) == ['Merge Intervals']
+    assert catalog.search('parentheses cache') == ([], 0)
+
+
+def test_markup_is_not_indexed(catalog):
+    assert 'p' not in catalog._postings
+    assert catalog.search('p given') == ([], 0)
+
+
+def test_filters_combine_with_the_query(catalog):
+    results, total = catalog.search('', difficulties=['Hard'])
+    assert total == 2 and titles(results) == ['Median of Two Sorted Arrays', 'Word Ladder']
+
+    # Every selected type must be present
+    results, _ = catalog.search('', types=['Hash Table', 'String'])
+    assert titles(results) == ['Longest Substring Without Repeating Characters', 'Word Ladder']
+
+    results, total = catalog.search('two', difficulties=['Easy'])
+    assert total == 1 and titles(results) == ['Two Sum']
+
+
+def test_pagination(catalog):
+    first, total = catalog.search('', per_page=3)
+    second, _ = catalog.search('', page=2, per_page=3)
+    assert total == len(PROBLEMS)
+    assert titles(first) + titles(second) == [problem['title'] for problem in PROBLEMS[:6]]
+
+
+def test_edit_distance():
+    assert edit_distance('kitten', 'sitting') == 3
+    assert edit_distance('', 'abc') == 3
+    assert edit_distance('same', 'same') == 0
+    assert [allowed_edits(query) for query in ('lr', 'merg', 'parenthes')] == [0, 1, 2]
+
+
+def test_autocomplete_matches_word_prefixes(catalog):
+    assert titles(catalog.autocomplete('merge int')) == ['Merge Intervals']
+    # Any word of the title can start the match; earlier words rank first
+    assert titles(catalog.autocomplete('two')) == ['Two Sum', 'Median of Two Sorted Arrays']
+    assert catalog.autocomplete('   ') == []
+
+
+def test_autocomplete_tolerates_typos(catalog):
+    assert titles(catalog.autocomplete('parantheses')) == ['Valid Parentheses']
+    assert titles(catalog.autocomplete('ladedr')) == ['Word Ladder']
+    assert titles(catalog.autocomplete('longest substing'))[0] == 'Longest Substring Without Repeating Characters'
+    # Short queries must match exactly
+    assert catalog.autocomplete('lx') == []
+
+
+def test_autocomplete_limit_and_cache(catalog, monkeypatch):
+    assert len(catalog.autocomplete('s', limit=2)) <= 2
+    first = catalog.autocomplete('Merge!')
+    # The same normalized query is served from the cache
+    monkeypatch.setattr(problem_catalog, 'edit_distance', lambda a, b: pytest.fail('not cached'))
+    assert catalog.autocomplete('merge') is first
+
+    monkeypatch.undo()
+    monkeypatch.setattr(problem_catalog, 'AUTOCOMPLETE_CACHE_SIZE', 1)
+    catalog = ProblemCatalog(PROBLEMS)
+    catalog.autocomplete('valid')
+    catalog.autocomplete('word')
+    assert list(catalog._autocomplete_cache) == [('word', 8)]
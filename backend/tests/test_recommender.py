@@ -0,0 +1,101 @@
+"""
+Tests for problem recommendations in recommender.py, with completions stored in a temporary database.
+"""
+
+import numpy as np
+import pytest
+
+from database import Database
+from problem_catalog import ProblemCatalog
+from recommender import Recommender
+
+
+PROBLEMS = [
+    {'title': 'Two Sum', 'difficulty': 'Easy', 'problem_types': 'Array, Hash Table'},
+    {'title': 'Valid Parentheses', 'difficulty': 'Easy', 'problem_types': 'String, Stack'},
+    {'title': 'Contains Duplicate', 'difficulty': 'Easy', 'problem_types': 'Array, Hash Table'},
+    {'title': 'Group Anagrams', 'difficulty': 'Medium', 'problem_types': 'Array, Hash Table, String'},
+    {'title': 'Daily Temperatures', 'difficulty': 'Medium', 'problem_types': 'Stack, Monotonic Stack'},
+    {'title': 'First Missing Positive', 'difficulty': 'Hard', 'problem_types': 'Array, Hash Table'},
+    {'title': 'Largest Rectangle in Histogram', 'difficulty': 'Hard', 'problem_types': 'Stack, Monotonic Stack'},
+    {'title': 'Word Break', 'difficulty': 'Medium', 'problem_types': 'Dynamic Programming'},
+]
+
+
+@pytest.fixture
+def recommender():
+    return Recommender(ProblemCatalog(PROBLEMS))
+
+
+@pytest.fixture
+def db(db_path):
+    db = Database(db_path)
+    yield db
+    db.close()
+
+
+def complete(db, user_id, problem_id):
+    db.set_problem(problem_id, PROBLEMS[problem_id]['title'], PROBLEMS[problem_id]['difficulty'], user_id=user_id)
+    db.mark_problem_complete(problem_id, user_id=user_id)
+
+
+def titles(results):
+    return [result['title'] for result in results]
+
+
+def test_new_users_start_with_easy_problems(recommender):
+    results = recommender.recommend(None, lambda: [], limit=3)
+    assert titles(results) == ['Two Sum', 'Valid Parentheses', 'Contains Duplicate']
+    assert all(result['matched_types'] == [] for result in results)
+
+
+def test_ties_keep_catalog_order():
+    # Far more equally easy problems than recommendations, where a partial sort picks arbitrary ones
+    problems = [{'title': f"Problem {i}", 'difficulty': 'Medium' if i < 3 else 'Easy', 'problem_types': 'Array'}
+                for i in range(3000)]
+    recommender = Recommender(ProblemCatalog(problems))
+    assert [result['id'] for result in recommender.recommend(None, lambda: [], limit=5)] == [3, 4, 5, 6, 7]
+
+
+def test_recommendations_follow_completed_topics_one_step_harder(recommender, db):
+    user_id = db.create_user('ada', 'ada@example.com', 'hash')
+    for problem_id in (0, 2):
+        complete(db, user_id, problem_id)
+
+    results = recommender.recommend(user_id, lambda: db.get_completed_problems(user_id=user_id), limit=3)
+    # Same topics at Medium beat the same topics at Hard, which beat unrelated problems
+    assert titles(results)[:2] == ['Group Anagrams', 'First Missing Positive']
+    assert results[0]['matched_types'] == ['Array', 'Hash Table']
+    assert results[0]['score'] > results[1]['score'] > results[2]['score']
+    assert not {'Two Sum', 'Contains Duplicate'} & set(titles(results))
+
+
+def test_completed_problems_are_never_recommended(recommender):
+    scores = recommender.scores([1, 4, 99])
+    assert np.isneginf(scores[[1, 4]]).all()
+    assert np.isfinite(np.delete(scores, [1, 4])).all()
+
+    everything = range(len(PROBLEMS))
+    assert recommender.recommend(7, lambda: everything, limit=5) == []
+
+
+def test_cached_until_invalidated(recommender, db):
+    user_id = db.create_user('ada', 'ada@example.com', 'hash')
+    loads = []
+
+    def load():
+        loads.append(1)
+        return db.get_completed_problems(user_id=user_id)
+
+    first = recommender.recommend(user_id, load, limit=3)
+    assert recommender.recommend(user_id, load, limit=2) == first[:2]
+    assert len(loads) == 1
+    # A longer list than the cached one is recomputed
+    recommender.recommend(user_id, load, limit=5)
+    assert len(loads) == 2
+
+    complete(db, user_id, 0)
+    assert 'Two Sum' in titles(recommender.recommend(user_id, load, limit=5))
+    recommender.invalidate(user_id)
+    assert 'Two Sum' not in titles(recommender.recommend(user_id, load, limit=5))
+    assert len(loads) == 3
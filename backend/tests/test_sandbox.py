@@ -0,0 +1,76 @@
+"""
+Tests for the code sandbox: submissions can't touch the host.
+"""
+
+import os
+
+import pytest
+
+import sandbox
+
+
+def run(code):
+    """Run a zero-argument function f in the sandbox and return its single result."""
+    report = sandbox.execute(code, 'f', [[]])
+    assert 'isolation_error' not in report, report['isolation_error']
+    return report['results'][0]
+
+
+@pytest.fixture(autouse=True)
+def require_isolation():
+    if not sandbox.isolation_available():
+        pytest.skip("this host can't create the sandbox's namespaces")
+
+
+def test_plain_solution_runs():
+    result = run("class Solution:\n    def f(self):\n        return sorted(Counter('aab').items())\n")
+    assert result == {'status': 'ok', 'output': [['a', 2], ['b', 1]], 'time_ms': result['time_ms']}
+
+
+def test_host_files_are_invisible(tmp_path):
+    secret = tmp_path / '.env'
+    secret.write_text('JWT_SECRET_KEY=hunter2')
+    result = run(f"def f():\n    return open({str(secret)!r}).read()\n")
+    assert result['status'] == 'error' and 'hunter2' not in str(result)
+    assert run("def f():\n    import os\n    return os.listdir('/')\n")['output'] == []
+
+
+def test_host_files_cant_be_deleted(tmp_path):
+    victim = tmp_path / 'victim.txt'
+    victim.write_text('keep me')
+    result = run(f"def f():\n    import os\n    os.remove({str(victim)!r})\n    return 'removed'\n")
+    assert result['status'] == 'error'
+    assert victim.exists()
+
+
+def test_network_is_unreachable():
+    # Raw syscalls through ctypes, so no Python-level patching could be what stops it
+    code = (
+        "def f():\n"
+        "    import ctypes, struct\n"
+        "    libc = ctypes.CDLL(None, use_errno=True)\n"
+        "    fd = libc.socket(2, 1, 0)\n"
+        "    address = struct.pack('=H', 2) + struct.pack('!H4s8x', 80, bytes([1, 1, 1, 1]))\n"
+        "    return libc.connect(fd, address, 16)\n"
+    )
+    assert run(code)['output'] == -1
+
+
+def test_server_process_cant_be_signalled():
+    assert run("def f():\n    import os\n    return os.getppid()\n")['output'] == 0
+    result = run(f"def f():\n    import os\n    os.kill({os.getpid()}, 0)\n    return 'signalled'\n")
+    assert result['status'] == 'error' and 'ProcessLookupError' in result['error']
+
+
+def test_runs_unprivileged_and_cant_fork():
+    assert run("def f():\n    import os\n    return os.getuid()\n")['output'] == sandbox.SANDBOX_UID
+    assert run("def f():\n    import os\n    return os.fork()\n")['status'] == 'error'
+
+
+def test_node_detection_ignores_prose():
+    assert sandbox.is_supported("class Solution:\n    def f(self, s):\n        # like Node's Array.sort\n        return s\n")
+    assert not sandbox.is_supported("class Solution:\n    def f(self, head: Optional[ListNode]):\n        return head\n")
+    assert not sandbox.is_supported("class Solution:\n    def f(self, root: 'Optional[TreeNode]'):\n        return root\n")
+    assert not sandbox.is_supported(
+        'class Solution:\n    def f(self, nums):\n        """\n        Do not return anything, modify nums in-place.\n        """\n'
+    )
@@ -0,0 +1,110 @@
+"""
+Tests for the latency SLO controller and the samples the tutor feeds it.
+"""
+
+import time
+
+import pytest
+
+import slo
+from database import Database
+from inference import FakeBackend
+from model_router import CHAT, CHAT_STREAM, HINT_LADDER, ModelRouter
+from tutor import CodingTutor
+
+
+@pytest.fixture
+def controller(monkeypatch):
+    monkeypatch.setattr(slo, 'SLO_ENABLED', True)
+    monkeypatch.setattr(slo, 'P95_TARGET_S', 10.0)
+    monkeypatch.setattr(slo, 'COOLDOWN_S', 0.0)
+    monkeypatch.setattr(slo, 'WINDOW_S', 0.2)
+    return slo.SLOController(ModelRouter({'large': FakeBackend(), 'small': FakeBackend()}))
+
+
+def test_levels_step_up_one_at_a_time_and_back_down(controller):
+    for expected in (1, 2, 3, 3):
+        controller.observe('large', CHAT, 15.0)
+        assert controller.level == expected
+    assert controller.prefer_small(CHAT) and controller.budget(CHAT, 400).history_limit == 3
+
+    # Once the slow samples leave the window, each fast request restores one level
+    time.sleep(0.25)
+    for expected in (2, 1, 0, 0):
+        controller.observe('large', CHAT, 1.0)
+        assert controller.level == expected
+    assert controller.budget(CHAT, 400).max_tokens == 400
+
+
+def test_latency_between_the_thresholds_holds_the_level(controller):
+    controller.observe('large', CHAT, 15.0)
+    time.sleep(0.25)
+    # Under the target but above SLO_RECOVER_RATIO of it
+    controller.observe('large', CHAT, 8.0)
+    assert controller.level == 1
+
+
+def test_idle_time_restores_full_quality(controller, monkeypatch):
+    monkeypatch.setattr(slo, 'COOLDOWN_S', 0.1)
+    for _ in range(3):
+        controller.observe('large', CHAT, 15.0)
+        time.sleep(0.04)
+    assert controller.level == 3
+
+    # The window empties, but a cooldown hasn't passed since the last step
+    controller._latencies.clear()
+    controller.update()
+    assert controller.level == 3
+
+    # No traffic for four cooldowns: the first request back gets the full budget
+    time.sleep(0.45)
+    assert controller.budget(CHAT, 400).max_tokens == 400
+    assert controller.level == 0 and not controller.prefer_small(CHAT)
+
+
+def test_background_requests_dont_count_towards_latency(controller):
+    controller.observe('large', HINT_LADDER, 60.0)
+    assert controller.p95() is None and controller.level == 0
+
+
+def test_budget_never_drops_below_the_floor(controller, monkeypatch):
+    monkeypatch.setattr(slo, 'MIN_MAX_TOKENS', 96)
+    for _ in range(3):
+        controller.observe('large', CHAT, 15.0)
+    assert controller.level == 3
+    assert controller.budget(CHAT, 150).max_tokens == 96
+    assert controller.budget(CHAT, 80).max_tokens == 80
+
+
+@pytest.fixture
+def tutor(db_path, monkeypatch):
+    monkeypatch.setenv('FAKE_TOKENS_PER_SEC', '200')
+    monkeypatch.setenv('FAKE_FIRST_TOKEN_LATENCY_MS', '200')
+    db = Database(db_path)
+    yield CodingTutor(None, db, backend='fake')
+    db.close()
+
+
+def test_blocking_generations_dont_skew_decode_speed(tutor):
+    tutor._generate(CHAT, 'Explain hashing.', max_tokens=20)
+
+    assert tutor.slo.p95() is not None
+    # Prefill is part of a blocking call's time, so it isn't a decode sample
+    assert tutor.slo.decode_tps('large') is None
+
+
+def test_streamed_generations_measure_decode_only(tutor):
+    tokens = list(tutor._generate_stream(CHAT_STREAM, 'Explain hashing.', max_tokens=20))
+
+    assert len(tokens) == 20
+    # 200 tokens/s after a 200 ms prefill; counting the prefill would give about 50
+    assert tutor.slo.decode_tps('large') == pytest.approx(200, rel=0.3)
+
+
+def test_abandoned_streams_are_still_observed(tutor):
+    stream = tutor._generate_stream(CHAT_STREAM, 'Explain hashing.', max_tokens=20)
+    next(stream)
+    stream.close()
+
+    assert tutor.slo.p95() is not None
+    assert tutor.router.load('large') == 0
@@ -0,0 +1,102 @@
+"""
+Tests for tombstoned deletes and the background purge.
+"""
+
+import pytest
+
+from database import Database
+from purger import TombstonePurger
+
+
+@pytest.fixture(params=[1, 3], ids=['single', 'sharded'])
+def db(db_path, request):
+    db = Database(db_path, shards=request.param)
+    yield db
+    db.close()
+
+
+def user(db, name):
+    return db.create_user(name, f"{name}@example.com", 'hash')
+
+
+def rows(db, table):
+    connections = [db.conn] if table == 'users' else db.shards
+    return sum(conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for conn in connections)
+
+
+def test_cleared_messages_disappear_at_once_and_are_purged_later(db):
+    alice, bob = user(db, 'alice'), user(db, 'bob')
+    for i in range(5):
+        db.save_message('user', f"message {i}", problem_id=1, user_id=alice)
+        db.save_message('user', f"message {i}", problem_id=1, user_id=bob)
+
+    db.clear_conversation_history(1, user_id=alice)
+    db.save_message('user', 'after the clear', problem_id=1, user_id=alice)
+
+    assert [m['content'] for m in db.get_conversation_history(1, user_id=alice)] == ['after the clear']
+    assert rows(db, 'conversations') == 11 and db.pending_tombstones() == 1
+
+    assert TombstonePurger(db.open_worker()).run_once() == 5
+    assert rows(db, 'conversations') == 6 and db.pending_tombstones() == 0
+    # Neither the later message nor the other user's are touched
+    assert [m['content'] for m in db.get_conversation_history(1, user_id=alice)] == ['after the clear']
+    assert len(db.get_conversation_history(1, user_id=bob)) == 5
+
+
+def test_purge_runs_in_bounded_batches(db):
+    alice = user(db, 'alice')
+    for i in range(7):
+        db.save_message('user', f"message {i}", problem_id=1, user_id=alice)
+    db.clear_conversation_history(user_id=alice)
+
+    assert [db.purge_tombstones(3) for _ in range(4)] == [3, 3, 1, 0]
+    assert db.pending_tombstones() == 0
+
+
+def test_reset_problem_only_removes_that_problem(db):
+    alice = user(db, 'alice')
+    for problem_id in (1, 2):
+        db.set_problem(problem_id, f"Problem {problem_id}", 'Easy', user_id=alice)
+        db.save_message('user', 'hi', problem_id=problem_id, user_id=alice)
+        db.save_code(problem_id, 'pass', user_id=alice)
+
+    db.reset_problem(1, user_id=alice)
+    while db.purge_tombstones(100):
+        pass
+
+    assert db.get_code_history(1, user_id=alice) == [] and len(db.get_code_history(2, user_id=alice)) == 1
+    assert [m['problem_id'] for m in db.get_conversation_history(user_id=alice)] == [2]
+    assert rows(db, 'code_snapshots') == 1 and rows(db, 'conversations') == 1
+
+
+def test_deleted_account_goes_after_its_data(db):
+    alice, bob = user(db, 'alice'), user(db, 'bob')
+    db.set_problem(1, 'Problem 1', 'Easy', user_id=alice)
+    db.save_message('user', 'hi', problem_id=1, user_id=alice)
+    db.save_message('user', 'hi', problem_id=1, user_id=bob)
+
+    db.delete_user(alice)
+    assert db.get_user_by_id(alice) is None and db.get_conversation_history(user_id=alice) == []
+    # The name is free for a new account straight away
+    assert user(db, 'alice') is not None
+    assert rows(db, 'users') == 3
+
+    TombstonePurger(db).run_once()
+    assert rows(db, 'users') == 2 and db.get_user_by_id(bob) is not None
+    assert rows(db, 'conversations') == 1 and rows(db, 'problems') == 0
+
+
+def test_tombstone_lookups_are_indexed(db):
+    for conn in db.connections:
+        plan = ' '.join(row[3] for row in conn.execute("""
+            EXPLAIN QUERY PLAN SELECT 1 FROM tombstones
+            WHERE table_name = 'conversations' AND user_id = 1 AND problem_id = 1
+        """))
+        assert 'idx_tombstones_scope' in plan
+
+
+def test_worker_connections_are_separate(db):
+    worker = db.open_worker()
+    assert not {id(conn) for conn in worker.connections} & {id(conn) for conn in db.connections}
+    assert worker.paths == db.paths
+    worker.close()
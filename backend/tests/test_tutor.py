@@ -0,0 +1,47 @@
+"""
+Tests for the tutor's prompt construction.
+"""
+
+import pytest
+
+from database import Database
+from tutor import CodingTutor
+
+
+@pytest.fixture
+def tutor(db_path, monkeypatch):
+    monkeypatch.setenv('FAKE_TOKENS_PER_SEC', '2000')
+    monkeypatch.setenv('FAKE_FIRST_TOKEN_LATENCY_MS', '1')
+    db = Database(db_path)
+    tutor = CodingTutor(None, db, backend='fake')
+    tutor.current_problem = {'id': 0, 'title': 'Two Sum', 'difficulty': 'Easy'}
+    yield tutor
+    db.close()
+
+
+def test_prompt_starts_with_the_prefix(tutor):
+    tutor.conversation_history = [{'role': 'user', 'content': 'Where do I start?'}]
+    context = tutor._build_conversation_context()
+
+    assert context.startswith(tutor._build_prompt_prefix())
+    assert context.endswith('Student: Where do I start?\n\nAlex:')
+
+
+def test_oversized_code_is_truncated_last(tutor):
+    tutor.conversation_history = [{'role': 'user', 'content': 'Why is this slow? ' * 100}] * 6
+    code = '\n'.join(f"total += nums[{i}]" for i in range(3000))
+    context = tutor._build_conversation_context(code_context={'code': code, 'includeInContext': True})
+
+    assert len(context) // 4 <= 3500
+    assert 'total += nums[0]\n' in context and 'nums[2999]' not in context
+    assert '# ... (rest of the code truncated to fit the context)\n```' in context
+    # History was trimmed first but the latest turns survive
+    assert context.endswith('Student: ' + 'Why is this slow? ' * 100 + '\n\nAlex:')
+
+
+def test_code_that_fits_is_kept_whole(tutor):
+    tutor.conversation_history = []
+    code = 'class Solution:\n    def twoSum(self, nums, target):\n        return []\n'
+    context = tutor._build_conversation_context(code_context={'code': code, 'includeInContext': True})
+
+    assert code in context and 'truncated' not in context
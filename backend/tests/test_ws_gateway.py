@@ -0,0 +1,61 @@
+"""
+Tests for the asyncio WebSocket gateway: which pool a turn runs on and what happens when generations are saturated.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip('websockets')
+from websockets.asyncio.client import connect
+from websockets.asyncio.server import serve
+
+import admission
+from admission import AdmissionController
+from chat_frames import ChatFrames
+from database import Database
+from tutor import CodingTutor
+from ws_gateway import Gateway
+
+
+@pytest.fixture
+def gateway(db_path, monkeypatch):
+    # Slow enough that a generation is still streaming while the other clients talk
+    monkeypatch.setenv('FAKE_TOKENS_PER_SEC', '10')
+    monkeypatch.setenv('FAKE_FIRST_TOKEN_LATENCY_MS', '1')
+    monkeypatch.setattr(admission, 'ADMISSION_ENABLED', True)
+    db = Database(db_path)
+    tutor = CodingTutor(None, db, backend='fake')
+    gateway = Gateway(tutor, ChatFrames(AdmissionController(tutor.router), []), workers=1)
+    yield gateway
+    gateway.executor.shutdown(wait=True)
+    gateway.session_executor.shutdown(wait=True)
+    db.close()
+
+
+async def talk(port, message):
+    async with connect(f"ws://127.0.0.1:{port}/ws/chat") as websocket:
+        await websocket.send(json.dumps({'message': message}))
+        return json.loads(await websocket.recv())
+
+
+def test_canned_replies_and_overflow_while_generations_are_busy(gateway):
+    async def scenario():
+        async with serve(gateway.handle_chat, '127.0.0.1', 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            async with connect(f"ws://127.0.0.1:{port}/ws/chat") as generating:
+                await generating.send(json.dumps({'message': 'How do I reverse a linked list?'}))
+                assert json.loads(await generating.recv())['type'] == 'token'
+
+                # The only generation thread is busy: intent replies still go through...
+                reply = await asyncio.wait_for(talk(port, 'thanks!'), timeout=2)
+                assert reply['type'] == 'final'
+                # ...and another model turn is refused instead of waiting in the pool
+                busy = await asyncio.wait_for(talk(port, 'And a doubly linked one?'), timeout=2)
+                assert busy['type'] == 'error' and busy['retryAfter'] >= 1
+                assert 'busy' in busy['error']
+
+    asyncio.run(scenario())
+    # The abandoned generation gave its thread back
+    assert gateway._free_workers.acquire(timeout=5)
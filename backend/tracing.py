@@ -0,0 +1,297 @@
+"""
+Lightweight request tracing for ZeroToHire.
+Nested spans tied to a request ID, sampled per request and exported as JSON lines or OTLP/HTTP JSON.
+"""
+
+import contextvars
+import json
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+import uuid
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Dict, List, Optional, Sequence
+
+
+_current_span = contextvars.ContextVar('zerotohire_current_span', default=None)
+_current_request_id = contextvars.ContextVar('zerotohire_request_id', default=None)
+
+
+class Span:
+    """One timed operation inside a trace."""
+    __slots__ = ('trace', 'span_id', 'parent_id', 'name', 'start_ns', 'end_ns', 'attributes', 'status')
+
+    def __init__(self, trace: '_Trace', name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.status = 'ok'
+        trace.spans.append(self)
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def record_error(self, exc: BaseException):
+        self.status = 'error'
+        self.attributes['error'] = f"{type(exc).__name__}: {exc}"
+
+    def end(self, end_ns: Optional[int] = None):
+        self.end_ns = end_ns or time.time_ns()
+
+    def to_dict(self) -> Dict:
+        return {
+            'trace_id': self.trace.trace_id,
+            'request_id': self.trace.request_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start_ns': self.start_ns,
+            'end_ns': self.end_ns,
+            'duration_ms': round((self.end_ns - self.start_ns) / 1e6, 3) if self.end_ns else None,
+            'status': self.status,
+            'attributes': self.attributes
+        }
+
+
+class _Trace:
+    __slots__ = ('trace_id', 'request_id', 'spans')
+
+    def __init__(self, request_id: str):
+        self.trace_id = uuid.uuid4().hex
+        self.request_id = request_id
+        self.spans: List[Span] = []
+
+
+# ==================== Exporters ====================
+
+class JsonLinesExporter:
+    """Append one JSON object per span to a local file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, spans: List[Span]):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for span in spans:
+                f.write(json.dumps(span.to_dict(), default=str) + '\n')
+
+
+class OTLPHttpExporter:
+    """POST spans to an OTLP/HTTP JSON endpoint (e.g. a local collector on :4318)."""
+
+    def __init__(self, endpoint: str, service_name: str = 'zerotohire-backend', timeout: float = 2.0):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.timeout = timeout
+
+    @staticmethod
+    def _attribute(key: str, value: Any) -> Dict:
+        if isinstance(value, bool):
+            return {'key': key, 'value': {'boolValue': value}}
+        if isinstance(value, int):
+            return {'key': key, 'value': {'intValue': str(value)}}
+        if isinstance(value, float):
+            return {'key': key, 'value': {'doubleValue': value}}
+        return {'key': key, 'value': {'stringValue': str(value)}}
+
+    def _encode(self, spans: List[Span]) -> Dict:
+        otlp_spans = []
+        for span in spans:
+            attributes = dict(span.attributes, request_id=span.trace.request_id)
+            otlp_span = {
+                'traceId': span.trace.trace_id,
+                'spanId': span.span_id,
+                'name': span.name,
+                'kind': 1,
+                'startTimeUnixNano': str(span.start_ns),
+                'endTimeUnixNano': str(span.end_ns),
+                'attributes': [self._attribute(k, v) for k, v in attributes.items()],
+                'status': {'code': 2 if span.status == 'error' else 1}
+            }
+            if span.parent_id:
+                otlp_span['parentSpanId'] = span.parent_id
+            otlp_spans.append(otlp_span)
+
+        return {'resourceSpans': [{
+            'resource': {'attributes': [self._attribute('service.name', self.service_name)]},
+            'scopeSpans': [{'scope': {'name': 'zerotohire.tracing'}, 'spans': otlp_spans}]
+        }]}
+
+    def export(self, spans: List[Span]):
+        body = json.dumps(self._encode(spans)).encode('utf-8')
+        req = urllib.request.Request(self.endpoint, data=body, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(req, timeout=self.timeout):
+            pass
+
+
+class _BackgroundExporter:
+    """Hand finished traces to a daemon thread so exporting never blocks a request."""
+
+    def __init__(self, exporter, max_queue: int = 1000):
+        self.exporter = exporter
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name='trace-exporter', daemon=True)
+        self._thread.start()
+
+    def submit(self, spans: List[Span]):
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            pass  # Drop traces rather than slow down requests
+
+    def _run(self):
+        while True:
+            spans = self._queue.get()
+            try:
+                self.exporter.export(spans)
+            except Exception as e:
+                print(f"Trace export failed: {e}")
+
+
+# ==================== Configuration ====================
+
+SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', 0.0))
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def _get_exporter() -> _BackgroundExporter:
+    global _exporter
+    if _exporter is None:
+        with _exporter_lock:
+            if _exporter is None:
+                if os.getenv('TRACE_EXPORTER', 'jsonl').lower() == 'otlp':
+                    exporter = OTLPHttpExporter(os.getenv('TRACE_OTLP_ENDPOINT', 'http://127.0.0.1:4318/v1/traces'))
+                else:
+                    exporter = JsonLinesExporter(os.getenv('TRACE_FILE', 'data/traces.jsonl'))
+                _exporter = _BackgroundExporter(exporter)
+    return _exporter
+
+
+def set_exporter(exporter, sample_rate: Optional[float] = None):
+    """Replace the configured exporter (and optionally the sample rate)."""
+    global _exporter, SAMPLE_RATE
+    _exporter = _BackgroundExporter(exporter)
+    if sample_rate is not None:
+        SAMPLE_RATE = sample_rate
+
+
+# ==================== Tracing API ====================
+
+def current_request_id() -> Optional[str]:
+    """Request ID of the trace running in this context, sampled or not."""
+    return _current_request_id.get()
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def begin_trace(name: str, request_id: Optional[str] = None, force: bool = False, **attributes):
+    """Start a root span. Returns a handle for end_trace().
+
+    Unsampled traces still carry a request ID but record no spans.
+    """
+    request_id = request_id or uuid.uuid4().hex
+    root = None
+    if force or (SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE):
+        root = Span(_Trace(request_id), name, None, attributes)
+    return root, _current_span.set(root), _current_request_id.set(request_id)
+
+
+def end_trace(handle, exc: Optional[BaseException] = None):
+    """Finish a root span started with begin_trace() and export the trace."""
+    root, span_token, request_token = handle
+    try:
+        _current_span.reset(span_token)
+        _current_request_id.reset(request_token)
+    except ValueError:
+        # Ended from a different context than it began in
+        _current_span.set(None)
+        _current_request_id.set(None)
+    if root is None:
+        return
+    if exc is not None:
+        root.record_error(exc)
+    root.end()
+    _get_exporter().submit(root.trace.spans)
+
+
+@contextmanager
+def start_trace(name: str, request_id: Optional[str] = None, **attributes):
+    """Context manager form of begin_trace()/end_trace()."""
+    handle = begin_trace(name, request_id, **attributes)
+    try:
+        yield handle[0]
+    except BaseException as exc:
+        end_trace(handle, exc)
+        raise
+    else:
+        end_trace(handle)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time a nested operation. A no-op outside a sampled trace."""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+
+    child = Span(parent.trace, name, parent.span_id, attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as exc:
+        child.record_error(exc)
+        raise
+    finally:
+        child.end()
+        _current_span.reset(token)
+
+
+def record_span(name: str, start_ns: int, end_ns: int, **attributes):
+    """Record an already-finished child span (e.g. phases of a streaming generator)."""
+    parent = _current_span.get()
+    if parent is None:
+        return
+    child = Span(parent.trace, name, parent.span_id, attributes)
+    child.start_ns = start_ns
+    child.end(end_ns)
+
+
+def traced(name: Optional[str] = None):
+    """Decorator wrapping a function call in a span."""
+    def decorate(func):
+        span_name = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return func(*args, **kwargs)
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def trace_methods(prefix: str, exclude: Sequence[str] = ()):
+    """Class decorator tracing every public method as '<prefix>.<method>'."""
+    def decorate(cls):
+        for name, attr in list(vars(cls).items()):
+            if name.startswith('_') or name in exclude or not callable(attr):
+                continue
+            setattr(cls, name, traced(f"{prefix}.{name}")(attr))
+        return cls
+    return decorate
@@ -0,0 +1,794 @@
+"""
+Coding tutor session logic for ZeroToHire.
+Builds tutoring prompts from the stored session and runs them through the local model.
+"""
+
+import copy
+import os
+from typing import Optional
+from datetime import datetime
+import re
+import time
+from database import Database
+from model_router import ModelRouter, CHAT, CHAT_STREAM, EVALUATE_CODE
+from inference import create_backends
+from sandbox import ProblemSandbox, SandboxReport
+from code_triage import triage, TriageResult
+from hint_ladder import HINT_LEVELS
+from prefill import PromptPrefiller
+from slo import SLOController, DEFAULT_HISTORY_LIMIT
+import tracing
+from tracing import traced
+from metrics import (
+    CODE_EVALUATIONS_TOTAL, CONTEXT_OVERFLOW_TOTAL, INFERENCE_COMPLETION_TOKENS, INFERENCE_DECODE_TPS,
+    INFERENCE_DURATION_SECONDS, INFERENCE_PROMPT_TOKENS, INFERENCE_TTFT_SECONDS
+)
+
+
+class CodingTutor:
+    def __init__(self, model_path, db: Database, user_id: Optional[int] = None, small_model_path: Optional[str] = None,
+                 backend: Optional[str] = None):
+        """Initialize the coding tutor with database storage.
+        
+        backend selects the inference backend (defaults to INFERENCE_BACKEND, then
+        'llama_cpp'); model_path is only needed for llama_cpp. If small_model_path
+        is given, a second, smaller model is loaded and quick conversational turns
+        are routed to it.
+        """
+        self.db = db
+        self.user_id = user_id
+        
+        # Load conversation history from database (LIMIT to recent messages only to prevent context overflow)
+        self.conversation_history = self.db.get_conversation_history(limit=10, user_id=user_id)
+        
+        # Load current problem from database
+        self.current_problem = self.db.get_current_problem(user_id=user_id)
+        
+        print(f"Loaded session with {len(self.conversation_history)} recent messages")
+        
+        # Load the model
+        print("Loading model...")
+        models = create_backends(backend, model_path, small_model_path)
+        self.llm = models['large']
+        self.router = ModelRouter(models)
+        self.sandbox = ProblemSandbox()
+        self.prefiller = PromptPrefiller(self.router)
+        self.slo = SLOController(self.router)
+        self.router.slo = self.slo
+        # Set by the app once the dataset is loaded (see hint_ladder.HintLadders)
+        self.hint_ladders = None
+        print(f"Model loaded successfully! ({self.llm.name} backend, tiers: {', '.join(models)})")
+    
+    @traced('tutor.set_user_context')
+    def set_user_context(self, user_id: Optional[int] = None):
+        """Set the current user context and reload user-specific data."""
+        self.user_id = user_id
+        self.conversation_history = self.db.get_conversation_history(limit=10, user_id=user_id)
+        self.current_problem = self.db.get_current_problem(user_id=user_id)
+    
+    def session(self, user_id: Optional[int] = None) -> 'CodingTutor':
+        """A tutor with its own user, history and current problem, sharing this one's models and caches.
+        
+        Used for WebSocket connections, so concurrent turns on different
+        connections don't overwrite each other's conversation.
+        """
+        session = copy.copy(self)
+        session.set_user_context(user_id)
+        return session
+    
+    def _add_message_to_history(self, role: str, content: str):
+        """Add message to history and save to database."""
+        message = {
+            'role': role,
+            'content': content,
+            'timestamp': datetime.now().isoformat()
+        }
+        self.conversation_history.append(message)
+        
+        # Save to database
+        problem_id = self.current_problem.get('id') if self.current_problem else None
+        self.db.save_message(role, content, problem_id, user_id=self.user_id)
+    
+    @traced('tutor.set_problem')
+    def set_problem(self, problem_data):
+        """Set a new coding problem"""
+        self.current_problem = {
+            'title': problem_data.get('title', 'Unknown'),
+            'description': problem_data.get('description', ''),
+            'difficulty': problem_data.get('difficulty', 'Unknown'),
+            'problem_types': problem_data.get('problem_types', []),
+            'id': problem_data.get('id')
+        }
+        
+        # Save problem to database
+        self.db.set_problem(
+            self.current_problem['id'],
+            self.current_problem['title'],
+            self.current_problem['difficulty'],
+            user_id=self.user_id
+        )
+        
+        # Add system message about the new problem
+        problem_title = self.current_problem['title']
+        system_msg = f"New coding problem started: {problem_title}"
+        self._add_message_to_history('system', system_msg)
+        
+        # Check if this is the first problem or a new problem in an existing session
+        has_previous_conversation = len([msg for msg in self.conversation_history if msg['role'] in ['user', 'assistant', 'alex']]) > 0
+        
+        if has_previous_conversation:
+            # Continuing session with new problem
+            response = f"Great! Let's work on '{problem_title}'. I can see you have the problem description. Before we dive into coding, let's make sure we understand what we're being asked to do. Can you tell me in your own words what this problem is asking for? Let me know if you have any questions!"
+        else:
+            # First problem in session
+            response = f"Hello! I'm Alex, your coding assistant. I see you're working on '{problem_title}'. Before we start coding, let's make sure we understand the problem. Can you read through the problem description and tell me what you think it's asking us to do? Let me know if you have any questions!"
+        
+        # Add the response directly to history
+        self._add_message_to_history('alex', response)
+        
+        # Warm the model with this problem's prompt prefix before the student's first message
+        self.prefiller.schedule(self._build_prompt_prefix())
+        
+        return response
+    
+    def mark_problem_completed(self, problem_id):
+        """Mark a problem as completed in database."""
+        self.db.mark_problem_complete(problem_id, user_id=self.user_id)
+        return True
+
+    def mark_problem_uncompleted(self, problem_id):
+        """Mark a problem as incomplete in database."""
+        self.db.mark_problem_incomplete(problem_id, user_id=self.user_id)
+        return True
+    
+    def is_problem_completed(self, problem_id):
+        """Check if problem is completed."""
+        return self.db.is_problem_completed(problem_id, user_id=self.user_id)
+    
+    @traced('tutor.chat')
+    def chat(self, user_message, is_initial=False, code_context=None):
+        """Continue the conversation with Alex
+        
+        Args:
+            user_message: The user's message
+            is_initial: Whether this is an initial message
+            code_context: Optional code context to include automatically
+        """
+        self._add_message_to_history('user', user_message)
+        
+        # Reply length and history shrink while the latency SLO is at risk
+        budget = self.slo.budget(CHAT, int(os.getenv('MODEL_MAX_TOKENS', 400)))
+        
+        # Build the full conversation context
+        conversation_context = self._build_conversation_context(
+            user_message if is_initial else None,
+            code_context=code_context,
+            history_limit=budget.history_limit
+        )
+        
+        # Get model parameters from environment
+        max_tokens = budget.max_tokens
+        temperature = float(os.getenv('MODEL_TEMPERATURE', 0.7))
+        top_p = float(os.getenv('MODEL_TOP_P', 0.9))
+        
+        # Generate response with error handling
+        try:
+            response = self._generate(
+                CHAT,
+                conversation_context,
+                user_message=user_message,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                top_p=top_p,
+                echo=False,
+                stop=["Student:", "User:", "Alex:", "\n\nAlex:", "\nAlex:"]
+            )
+            print("Response generated successfully!")
+        except Exception as e:
+            print(f"ERROR during model generation: {str(e)}")
+            print(f"Context length was: {len(conversation_context)} chars (~{len(conversation_context)//4} tokens)")
+            print("Context may be too large or model encountered an error.")
+            CONTEXT_OVERFLOW_TOTAL.labels(kind='generation_error').inc()
+            # Return a safe fallback response
+            fallback = "I apologize, but I encountered a technical issue. Could you try rephrasing your question? If this persists, try using 'Clear Chat' to start fresh."
+            self._add_message_to_history('alex', fallback)
+            return fallback
+        
+        # Extract response text and clean it up
+        raw_response = response['choices'][0]['text'].strip()
+        
+        # Remove any leaked internal reasoning tags
+        if '</thought>' in raw_response:
+            raw_response = raw_response.split('</thought>', 1)[1].strip()
+        raw_response = re.sub(r'</?thought>', '', raw_response)
+        raw_response = re.sub(r'</?response>', '', raw_response)
+        
+        # Aggressively stop at any role markers that leaked through
+        role_markers = ['Alex:', 'Student:', 'User:']
+        for marker in role_markers:
+            if marker in raw_response:
+                raw_response = raw_response.split(marker)[0].strip()
+                break
+
+        response = self._clean_response(raw_response)
+        
+        # Add response to history
+        self._add_message_to_history('alex', response)
+        
+        return response
+    
+    def chat_stream(self, user_message, is_initial=False, code_context=None):
+        """Stream the assistant's response token-by-token."""
+        self._add_message_to_history('user', user_message)
+        
+        budget = self.slo.budget(CHAT_STREAM, int(os.getenv('MODEL_MAX_TOKENS', 400)))
+        conversation_context = self._build_conversation_context(
+            user_message if is_initial else None,
+            code_context=code_context,
+            history_limit=budget.history_limit
+        )
+        
+        max_tokens = budget.max_tokens
+        temperature = float(os.getenv('MODEL_TEMPERATURE', 0.7))
+        top_p = float(os.getenv('MODEL_TOP_P', 0.9))
+        
+        accumulated_chunks = []
+        try:
+            stream = self._generate_stream(
+                CHAT_STREAM,
+                conversation_context,
+                user_message=user_message,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                top_p=top_p,
+                echo=False,
+                stop=["Student:", "User:", "Alex:", "\n\nAlex:", "\nAlex:"]
+            )
+            for token in stream:
+                accumulated_chunks.append(token)
+                yield {'type': 'token', 'token': token}
+        except Exception as e:
+            print(f"ERROR during streaming generation: {str(e)}")
+            print(f"Context length was: {len(conversation_context)} chars (~{len(conversation_context)//4} tokens)")
+            CONTEXT_OVERFLOW_TOTAL.labels(kind='generation_error').inc()
+            fallback = "I apologize, but I encountered a technical issue. Could you try rephrasing your question? If this persists, try using 'Clear Chat' to start fresh."
+            self._add_message_to_history('alex', fallback)
+            yield {'type': 'error', 'error': fallback}
+            return
+        
+        raw_response = ''.join(accumulated_chunks).strip()
+        if '</thought>' in raw_response:
+            raw_response = raw_response.split('</thought>', 1)[1].strip()
+        raw_response = re.sub(r'</?thought>', '', raw_response)
+        raw_response = re.sub(r'</?response>', '', raw_response)
+        
+        role_markers = ['Alex:', 'Student:', 'User:']
+        for marker in role_markers:
+            if marker in raw_response:
+                raw_response = raw_response.split(marker)[0].strip()
+                break
+        
+        response = self._clean_response(raw_response)
+        self._add_message_to_history('alex', response)
+        
+        yield {'type': 'final', 'message': response}
+    
+    def _generate(self, request_type, prompt, user_message=None, **params):
+        """Run a blocking completion on the routed model and record inference metrics."""
+        tier = self.router.choose(request_type, user_message, len(prompt)//4)
+        print(f"Generating {request_type} with {tier} model (context: ~{len(prompt)//4} tokens)...")
+        queued_at = time.time_ns()
+        queued = time.perf_counter()
+        with self.router.acquire(tier, request_type) as llm:
+            tracing.record_span('inference.queue', queued_at, time.time_ns(), tier=tier)
+            with tracing.span('inference.generate', tier=tier, request_type=request_type, prompt_chars=len(prompt)):
+                start = time.perf_counter()
+                response = llm(prompt, **params)
+                elapsed = time.perf_counter() - start
+        
+        usage = response.get('usage') or {}
+        completion_tokens = usage.get('completion_tokens', 0)
+        # elapsed includes prefill, so it would understate decode speed; only streamed requests feed that
+        self.slo.observe(tier, request_type, start + elapsed - queued)
+        INFERENCE_DURATION_SECONDS.labels(tier=tier, request_type=request_type).observe(elapsed)
+        INFERENCE_PROMPT_TOKENS.labels(request_type=request_type).observe(usage.get('prompt_tokens', len(prompt)//4))
+        INFERENCE_COMPLETION_TOKENS.labels(request_type=request_type).observe(completion_tokens)
+        if completion_tokens and elapsed > 0:
+            INFERENCE_DECODE_TPS.labels(tier=tier, request_type=request_type).observe(completion_tokens / elapsed)
+        return response
+    
+    def _generate_stream(self, request_type, prompt, user_message=None, **params):
+        """Stream a completion from the routed model, yielding text tokens and recording inference metrics."""
+        tier = self.router.choose(request_type, user_message, len(prompt)//4)
+        print(f"Streaming {request_type} with {tier} model (context: ~{len(prompt)//4} tokens)...")
+        completion_tokens = 0
+        queued_at = time.time_ns()
+        queued = time.perf_counter()
+        with self.router.acquire(tier, request_type) as llm:
+            # Spans are recorded after the fact: a generator must not leave its span current while suspended
+            acquired_at = time.time_ns()
+            tracing.record_span('inference.queue', queued_at, acquired_at, tier=tier)
+            start = time.perf_counter()
+            first_token_at = None
+            first_token_ns = None
+            try:
+                for chunk in llm(prompt, stream=True, **params):
+                    token = chunk['choices'][0].get('text', '')
+                    if not token:
+                        continue
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                        first_token_ns = time.time_ns()
+                        INFERENCE_TTFT_SECONDS.labels(tier=tier, request_type=request_type).observe(first_token_at - start)
+                        tracing.record_span('inference.prefill', acquired_at, first_token_ns, tier=tier, prompt_chars=len(prompt))
+                    completion_tokens += 1
+                    yield token
+            finally:
+                end = time.perf_counter()
+                if first_token_ns is not None:
+                    tracing.record_span('inference.decode', first_token_ns, time.time_ns(), tier=tier, completion_tokens=completion_tokens)
+                # Also when the model fails or the client goes away mid-stream, so slow requests still count
+                decode_seconds = end - first_token_at if first_token_at is not None else 0.0
+                self.slo.observe(tier, request_type, end - queued, completion_tokens - 1, decode_seconds)
+        
+        INFERENCE_DURATION_SECONDS.labels(tier=tier, request_type=request_type).observe(end - start)
+        INFERENCE_PROMPT_TOKENS.labels(request_type=request_type).observe(len(prompt)//4)
+        INFERENCE_COMPLETION_TOKENS.labels(request_type=request_type).observe(completion_tokens)
+        if first_token_at is not None and completion_tokens > 1 and end > first_token_at:
+            INFERENCE_DECODE_TPS.labels(tier=tier, request_type=request_type).observe((completion_tokens - 1) / (end - first_token_at))
+    
+    @traced('tutor.clean_response')
+    def _clean_response(self, response):
+        """Clean up the response while preserving code blocks and line breaks.
+
+        Important: Do NOT strip parentheses or collapse whitespace globally,
+        as that destroys code formatting. Only clean non-code text segments.
+        """
+        # Split out fenced code blocks so we don't touch them
+        code_pattern = re.compile(r"```[\s\S]*?```", re.MULTILINE)
+        code_blocks = code_pattern.findall(response)
+        parts = code_pattern.split(response)
+
+        cleaned_parts = []
+        for part in parts:
+            text = part
+            # Remove light-weight stage directions in asterisks or brackets (non-greedy, single-line)
+            text = re.sub(r"\*[^^\n*]{0,80}\*", "", text)
+            text = re.sub(r"\[[^\]\n]{0,80}\]", "", text)
+            # Remove common meta phrases
+            text = re.sub(r"\b(let me think|thinking|pondering|considering)\b", "", text, flags=re.IGNORECASE)
+            # Remove duplicated role prefixes at start of lines
+            text = re.sub(r"(^|\n)\s*Alex:\s*", r"\1", text)
+            # Normalize excessive blank lines but keep line structure
+            text = re.sub(r"\n{3,}", "\n\n", text)
+            # Trim trailing spaces per line
+            lines = [ln.rstrip() for ln in text.splitlines()]
+            text = "\n".join(lines)
+            cleaned_parts.append(text)
+
+        # Reassemble, interleaving preserved code blocks
+        rebuilt = []
+        for i, part in enumerate(cleaned_parts):
+            rebuilt.append(part)
+            if i < len(code_blocks):
+                rebuilt.append(code_blocks[i])
+
+        cleaned = "".join(rebuilt).strip()
+        # Final minor cleanup: remove a trailing colon at end of entire message only
+        cleaned = re.sub(r":\s*$", "", cleaned)
+        return cleaned
+    
+    
+    def _build_prompt_prefix(self):
+        """System prompt and current problem: the part of every chat prompt that only changes with the problem.
+        
+        Kept ahead of the student's code and the history so the model can reuse
+        its evaluated state for it (see prefill.PromptPrefiller).
+        """
+        '''
+        Here's where we'll let the llm know of what it should and shouldn't do. Finetuning would be good for getting it to sound more human, 
+        but I'm too lazy to create a dataset of conversations for that.
+        '''
+        context_parts = []
+        
+        # Core Role and Instructions
+        context_parts.append("You are Alex, an expert coding tutor specializing in LeetCode problems.")
+        context_parts.append("The user is the student.")
+        context_parts.append("Your goal is to guide the user to a solution, providing hints and asking questions to foster discovery, but provide the solution with explanation and Python code if they explicitly give up or request it.")
+        
+        # LeetCode-Specific Guidance
+        context_parts.append("For LeetCode problems, summarize key constraints (e.g., input size, edge cases) and guide the student to consider time and space complexity.")
+        context_parts.append("Encourage exploration of algorithmic patterns (e.g., two-pointer, dynamic programming, greedy) when relevant.")
+        context_parts.append("If the student submits code, analyze it for correctness, efficiency, and edge cases. Provide specific feedback and suggest improvements without rewriting unless requested.")
+        
+        # Communication Style
+        context_parts.append("COMMUNICATION STYLE:")
+        context_parts.append("- Be direct, honest, and natural. If you don't understand something, ask for clarification.")
+        context_parts.append("- Maintain an encouraging tone, especially when the student is frustrated, and celebrate small wins.")
+        context_parts.append("- Keep responses concise and focused. Ask ONE clear question at a time, NOT multiple questions.")
+        context_parts.append("- Avoid repeating the same question or concept multiple times in one response.")
+        
+        # Tutoring Approach
+        context_parts.append("TUTORING APPROACH:")
+        context_parts.append("- Ask questions to guide student discovery.")
+        context_parts.append("- Let students work through problems themselves, providing hints only when stuck.")
+        context_parts.append("- If the student says they cannot complete the problem or gives up, switch to concrete examples or simpler analogies.")
+        context_parts.append("- Stay focused on the current problem. If the student asks about off-topic subjects, briefly acknowledge but guide them back to the current problem.")
+        context_parts.append("- If the student wants to work on a different problem, suggest they use the 'Browse Problems' button to find and select it.")
+        
+        # Staying On Topic
+        context_parts.append("STAYING FOCUSED:")
+        context_parts.append("- Your primary role is to help with the current LeetCode problem.")
+        context_parts.append("- For brief off-topic questions (like simple coding concepts), give a concise answer then redirect to the current problem.")
+        context_parts.append("- If asked about other problems, say something like 'You can use the Browse Problems button to search for that specific problem if you'd like to work on it instead.'")
+        context_parts.append("- Keep the conversation centered on solving the problem at hand.")
+        
+        # Platform Integration
+        context_parts.append("PLATFORM FEATURES:")
+        context_parts.append("- Format code in clear Python code blocks for display in the website's code editor.")
+        context_parts.append("- Suggest test cases the student can run to verify their solution.")
+        context_parts.append("- The student can use 'Browse Problems' button to search for and select different problems.")
+        context_parts.append("- When relevant, suggest external resources (e.g., LeetCode problem URL, Python documentation).")
+        
+        # Never Do
+        context_parts.append("NEVER DO:")
+        context_parts.append("- Overuse conceptual questions when the student needs concrete examples.")
+        context_parts.append("- Refuse to help when the student explicitly gives up.")
+        context_parts.append("- Get sidetracked into long discussions unrelated to the current problem.")
+        context_parts.append("- Try to solve different problems that the student mentions - direct them to use the problem browser instead.")
+        
+        # Problem and User Context
+        if self.current_problem:
+            context_parts.append(f"CURRENT PROBLEM: {self.current_problem['title']}")
+            context_parts.append(f"Difficulty: {self.current_problem.get('difficulty', 'Not specified')}")
+            context_parts.append("Focus all tutoring efforts on helping the student solve THIS specific problem.")
+            context_parts.append("")
+        else:
+            context_parts.append("No problem is currently loaded. Encourage the student to use the 'Browse Problems' button to select a problem to work on.")
+            context_parts.append("")
+
+        return "\n".join(context_parts)
+    
+    @traced('tutor.build_conversation_context')
+    def _build_conversation_context(self, initial_prompt=None, code_context=None, history_limit=DEFAULT_HISTORY_LIMIT):
+        """Build the full conversation context for the model
+        
+        Args:
+            initial_prompt: Optional initial prompt to use
+            code_context: Optional code context to include
+            history_limit: Most recent messages to include
+        """
+        if initial_prompt:
+            return initial_prompt
+        
+        prefix = self._build_prompt_prefix()
+        context_parts = [prefix]
+        code_index = None
+        
+        # Add code context if provided
+        if code_context and code_context.get('code', '').strip():
+            context_parts.append("STUDENT'S CURRENT CODE:")
+            context_parts.append("```python")
+            code_index = len(context_parts)
+            context_parts.append(code_context['code'])
+            context_parts.append("```")
+            context_parts.append("Note: The student has this code in their editor. Consider it when providing guidance.")
+            context_parts.append("")
+        
+        # CRITICAL: Limit conversation history to prevent context overflow
+        # Estimate: System prompt ~1000 tokens, each message ~100-200 tokens
+        # With 4096 context and 400 max_tokens output, we need ~3600 tokens max for input
+        # Keep only last 5 messages (10 turns) to be safe - roughly 1000-2000 tokens
+        recent_history = self.conversation_history[-history_limit:] if len(self.conversation_history) > history_limit else self.conversation_history
+        context_end = len(context_parts)
+
+        for msg in recent_history:
+            if msg['role'] == 'user':
+                context_parts.append(f"Student: {msg['content']}")
+            elif msg['role'] == 'alex':
+                context_parts.append(f"Alex: {msg['content']}")
+        context_parts.append("")
+        context_parts.append("Alex:")
+        
+        context = "\n".join(context_parts)
+        
+        # Safety check: Rough token estimate (4 chars ≈ 1 token)
+        estimated_tokens = len(context) // 4
+        max_input_tokens = 3500  # Leave room for output (4096 - 400 - buffer)
+        
+        if estimated_tokens > max_input_tokens:
+            print(f"WARNING: Context too large (~{estimated_tokens} tokens). Reducing history...")
+            CONTEXT_OVERFLOW_TOTAL.labels(kind='history_trimmed').inc()
+            # Reduce to last 3 messages only
+            history_limit = min(history_limit, 3)
+            context_parts = context_parts[:context_end]  # Keep system prompt, problem and code
+            recent_history = self.conversation_history[-history_limit:]
+            for msg in recent_history:
+                if msg['role'] == 'user':
+                    context_parts.append(f"Student: {msg['content']}")
+                elif msg['role'] == 'alex':
+                    context_parts.append(f"Alex: {msg['content']}")
+            context_parts.append("")
+            context_parts.append("Alex:")
+            context = "\n".join(context_parts)
+        
+        # Last resort: a huge editor buffer can overflow on its own, so keep only the start of the code
+        overflow_chars = len(context) - max_input_tokens * 4
+        if overflow_chars > 0 and code_index is not None:
+            print(f"WARNING: Context still too large (~{len(context) // 4} tokens). Truncating the student's code...")
+            CONTEXT_OVERFLOW_TOTAL.labels(kind='code_truncated').inc()
+            code = context_parts[code_index]
+            kept = code[:max(0, len(code) - overflow_chars - 100)]
+            # Cut at a line boundary so the model doesn't see half a statement
+            kept = kept[:kept.rfind('\n') + 1] if '\n' in kept else ''
+            context_parts[code_index] = kept + "# ... (rest of the code truncated to fit the context)"
+            context = "\n".join(context_parts)
+        
+        return context
+    
+    def next_hint(self) -> Optional[str]:
+        """Serve the next precomputed hint for the current problem.
+        
+        Returns None when the problem has no ladder yet or the student has seen
+        every rung, so the question goes to the model instead.
+        """
+        if not self.current_problem or self.hint_ladders is None or self.current_problem.get('id') is None:
+            return None
+        problem_id = self.current_problem['id']
+        hints = self.hint_ladders.get(problem_id)
+        # Progress is stored with the problem, so it survives restarts and is shared by every worker
+        level = self.db.get_hints_shown(problem_id, user_id=self.user_id)
+        if level >= len(hints):
+            return None
+        self.db.set_hints_shown(problem_id, level + 1, user_id=self.user_id)
+        reply = f"Hint {level + 1}/{len(hints)} ({HINT_LEVELS[level]}): {hints[level]}"
+        if level + 1 < len(hints):
+            reply += "\n\nGive it a try - if you're still stuck, ask for another hint."
+        return reply
+    
+    def clear_chat(self):
+        """Clear the current conversation history"""
+        self.conversation_history = []
+        problem_id = self.current_problem.get('id') if self.current_problem else None
+        if problem_id is not None:
+            self.db.set_hints_shown(problem_id, 0, user_id=self.user_id)
+        self.db.clear_conversation_history(problem_id, user_id=self.user_id)
+        print("Chat cleared!")
+
+    @traced('tutor.evaluate_code')
+    def evaluate_code(self, code, language="python", problem_record=None):
+        """Evaluate user's code attempt
+        
+        Python submissions are first triaged statically: syntax errors, the
+        untouched template and empty bodies get a templated reply. The rest run
+        against the problem's examples in the sandbox (problem_record is the
+        dataset row with the reference solution). Code that passes every example
+        is answered without the model; failing code gets a short review prompt
+        built around the results and the triage findings.
+        """
+        if not self.current_problem:
+            return "No problem is currently loaded."
+        
+        reply, eval_prompt, max_tokens = self.prepare_evaluation(code, language, problem_record)
+        if reply is not None:
+            return reply
+        return self.review(eval_prompt, max_tokens)
+    
+    def evaluate_code_stream(self, code, language="python", problem_record=None):
+        """Evaluate user's code attempt like evaluate_code, streaming the review token-by-token."""
+        if not self.current_problem:
+            yield {'type': 'error', 'error': "No problem is currently loaded."}
+            return
+        
+        reply, eval_prompt, max_tokens = self.prepare_evaluation(code, language, problem_record)
+        if reply is not None:
+            yield {'type': 'final', 'message': reply}
+            return
+        yield from self.review_stream(eval_prompt, max_tokens)
+    
+    def review(self, eval_prompt, max_tokens):
+        """Ask the model for the review prepared by prepare_evaluation"""
+        # Use internal chat method that doesn't show the prompt to user
+        return self._chat_internal(eval_prompt, max_tokens=max_tokens)
+    
+    def review_stream(self, eval_prompt, max_tokens):
+        """Stream the review prepared by prepare_evaluation as token/final/error events"""
+        full_context = self._build_internal_context(eval_prompt)
+        accumulated_chunks = []
+        try:
+            stream = self._generate_stream(
+                EVALUATE_CODE,
+                full_context,
+                max_tokens=max_tokens,
+                temperature=0.7,
+                top_p=0.9,
+                echo=False,
+                stop=["Student:", "User:", "Alex:", "\n\nAlex:"]
+            )
+            for token in stream:
+                accumulated_chunks.append(token)
+                yield {'type': 'token', 'token': token}
+        except Exception as e:
+            print(f"ERROR during streaming code evaluation: {str(e)}")
+            CONTEXT_OVERFLOW_TOTAL.labels(kind='generation_error').inc()
+            fallback = "I encountered a technical issue while evaluating your code. Could you try submitting it again? If this persists, try 'Clear Chat'."
+            self._add_message_to_history('alex', fallback)
+            yield {'type': 'error', 'error': fallback}
+            return
+        
+        response = self._clean_internal_response(''.join(accumulated_chunks))
+        self._add_message_to_history('alex', response)
+        
+        yield {'type': 'final', 'message': response}
+    
+    def prepare_evaluation(self, code, language, problem_record):
+        """Triage and sandbox a submission.
+        
+        Returns (reply, None, 0) when it was answered without the model (the reply
+        is already in the history), otherwise (None, review prompt, max_tokens)
+        for review() or review_stream(). Callers that rate limit reviews admit
+        the request in between, so answers that need no model cost nothing.
+        """
+        report = None
+        findings = None
+        if language == 'python':
+            template = self.extract_function_signature(problem_record.get('python', '')) if problem_record else None
+            findings = triage(code, template)
+            if findings.trivial:
+                reply = findings.reply()
+                CODE_EVALUATIONS_TOTAL.labels(path='triage').inc()
+                self._add_message_to_history('alex', reply)
+                return reply, None, 0
+            
+            if problem_record is not None and self.current_problem.get('id') is not None:
+                report = self.sandbox.run(self.current_problem['id'], problem_record, code)
+        
+        if report is not None:
+            reply = self._sandbox_reply(report)
+            if reply:
+                CODE_EVALUATIONS_TOTAL.labels(path='sandbox').inc()
+                self._add_message_to_history('alex', reply)
+                return reply, None, 0
+        
+        CODE_EVALUATIONS_TOTAL.labels(path='model').inc()
+        eval_prompt = self._build_eval_prompt(code, language, report, findings)
+        max_tokens = int(os.getenv('SANDBOX_REVIEW_MAX_TOKENS', 300)) if report is not None else 800
+        return None, eval_prompt, self.slo.budget(EVALUATE_CODE, max_tokens).max_tokens
+    
+    def _sandbox_reply(self, report: SandboxReport) -> Optional[str]:
+        """Answer clear-cut sandbox outcomes directly, or return None to ask the model"""
+        if os.getenv('SANDBOX_ANSWER_OUTRIGHT', 'True').lower() != 'true':
+            return None
+        
+        if not report.compiled:
+            return (f"Before we look at the logic, Python can't run this yet: {report.error}. "
+                    "Take another look at that line - what do you think is off there?")
+        
+        if report.all_passed:
+            slowest = max(case.get('time_ms', 0) for case in report.cases)
+            return (f"Nice work! Your solution passes the problem's examples ({report.passed}/{len(report.cases)}, "
+                    f"slowest run: {slowest:.1f} ms). Examples don't cover every edge case, though. "
+                    "What is the time and space complexity of your approach, and can you think of an input that might break it?")
+        
+        return None
+    
+    def _build_eval_prompt(self, code, language="python", report: Optional[SandboxReport] = None,
+                           findings: Optional[TriageResult] = None):
+        """Build the hidden review instructions for a code submission"""
+        notes = findings.findings() if findings else []
+        static_notes = ("\n            Static analysis: " + " ".join(notes)) if notes else ""
+        
+        if report is not None:
+            return f"""The student submitted this {language} code for "{self.current_problem['title']}":
+            ```{language}
+            {code}
+            ```
+            Test results: {report.summary()}{static_notes}
+            
+            As Alex, briefly help them see why the first failing example goes wrong without giving away the fix. Ask one guiding question."""
+        
+        return f"""The student submitted the following {language} code for the problem "{self.current_problem['title']}":
+            ```{language}
+            {code}
+            ```{static_notes}
+
+            As Alex, their coding assistant, analyze this code for correctness and relevance to the problem.
+            - If the code is just a default template or boilerplate (e.g., `def solution(): pass`), gently encourage the user to start writing their actual solution.
+            - If the code is valid but doesn't logically contribute to solving the problem (e.g., printing a random string, performing unrelated calculations), gently point this out and guide the user back to the problem's requirements.
+            - If the code is incorrect or doesn't solve the problem, guide them toward a better solution.
+            - If the code is a good start, encourage them and ask what the next step is.
+            - Use the Socratic method to guide, don't just give the answer.
+            - Be encouraging and focus on helping them learn."""
+    
+    def _build_internal_context(self, prompt):
+        """Append a hidden instruction prompt to the full conversation context"""
+        # Build the full conversation context
+        conversation_context = self._build_conversation_context()
+        
+        # Add the evaluation prompt to the context
+        return conversation_context + "\n\n" + prompt + "\n\nAlex:"
+    
+    def _chat_internal(self, prompt, max_tokens=800):
+        """Internal chat method that doesn't add the prompt to conversation history"""
+        full_context = self._build_internal_context(prompt)
+        
+        # Generate response with error handling
+        try:
+            response = self._generate(
+                EVALUATE_CODE,
+                full_context,
+                max_tokens=max_tokens,
+                temperature=0.7,
+                top_p=0.9,
+                echo=False,
+                stop=["Student:", "User:", "Alex:", "\n\nAlex:"]
+            )
+        except Exception as e:
+            print(f"ERROR during code evaluation: {str(e)}")
+            CONTEXT_OVERFLOW_TOTAL.labels(kind='generation_error').inc()
+            fallback = "I encountered a technical issue while evaluating your code. Could you try submitting it again? If this persists, try 'Clear Chat'."
+            self._add_message_to_history('alex', fallback)
+            return fallback
+        
+        response = self._clean_internal_response(response['choices'][0]['text'])
+        
+        # Add only the response to history
+        self._add_message_to_history('alex', response)
+        
+        return response
+    
+    def _clean_internal_response(self, text):
+        """Strip leaked reasoning tags and role prefixes from an internal generation"""
+        raw_response = text.strip()
+        
+        # Remove any leaked internal reasoning tags
+        if '</thought>' in raw_response:
+            raw_response = raw_response.split('</thought>', 1)[1].strip()
+        raw_response = re.sub(r'</?thought>', '', raw_response)
+        raw_response = re.sub(r'</?response>', '', raw_response)
+        
+        # Remove any duplicate "Alex:" prefixes
+        raw_response = re.sub(r'^Alex:\s*', '', raw_response)
+        
+        # Split by "Alex:" and take only the first response
+        if 'Alex:' in raw_response:
+            raw_response = raw_response.split('Alex:')[0].strip()
+
+        return self._clean_response(raw_response)
+    
+    def extract_function_signature(self, python_solution):
+        """Extract function signature from the complete solution"""
+        try:
+            lines = python_solution.strip().split('\n')
+            
+            for line in lines:
+                line = line.strip()
+                # Look for function definition
+                if line.startswith('def ') and ':' in line:
+                    # Extract the function signature
+                    if line.endswith(':'):
+                        return line + '\n    pass'
+                    else:
+                        # Handle multi-line function definitions
+                        func_def = line
+                        # You might need to handle cases where the signature spans multiple lines
+                        return func_def + ':\n    pass'
+                        
+                # Also look for class-based solutions
+                elif line.startswith('class Solution:'):
+                    # Look for the method definition in the next few lines
+                    line_idx = lines.index(line)
+                    for i, next_line in enumerate(lines[line_idx:line_idx+10]):
+                        if next_line.strip().startswith('def ') and ':' in next_line:
+                            method_line = next_line.strip()
+                            if method_line.endswith(':'):
+                                return f"class Solution:\n    {method_line}\n        pass"
+                            else:
+                                return f"class Solution:\n    {method_line}:\n        pass"
+            
+            # Fallback if no function found
+            return "def solution():\n    pass"
+            
+        except Exception as e:
+            print(f"Error extracting function signature: {e}")
+            return "def solution():\n    pass"
@@ -0,0 +1,210 @@
+"""
+Async WebSocket gateway for ZeroToHire.
+Serves /ws/chat on an asyncio event loop so idle connections cost a coroutine instead of an OS thread.
+
+Usage:
+    python ws_gateway.py
+    REACT_APP_WS_URL=ws://127.0.0.1:5001/ws/chat   (frontend)
+
+The protocol is the same as the flask_sock endpoint in llm_comm.py (see
+chat_frames.py): clients connect with ?token=<access token> when signed in, send
+{"message", "codeContext", "requestId"} and receive token/final/error frames.
+Each connection has its own tutor session.
+Loading sessions, intent replies and admission run on one small thread pool;
+admitted generations run on another (they block on the model router, which
+decides which model serves them and queues the rest), and their frames are
+handed back to the event loop as they are produced. Pair with
+INFERENCE_BACKEND=socket to keep the model weights in model_server.py.
+
+The gateway builds its own tutor and problem set and runs no background jobs;
+tombstone purging, maintenance and hint precomputation stay with the Flask
+backend, which should run alongside it.
+"""
+
+import asyncio
+import contextvars
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from dotenv import load_dotenv
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+
+import tracing
+from admission import AdmissionController, AdmissionRejected, INTERACTIVE, MAX_QUEUE, REVIEW, client_address
+from chat_frames import ChatFrames, SocketSession, socket_user
+from database import Database
+from dataset_snapshot import load_problems, DEFAULT_SNAPSHOT_PATH
+from hint_ladder import HintLadders
+from inference import resolve_model_paths
+from problem_catalog import ProblemCatalog
+from recommender import Recommender
+from tutor import CodingTutor
+
+
+WS_PATH = '/ws/chat'
+_DONE = object()
+
+# Threads for loading sessions, intent replies and admission (short database work)
+SESSION_WORKERS = int(os.getenv('WS_GATEWAY_SESSION_WORKERS', 4))
+
+
+class Gateway:
+    """The tutor, chat frames and thread pools behind one gateway process."""
+
+    def __init__(self, tutor: CodingTutor, chat_frames: ChatFrames, workers: int = 0,
+                 session_workers: int = SESSION_WORKERS):
+        self.tutor = tutor
+        self.chat_frames = chat_frames
+        self.session_executor = ThreadPoolExecutor(max_workers=session_workers, thread_name_prefix='ws-session')
+        # A thread for every model slot plus every request admission lets queue, so admitted turns wait in
+        # the router's priority queue (which admission counts) instead of behind the pool's own FIFO queue
+        workers = workers or sum(tutor.router.concurrency.values()) + MAX_QUEUE
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ws-generate')
+        self._free_workers = threading.BoundedSemaphore(workers)
+
+    def _start_turn(self, connection: SocketSession, payload):
+        """Apply the payload's token and run the turn up to the model, on a session thread."""
+        error = connection.begin_turn(payload)
+        if error:
+            return [error], None
+        return self.chat_frames.start(connection.session, payload, connection.client)
+
+    def _reserve_worker(self, payload):
+        """Claim a generation thread for an admitted turn. Returns an error frame if none is free."""
+        if self._free_workers.acquire(blocking=False):
+            return None
+        request_class = REVIEW if payload.get('type') == 'evaluate' else INTERACTIVE
+        try:
+            self.chat_frames.admission.reject_busy(request_class)
+        except AdmissionRejected as e:
+            return {'type': 'error', 'error': e.message, 'retryAfter': e.retry_after}
+
+    def _produce_frames(self, stream, loop, frames: asyncio.Queue, cancelled: threading.Event):
+        """Run one turn's generation on a worker thread, pushing frames onto the event loop's queue."""
+        try:
+            try:
+                for frame in stream:
+                    if cancelled.is_set():
+                        break
+                    loop.call_soon_threadsafe(frames.put_nowait, frame)
+            finally:
+                # Closing the generator stops the model stream early if the client left
+                stream.close()
+        except Exception as e:
+            print(f"WebSocket generation error: {e}")
+            loop.call_soon_threadsafe(frames.put_nowait, {'type': 'error', 'error': 'An error occurred processing your message.'})
+        finally:
+            self._free_workers.release()
+            loop.call_soon_threadsafe(frames.put_nowait, _DONE)
+
+    async def _turn(self, websocket, connection: SocketSession, payload, loop) -> bool:
+        """Serve one chat turn. Returns False if the client went away."""
+        try:
+            # Each stage copies the context so its spans join this message's trace
+            immediate, stream = await loop.run_in_executor(
+                self.session_executor, contextvars.copy_context().run, self._start_turn, connection, payload
+            )
+        except Exception as e:
+            print(f"WebSocket turn error: {e}")
+            immediate, stream = [{'type': 'error', 'error': 'An error occurred processing your message.'}], None
+
+        if stream is not None:
+            busy = self._reserve_worker(payload)
+            if busy:
+                stream.close()
+                immediate, stream = immediate + [busy], None
+
+        try:
+            for frame in immediate:
+                await websocket.send(json.dumps(frame))
+        except ConnectionClosed:
+            if stream is not None:
+                stream.close()
+                self._free_workers.release()
+            return False
+        if stream is None:
+            return True
+
+        frames = asyncio.Queue()
+        cancelled = threading.Event()
+        loop.run_in_executor(self.executor, contextvars.copy_context().run,
+                             self._produce_frames, stream, loop, frames, cancelled)
+        try:
+            while True:
+                frame = await frames.get()
+                if frame is _DONE:
+                    return True
+                await websocket.send(json.dumps(frame))
+        except ConnectionClosed:
+            cancelled.set()
+            return False
+
+    async def handle_chat(self, websocket):
+        """Serve one connection: one chat turn at a time, like the flask_sock endpoint."""
+        url = urlsplit(websocket.request.path)
+        if url.path != WS_PATH:
+            await websocket.close(code=1008, reason='Unknown path')
+            return
+
+        token = parse_qs(url.query).get('token', [None])[0]
+        current_user = socket_user(token)
+        if token and current_user is None:
+            await websocket.close(code=1008, reason='Invalid or expired token')
+            return
+
+        loop = asyncio.get_running_loop()
+        address = client_address(websocket.remote_address[0] if websocket.remote_address else None,
+                                 websocket.request.headers.get('X-Forwarded-For'))
+        # Loading the session reads the database, so it runs off the event loop too
+        connection = await loop.run_in_executor(self.session_executor, SocketSession, self.tutor, current_user, address)
+        async for payload_raw in websocket:
+            try:
+                payload = json.loads(payload_raw)
+            except json.JSONDecodeError:
+                await websocket.send(json.dumps({'type': 'error', 'error': 'Invalid JSON payload'}))
+                continue
+
+            trace = tracing.begin_trace('WS /ws/chat message', request_id=payload.get('requestId'))
+            try:
+                connected = await self._turn(websocket, connection, payload, loop)
+            finally:
+                tracing.end_trace(trace)
+            if not connected:
+                return
+
+
+def build_gateway() -> Gateway:
+    """Load the tutor and problem set the way llm_comm.py does, without its background jobs."""
+    db = Database(os.getenv('DATABASE_PATH', 'data/zerotohire.db'))
+
+    inference_backend = os.getenv('INFERENCE_BACKEND', 'llama_cpp').lower()
+    model_path = small_model_path = None
+    if inference_backend == 'llama_cpp':
+        print("Loading the model in the gateway; set INFERENCE_BACKEND=socket to share model_server.py instead")
+        model_path, small_model_path = resolve_model_paths()
+    tutor = CodingTutor(model_path, db, small_model_path=small_model_path, backend=inference_backend)
+
+    problems = load_problems(os.getenv('LEETCODE_DATASET', 'viccon23/leetcode'),
+                             os.getenv('LEETCODE_SNAPSHOT', DEFAULT_SNAPSHOT_PATH))['train']
+    # Ladders precomputed by the backend are read from the database; none are built here
+    tutor.hint_ladders = HintLadders(tutor, db, problems)
+    chat_frames = ChatFrames(AdmissionController(tutor.router), problems, Recommender(ProblemCatalog(problems)))
+    return Gateway(tutor, chat_frames, int(os.getenv('WS_GATEWAY_WORKERS', 0)))
+
+
+async def main():
+    load_dotenv()
+    gateway = build_gateway()
+    host = os.getenv('WS_GATEWAY_HOST', '127.0.0.1')
+    port = int(os.getenv('WS_GATEWAY_PORT', 5001))
+    async with serve(gateway.handle_chat, host, port, ping_interval=30, max_size=2 ** 20):
+        print(f"WebSocket gateway listening on ws://{host}:{port}{WS_PATH}")
+        await asyncio.Future()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
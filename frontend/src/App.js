@@ -4,7 +4,7 @@ import ChatPanel from './components/ChatPanel';
 import CodeEditor from './components/CodeEditor';
 import ProblemBrowser from './components/ProblemBrowser';
 import UserProfile from './components/UserProfile';
-import api, { API_BASE_URL } from './services/api';
+import api, { API_BASE_URL, tokenManager } from './services/api';
 
 const DEFAULT_TEMPLATE = 'def solution():\n    pass';
 const CODE_STORAGE_PREFIX = 'zerotohire_code_';
@@ -220,7 +220,9 @@ function App() {
     }
 
     try {
-      const socket = new WebSocket(WS_URL);
+      // Browsers can't set headers on a WebSocket, so the access token goes in the URL
+      const token = tokenManager.getToken();
+      const socket = new WebSocket(token ? `${WS_URL}?token=${encodeURIComponent(token)}` : WS_URL);
       wsRef.current = socket;
 
       socket.onopen = () => {
@@ -315,6 +317,8 @@ function App() {
 
     const payload = {
       message,
+      // The current token, which may have been refreshed or cleared since the socket opened
+      token: tokenManager.getToken() || '',
       ...(includeCodeInContext && code.trim() && {
         codeContext: {
           code: code,
@@ -388,7 +392,20 @@ function App() {
     if (!code.trim()) return;
 
     setIsLoading(true);
+    setIsStreamingResponse(false);
     setError(null);
+
+    // Stream the review over the WebSocket like a chat reply; the final frame carries the history
+    const socket = wsRef.current;
+    if (isWebSocketReady && socket && socket.readyState === WebSocket.OPEN) {
+      try {
+        socket.send(JSON.stringify({ type: 'evaluate', code, language: 'python', token: tokenManager.getToken() || '' }));
+        return;
+      } catch (err) {
+        console.error('WebSocket send failed, falling back to HTTP:', err);
+      }
+    }
+
     try {
       const response = await api.post('/evaluate-code', { 
         code, 
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import './ProblemBrowser.css';
 import api from '../services/api';
 
@@ -6,6 +6,11 @@ const ProblemBrowser = ({ onSelectProblem, onClose, isLoading }) => {
   const [problems, setProblems] = useState([]);
   const [filters, setFilters] = useState({ difficulties: [], problem_types: [] });
   const [searchTerm, setSearchTerm] = useState('');
+  const [debouncedSearch, setDebouncedSearch] = useState('');
+  const [suggestions, setSuggestions] = useState([]);
+  const [recommendations, setRecommendations] = useState([]);
+  const suggestionCache = useRef({});
+  const latestSuggestionQuery = useRef('');
   const [selectedDifficulties, setSelectedDifficulties] = useState([]);
   const [selectedTypes, setSelectedTypes] = useState([]);
   const [loading, setLoading] = useState(true);
@@ -13,16 +18,48 @@ const ProblemBrowser = ({ onSelectProblem, onClose, isLoading }) => {
   const [hasMore, setHasMore] = useState(true);
 
   const ITEMS_PER_PAGE = 20;
+  const SEARCH_DEBOUNCE_MS = 250;
 
   useEffect(() => {
     loadFilters();
     loadProblems();
+    loadRecommendations();
   }, []);
 
   useEffect(() => {
     setCurrentPage(1);
     loadProblems(true);
-  }, [searchTerm, selectedDifficulties, selectedTypes]);
+  }, [debouncedSearch, selectedDifficulties, selectedTypes]);
+
+  // Run the full search once typing pauses; suggestions update on every keystroke
+  useEffect(() => {
+    const timer = setTimeout(() => setDebouncedSearch(searchTerm), SEARCH_DEBOUNCE_MS);
+    loadSuggestions(searchTerm);
+    return () => clearTimeout(timer);
+  }, [searchTerm]);
+
+  const loadSuggestions = async (query) => {
+    const key = query.trim().toLowerCase();
+    latestSuggestionQuery.current = key;
+    if (!key) {
+      setSuggestions([]);
+      return;
+    }
+    if (suggestionCache.current[key]) {
+      setSuggestions(suggestionCache.current[key]);
+      return;
+    }
+    try {
+      const response = await api.get('/problems/autocomplete', { params: { q: key } });
+      suggestionCache.current[key] = response.data.suggestions;
+      // Ignore responses that arrive after the user kept typing
+      if (latestSuggestionQuery.current === key) {
+        setSuggestions(response.data.suggestions);
+      }
+    } catch (error) {
+      console.error('Failed to load suggestions:', error);
+    }
+  };
 
   const loadFilters = async () => {
     try {
@@ -33,12 +70,21 @@ const ProblemBrowser = ({ onSelectProblem, onClose, isLoading }) => {
     }
   };
 
+  const loadRecommendations = async () => {
+    try {
+      const response = await api.get('/recommendations', { params: { limit: 3 } });
+      setRecommendations(response.data.recommendations);
+    } catch (error) {
+      console.error('Failed to load recommendations:', error);
+    }
+  };
+
   const loadProblems = async (reset = false) => {
     setLoading(true);
     try {
       const params = new URLSearchParams();
       
-      if (searchTerm) params.append('search', searchTerm);
+      if (debouncedSearch) params.append('search', debouncedSearch);
       if (selectedDifficulties.length > 0) {
         selectedDifficulties.forEach(diff => params.append('difficulty', diff));
       }
@@ -104,6 +150,7 @@ const ProblemBrowser = ({ onSelectProblem, onClose, isLoading }) => {
           problem.id === problemId ? {...problem, completed: !currentStatus } :problem
         )
       );  
+      loadRecommendations();
     } catch (error) {
       console.error('Failed to toggle completion: ', error);
     }
@@ -111,6 +158,7 @@ const ProblemBrowser = ({ onSelectProblem, onClose, isLoading }) => {
 
   const clearFilters = () => {
     setSearchTerm('');
+    setSuggestions([]);
     setSelectedDifficulties([]);
     setSelectedTypes([]);
   };
@@ -136,11 +184,31 @@ const ProblemBrowser = ({ onSelectProblem, onClose, isLoading }) => {
           <div className="search-section">
             <input
               type="text"
-              placeholder="Search problems by title..."
+              placeholder="Search problems by title or description..."
               value={searchTerm}
               onChange={(e) => setSearchTerm(e.target.value)}
+              onBlur={() => setTimeout(() => setSuggestions([]), 150)}
               className="search-input"
             />
+            {suggestions.length > 0 && (
+              <ul className="search-suggestions">
+                {suggestions.map(suggestion => (
+                  <li
+                    key={suggestion.id}
+                    className="search-suggestion"
+                    onMouseDown={() => onSelectProblem(suggestion.id)}
+                  >
+                    <span>{suggestion.title}</span>
+                    <span
+                      className="problem-difficulty"
+                      style={{ color: getDifficultyColor(suggestion.difficulty) }}
+                    >
+                      {suggestion.difficulty}
+                    </span>
+                  </li>
+                ))}
+              </ul>
+            )}
           </div>
 
           <div className="filters-section">
@@ -184,6 +252,26 @@ const ProblemBrowser = ({ onSelectProblem, onClose, isLoading }) => {
           </div>
         </div>
 
+        {recommendations.length > 0 && (
+          <div className="recommendations-section">
+            <label>Recommended next:</label>
+            <div className="recommendations-list">
+              {recommendations.map(problem => (
+                <button
+                  key={problem.id}
+                  className="recommendation-chip"
+                  onClick={() => onSelectProblem(problem.id)}
+                  disabled={isLoading}
+                  title={problem.matched_types.length > 0 ? `Builds on ${problem.matched_types.join(', ')}` : problem.problem_types.join(', ')}
+                >
+                  <span>{problem.title}</span>
+                  <span style={{ color: getDifficultyColor(problem.difficulty) }}>{problem.difficulty}</span>
+                </button>
+              ))}
+            </div>
+          </div>
+        )}
+
         <div className="problems-list">
           {problems.map(problem => (
             <div key={problem.id} className="problem-item">